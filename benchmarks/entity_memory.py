@@ -0,0 +1,119 @@
+import gc
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.constants import *
+from src.enemy import Enemy, enemy_pool, release_enemy
+from src.tower import Projectile, projectile_pool
+from src.loot import LootDrop, loot_pool
+from src.simulation import Simulation
+from src.path import PathIndex
+
+# Memory / allocation benchmark for pooled __slots__ entities.
+#
+# Replays the entity lifecycle of a 1,000-wave endless run: every enemy of
+# a wave is alive at once, each one is shot ceil(health / FIREWALL damage)
+# times, and 20% of kills drop loot. Running the real simulation for 1,000
+# waves would take hours, so only the churn is replayed. The "before"
+# column uses dict-backed copies of the classes built without pools.
+#
+#   python benchmarks/entity_memory.py [waves]
+
+WAVES = 1000
+SHOT_DAMAGE = TOWER_TYPES["FIREWALL"]["damage"]
+
+def dict_backed(cls):
+    # Same methods, no __slots__: how the class looked before pooling
+    attrs = {k: v for k, v in cls.__dict__.items() if k not in ("__slots__", "__dict__", "__weakref__") and k not in cls.__slots__}
+    return type(cls.__name__, (), attrs)
+
+class Unpooled:
+    # Pool interface that always allocates and never reuses
+    def __init__(self, cls):
+        self.cls = cls
+        self.created = 0
+
+    def acquire(self, *args):
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        pass
+
+def per_entity_bytes(cls, args, count=10000):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [cls(*args) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Minus the list holding them
+    return (after - before - sys.getsizeof(objs)) / count
+
+def build_waves(waves):
+    sim = Simulation(mode="ENDLESS", seed=1234)
+    plan = []
+    for wave_index in range(waves):
+        sim.wave_index = wave_index
+        plan.append([etype for etype, count, delay in sim.generate_endless_wave() for _ in range(count)])
+    return plan
+
+def replay(plan, enemies, projectiles, loot, release):
+    path = PathIndex(LEVELS[1]["waypoints"])
+    rng = random.Random(99)
+    gc.collect()
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+    start = time.perf_counter()
+
+    for wave in plan:
+        live = [enemies.acquire(etype, path) for etype in wave]
+        for enemy in live:
+            for _ in range(math.ceil(enemy.health / SHOT_DAMAGE)):
+                shot = projectiles.acquire(0, 0, enemy, SHOT_DAMAGE, WHITE, "FIREWALL")
+                projectiles.release(shot)
+            if rng.random() < 0.2:
+                drop = loot.acquire(enemy.x, enemy.y, "CRYPTO", 0)
+                loot.release(drop)
+            release(enemy)
+
+    elapsed = time.perf_counter() - start
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+    return elapsed, collections
+
+def main(waves=WAVES):
+    plan = build_waves(waves)
+    spawned = sum(len(wave) for wave in plan)
+    path = PathIndex(LEVELS[1]["waypoints"])
+
+    print(f"{waves} endless waves, {spawned} enemies")
+    print()
+    print(f"{'bytes per entity':<18}{'before':>10}{'after':>10}")
+    target = Enemy("MALWARE", path)
+    for cls, args in ((Enemy, ("MALWARE", path)),
+                      (Projectile, (0, 0, target, 10, WHITE, "FIREWALL")),
+                      (LootDrop, (0, 0, "CRYPTO", 0))):
+        print(f"{cls.__name__:<18}{per_entity_bytes(dict_backed(cls), args):>10.0f}{per_entity_bytes(cls, args):>10.0f}")
+
+    unpooled = (Unpooled(dict_backed(Enemy)), Unpooled(dict_backed(Projectile)), Unpooled(dict_backed(LootDrop)))
+    before = replay(plan, *unpooled, release=lambda enemy: None)
+    for pool in (enemy_pool, projectile_pool, loot_pool):
+        pool.clear()
+        pool.created = 0
+    after = replay(plan, enemy_pool, projectile_pool, loot_pool, release=release_enemy)
+
+    print()
+    print(f"{'lifecycle replay':<18}{'before':>10}{'after':>10}")
+    print(f"{'enemies allocated':<18}{unpooled[0].created:>10}{enemy_pool.created:>10}")
+    print(f"{'shots allocated':<18}{unpooled[1].created:>10}{projectile_pool.created:>10}")
+    print(f"{'loot allocated':<18}{unpooled[2].created:>10}{loot_pool.created:>10}")
+    print(f"{'gc collections':<18}{before[1]:>10}{after[1]:>10}")
+    print(f"{'seconds':<18}{before[0]:>10.2f}{after[0]:>10.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else WAVES)
@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.constants import *
+from src.enemy import Enemy, enemy_pool
+from src.tower import Tower, Projectile
+from src.enemy_table import EnemyTable, HAVE_NUMPY
+from src.projectile_batch import ProjectileBatch
+from src.simulation import Simulation
+
+# Headless simulation benchmarks with performance budgets.
+#
+# Each scenario builds a Simulation in a fixed state and steps it. A clean
+# pass measures whole ticks (what Game.update runs every frame): ticks/sec,
+# p50/p99 tick time and net allocated blocks per tick. A second, profiled
+# pass wraps the PROFILED methods (tower targeting and the enemy and
+# projectile movers, for both the object and table stores) to give each
+# one's per-tick time and net allocated blocks per call (inclusive of
+# whatever it calls). Results are written as JSON and compared with
+# benchmarks/baselines.json; a scenario slower than its baseline by more
+# than the tolerance fails the run. Baselines are the per-metric median of
+# several full runs, so one lucky or unlucky run doesn't set the budget.
+#
+#   python benchmarks/suite.py                      # run and check budgets
+#   python benchmarks/suite.py --update-baselines   # record this machine's numbers (median of BASELINE_RUNS)
+#   python benchmarks/suite.py --only ids_saturation --out results.json
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+TOLERANCE = 0.5 # Allowed p50 slowdown over baseline before a budget fails
+WARMUP_TICKS = 30
+REPEAT = 5
+BASELINE_RUNS = 5 # Full runs whose median becomes the baseline
+
+PROFILED = [(Tower, "update"), (Enemy, "move"), (Projectile, "move"),
+            (Tower, "acquire_target"), (EnemyTable, "step"), (ProjectileBatch, "step")]
+
+def spawn(sim, enemy_type, rng=None, spread=0):
+    table = sim.enemy_table
+    if table is not None:
+        enemy = table.spawn(enemy_type)
+        if spread:
+            i = enemy.index
+            table.dist[i] = rng.uniform(0, spread)
+            table.x[i], table.y[i], seg = sim.path.position(table.dist[i])
+            table.prev_x[i], table.prev_y[i] = table.x[i], table.y[i]
+            table.seg[i] = seg + 1
+    else:
+        enemy = enemy_pool.acquire(enemy_type, sim.path)
+        if spread:
+            # Scatter along the first part of the path
+            enemy.distance = rng.uniform(0, spread)
+            enemy.x, enemy.y, seg = sim.path.position(enemy.distance)
+            enemy.waypoint_index = seg + 1
+    sim.enemies.append(enemy)
+    sim.enemy_grid.insert(enemy)
+    return enemy
+
+def place_grid(sim, tower_type, count, rng):
+    # Towers on random grid cells across the map
+    sim.money = 10**9
+    for _ in range(count):
+        x = rng.randrange(MAP_WIDTH // GRID_SIZE) * GRID_SIZE + GRID_SIZE // 2
+        y = rng.randrange(MAP_HEIGHT // GRID_SIZE) * GRID_SIZE + GRID_SIZE // 2
+        sim.place_tower(tower_type if tower_type else rng.choice(["FIREWALL", "ANTIVIRUS", "IDS", "HONEYPOT"]), x, y)
+
+def level3_wave3_ddos():
+    # Level 3, third wave: 20 DDOS
+    sim = Simulation("STORY", seed=1)
+    sim.load_level(2)
+    rng = random.Random(1)
+    place_grid(sim, None, 12, rng)
+    sim.wave_index = 2
+    sim.start_next_wave()
+    return sim, 1200
+
+def endless_wave_50():
+    # The spawn list endless mode generates for wave 50
+    sim = Simulation("ENDLESS", seed=2)
+    rng = random.Random(2)
+    place_grid(sim, None, 40, rng)
+    sim.wave_index = 49
+    sim.claimed_perks.add(49)
+    sim.start_next_wave()
+    sim.lives = 10**9
+    return sim, 1200
+
+def towers_200_enemies_5k():
+    sim = Simulation("ENDLESS", seed=3)
+    rng = random.Random(3)
+    place_grid(sim, None, 200, rng)
+    for _ in range(5000):
+        spawn(sim, rng.choice(["MALWARE", "PHISHING", "DDOS", "SOCIAL_ENG", "RANSOMWARE"]), rng, spread=2000)
+    sim.wave_in_progress = True
+    sim.lives = 10**9
+    return sim, 60
+
+def table_towers_200_enemies_5k():
+    # towers_200_enemies_5k on the NumPy EnemyTable and ProjectileBatch
+    sim = Simulation("ENDLESS", enemy_table=True, seed=3)
+    rng = random.Random(3)
+    place_grid(sim, None, 200, rng)
+    for _ in range(5000):
+        spawn(sim, rng.choice(["MALWARE", "PHISHING", "DDOS", "SOCIAL_ENG", "RANSOMWARE"]), rng, spread=2000)
+    sim.wave_in_progress = True
+    sim.lives = 10**9
+    return sim, 60
+
+def ids_saturation():
+    # Fast-firing IDS towers against tanky enemies: hundreds of shots in flight
+    sim = Simulation("ENDLESS", seed=4)
+    rng = random.Random(4)
+    place_grid(sim, "IDS", 60, rng)
+    for _ in range(300):
+        spawn(sim, "ZEUS", rng, spread=1500)
+    sim.wave_in_progress = True
+    sim.lives = 10**9
+    return sim, 300
+
+SCENARIOS = {
+    "level3_wave3_ddos": level3_wave3_ddos,
+    "endless_wave_50": endless_wave_50,
+    "towers_200_enemies_5k": towers_200_enemies_5k,
+    "ids_saturation": ids_saturation,
+}
+if HAVE_NUMPY:
+    SCENARIOS["table_towers_200_enemies_5k"] = table_towers_200_enemies_5k
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def summarize(times_s):
+    ms = [t * 1000 for t in times_s]
+    return {
+        "p50_ms": round(statistics.median(ms), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+    }
+
+def clean_pass(build):
+    sim, ticks = build()
+    for _ in range(WARMUP_TICKS):
+        sim.step(FRAME_MS)
+    times = []
+    blocks = []
+    for _ in range(ticks):
+        before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        sim.step(FRAME_MS)
+        times.append(time.perf_counter() - start)
+        blocks.append(sys.getallocatedblocks() - before)
+    result = summarize(times)
+    result["ticks_per_sec"] = round(len(times) / sum(times), 1)
+    result["alloc_blocks_per_tick"] = round(statistics.fmean(blocks), 2)
+    result["ticks"] = ticks
+    return result
+
+def profiled_pass(build):
+    # Per-tick time spent in each profiled method (wrapping adds some overhead)
+    totals = {}
+    originals = {}
+    for cls, name in PROFILED:
+        label = f"{cls.__name__}.{name}"
+        original = getattr(cls, name)
+        originals[(cls, name)] = original
+        totals[label] = [0.0, 0, 0] # seconds, calls, net blocks
+
+        def timed(*args, _original=original, _total=totals[label], **kwargs):
+            before = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                _total[0] += time.perf_counter() - start
+                _total[1] += 1
+                _total[2] += sys.getallocatedblocks() - before
+        setattr(cls, name, timed)
+
+    try:
+        sim, ticks = build()
+        for _ in range(WARMUP_TICKS):
+            sim.step(FRAME_MS)
+        per_tick = {label: [] for label in totals}
+        calls = {label: 0 for label in totals}
+        blocks = {label: 0 for label in totals}
+        for _ in range(ticks):
+            for total in totals.values():
+                total[:] = [0.0, 0, 0]
+            sim.step(FRAME_MS)
+            for label, (spent, count, allocated) in totals.items():
+                per_tick[label].append(spent)
+                calls[label] += count
+                blocks[label] += allocated
+    finally:
+        for (cls, name), original in originals.items():
+            setattr(cls, name, original)
+
+    result = {}
+    for label, times in per_tick.items():
+        result[label] = summarize(times)
+        result[label]["calls_per_tick"] = round(calls[label] / ticks, 1)
+        result[label]["alloc_blocks_per_call"] = round(blocks[label] / calls[label], 2) if calls[label] else 0.0
+    return result
+
+def calibrate():
+    # Fixed pure-Python workload (best of 5, ms). Budgets are scaled by how
+    # fast this machine runs it compared with the machine that set them.
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        total = 0
+        items = {}
+        for i in range(200000):
+            total += i * i % 7
+            items[i & 1023] = total
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3)
+
+def check_budgets(results, baselines, tolerance):
+    failures = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        # How much slower this machine is right now than the baseline's
+        speed = result["calibration_ms"] / baseline["calibration_ms"]
+        # Tail latency is noisier, so p99 gets twice the headroom
+        for metric, headroom in (("p50_ms", tolerance), ("p99_ms", tolerance * 2)):
+            limit = baseline[metric] * speed * (1 + headroom)
+            if result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]:.3f} > budget {limit:.3f} (baseline {baseline[metric]:.3f})")
+    return failures
+
+def run_suite(names, repeat, profile):
+    results = {}
+    for name in names:
+        build = SCENARIOS[name]
+        # Best of several runs: noise only ever makes a run slower
+        calibration = calibrate()
+        result = min((clean_pass(build) for _ in range(repeat)), key=lambda r: r["p50_ms"])
+        result["calibration_ms"] = min(calibration, calibrate())
+        if profile:
+            result["methods"] = profiled_pass(build)
+        results[name] = result
+        print(f"{name:<30}{result['ticks_per_sec']:>10.1f} ticks/s  p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  {result['alloc_blocks_per_tick']:+.1f} blocks/tick")
+        for label, method in result.get("methods", {}).items():
+            print(f"    {label:<26}p50 {method['p50_ms']:.3f} ms  p99 {method['p99_ms']:.3f} ms  {method['calls_per_tick']:.0f} calls/tick  {method['alloc_blocks_per_call']:+.1f} blocks/call")
+    return results
+
+def median_baselines(runs):
+    # Per-metric median over full runs of the suite
+    return {name: {metric: round(statistics.median(run[name][metric] for run in runs), 4)
+                   for metric in ("p50_ms", "p99_ms", "ticks_per_sec", "calibration_ms")}
+            for name in runs[0]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless simulation benchmarks")
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS), help="Run just these scenarios")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update-baselines", action="store_true", help="Store the median of several runs as the new baselines")
+    parser.add_argument("--runs", type=int, default=BASELINE_RUNS, help="Full runs for --update-baselines")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Clean passes per scenario (best is kept)")
+    parser.add_argument("--no-profile", action="store_true", help="Skip the per-method pass")
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    names = args.only or list(SCENARIOS)
+    runs = []
+    for run in range(args.runs if args.update_baselines else 1):
+        if args.update_baselines:
+            print(f"Run {run + 1} of {args.runs}")
+        # The per-method pass only goes in the report, so it runs once
+        runs.append(run_suite(names, args.repeat, not args.no_profile and run == 0))
+    results = runs[0]
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)["results"]
+
+    if args.update_baselines:
+        baselines.update(median_baselines(runs))
+        with open(args.baselines, "w") as f:
+            json.dump({"python": report["python"], "machine": report["machine"], "results": baselines}, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return 0
+
+    failures = check_budgets(results, baselines, args.tolerance)
+    for failure in failures:
+        print("BUDGET EXCEEDED", failure)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
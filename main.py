@@ -3,103 +3,166 @@ import sys
 import textwrap
 from src.constants import *
 from src.game import Game
-from src.enemy import draw_enemy_visual
-from src.tower import draw_tower_visual
-
-def draw_sidebar(screen, game, selected_tower, font_title, font_body):
-    # Sidebar Background
-    sidebar_width = SCREEN_WIDTH - MAP_WIDTH
-    panel_width = sidebar_width - 20
-    
-    sidebar_rect = pygame.Rect(MAP_WIDTH, 0, sidebar_width, SCREEN_HEIGHT)
-    pygame.draw.rect(screen, UI_BG, sidebar_rect)
-    pygame.draw.line(screen, NEON_BLUE, (MAP_WIDTH, 0), (MAP_WIDTH, SCREEN_HEIGHT), 2)
-
-    # Title
-    title_surf = font_title.render("CODEBREAK", True, NEON_BLUE)
-    screen.blit(title_surf, (MAP_WIDTH + 20, 20))
-    subtitle_surf = font_body.render("CYBER DEFENSE", True, WHITE)
-    screen.blit(subtitle_surf, (MAP_WIDTH + 20, 60))
-
-    # Stats Panel
-    y_offset = 120
-    stats = [
-        f"MONEY: ${game.money}",
-        f"LIVES: {game.lives}",
-        f"WAVE: {game.wave_index}/{len(game.waves)}"
-    ]
-    
-    for stat in stats:
-        pygame.draw.rect(screen, (30, 30, 40), (MAP_WIDTH + 10, y_offset - 5, panel_width, 35), border_radius=5)
-        pygame.draw.rect(screen, NEON_BLUE, (MAP_WIDTH + 10, y_offset - 5, panel_width, 35), 1, border_radius=5)
-        
-        text = font_body.render(stat, True, NEON_GREEN)
-        screen.blit(text, (MAP_WIDTH + 20, y_offset))
-        y_offset += 50
-
-    # Tower Selection
-    y_offset += 20
-    header = font_body.render("DEFENSES (R-Click Sell):", True, WHITE)
-    screen.blit(header, (MAP_WIDTH + 20, y_offset))
-    y_offset += 30
-
-    tower_keys = ["FIREWALL", "ANTIVIRUS", "IDS", "HONEYPOT"]
-    for i, key in enumerate(tower_keys):
-        t_data = TOWER_TYPES[key]
-        color = t_data["color"]
-        
-        # Selection Box Highlight
-        if selected_tower == key:
-            pygame.draw.rect(screen, color, (MAP_WIDTH + 10, y_offset - 10, panel_width, 60), 2, border_radius=5)
-        
-        # Tower Info
-        name_text = font_body.render(f"[{i+1}] {t_data['name']}", True, color)
-        cost_text = font_body.render(f"${t_data['cost']}", True, WHITE)
-        
-        screen.blit(name_text, (MAP_WIDTH + 20, y_offset))
-        screen.blit(cost_text, (MAP_WIDTH + panel_width - 60, y_offset)) # Right align cost
-        y_offset += 70
-
-    # Global Abilities (Patch Management)
-    pygame.draw.rect(screen, (50, 50, 60), (MAP_WIDTH + 10, y_offset, panel_width, 40), border_radius=5)
-    patch_text = font_body.render("[P] PATCH SYSTEM", True, WHITE)
-    cost_text = font_body.render("$500 (Heal 5 Lives)", True, NEON_YELLOW)
-    screen.blit(patch_text, (MAP_WIDTH + 20, y_offset + 5))
-    screen.blit(cost_text, (MAP_WIDTH + 20, y_offset + 25))
-
-    # Speed Button
-    speed_y = SCREEN_HEIGHT - 130
-    pygame.draw.rect(screen, (50, 50, 60), (MAP_WIDTH + 20, speed_y, panel_width - 20, 40), border_radius=10)
-    pygame.draw.rect(screen, NEON_BLUE, (MAP_WIDTH + 20, speed_y, panel_width - 20, 40), 2, border_radius=10)
-    
-    speed_label = f"SPEED: {int(game.game_speed)}x [S]"
-    speed_surf = font_body.render(speed_label, True, NEON_BLUE)
-    text_rect = speed_surf.get_rect(center=(MAP_WIDTH + 20 + (panel_width - 20)//2, speed_y + 20))
-    screen.blit(speed_surf, text_rect)
-
-    # Codex Button (New)
-    codex_y = SCREEN_HEIGHT - 180
-    pygame.draw.rect(screen, (30, 0, 30), (MAP_WIDTH + 20, codex_y, panel_width - 20, 40), border_radius=10)
-    pygame.draw.rect(screen, NEON_PINK, (MAP_WIDTH + 20, codex_y, panel_width - 20, 40), 2, border_radius=10)
-    
-    codex_label = "OPEN CODEX [C]"
-    codex_surf = font_body.render(codex_label, True, NEON_PINK)
-    text_rect = codex_surf.get_rect(center=(MAP_WIDTH + 20 + (panel_width - 20)//2, codex_y + 20))
-    screen.blit(codex_surf, text_rect)
-
-    # Next Wave Button
-    pygame.draw.rect(screen, NEON_PURPLE, (MAP_WIDTH + 20, SCREEN_HEIGHT - 80, panel_width - 20, 50), border_radius=10)
-    wave_text = font_body.render("NEXT WAVE [SPACE]", True, WHITE)
-    
-    # Center text in button
-    text_rect = wave_text.get_rect(center=(MAP_WIDTH + 20 + (panel_width - 20)//2, SCREEN_HEIGHT - 55))
-    screen.blit(wave_text, text_rect)
+from src.visuals import draw_enemy_visual, draw_tower_visual
+from src.text import get_font, render_text
+from src.dirty import DirtyRects
+from src.surfaces import overlay, range_circle
+from src.replay import Recorder, Replay, KEYFRAME_INTERVAL
+from src.profiler import FrameProfiler
+from src.trace import TraceBuffer
+from src.sim_thread import SimulationThread
+from src.placement import Suggester
+from src.savegame import Autosaver, load_game
+
+class Sidebar:
+    # Retained-mode sidebar. The whole sidebar lives on its own surface and
+    # each panel is re-rendered only when the values it shows change.
+    def __init__(self, font_title, font_body):
+        self.font_title = font_title
+        self.font_body = font_body
+        self.width = SCREEN_WIDTH - MAP_WIDTH
+        self.panel_width = self.width - 20
+        self.surface = pygame.Surface((self.width, SCREEN_HEIGHT))
+        self.panel_keys = {} # panel name: inputs it was last rendered with
+
+        # Panel areas on the sidebar surface
+        self.stats_rect = pygame.Rect(10, 110, self.panel_width, 145)
+        self.towers_rect = pygame.Rect(10, 310, self.panel_width, 275)
+        self.speed_rect = pygame.Rect(20, SCREEN_HEIGHT - 130, self.panel_width - 20, 40)
+
+        self.draw_frame()
+
+    def draw_frame(self):
+        # Everything that never changes: background, border, title and buttons
+        surf = self.surface
+        font_title, font_body = self.font_title, self.font_body
+        panel_width = self.panel_width
+
+        # Sidebar Background
+        surf.fill(UI_BG)
+        pygame.draw.line(surf, NEON_BLUE, (0, 0), (0, SCREEN_HEIGHT), 2)
+
+        # Title
+        surf.blit(render_text(font_title, "CODEBREAK", NEON_BLUE), (20, 20))
+        surf.blit(render_text(font_body, "CYBER DEFENSE", WHITE), (20, 60))
+
+        # Tower Selection Header
+        surf.blit(render_text(font_body, "DEFENSES (R-Click Sell):", WHITE), (20, 290))
+
+        # Global Abilities (Patch Management)
+        y_offset = 600
+        pygame.draw.rect(surf, (50, 50, 60), (10, y_offset, panel_width, 40), border_radius=5)
+        surf.blit(render_text(font_body, "[P] PATCH SYSTEM", WHITE), (20, y_offset + 5))
+        surf.blit(render_text(font_body, "$500 (Heal 5 Lives)", NEON_YELLOW), (20, y_offset + 25))
+
+        # Codex Button (New)
+        codex_y = SCREEN_HEIGHT - 180
+        pygame.draw.rect(surf, (30, 0, 30), (20, codex_y, panel_width - 20, 40), border_radius=10)
+        pygame.draw.rect(surf, NEON_PINK, (20, codex_y, panel_width - 20, 40), 2, border_radius=10)
+        codex_surf = render_text(font_body, "OPEN CODEX [C]", NEON_PINK)
+        surf.blit(codex_surf, codex_surf.get_rect(center=(20 + (panel_width - 20)//2, codex_y + 20)))
+
+        # Next Wave Button
+        pygame.draw.rect(surf, NEON_PURPLE, (20, SCREEN_HEIGHT - 80, panel_width - 20, 50), border_radius=10)
+        wave_text = render_text(font_body, "NEXT WAVE [SPACE]", WHITE)
+        # Center text in button
+        surf.blit(wave_text, wave_text.get_rect(center=(20 + (panel_width - 20)//2, SCREEN_HEIGHT - 55)))
+
+    def draw_stats(self, stats):
+        surf = self.surface
+        y_offset = 120
+        for stat in stats:
+            pygame.draw.rect(surf, (30, 30, 40), (10, y_offset - 5, self.panel_width, 35), border_radius=5)
+            pygame.draw.rect(surf, NEON_BLUE, (10, y_offset - 5, self.panel_width, 35), 1, border_radius=5)
+
+            text = render_text(self.font_body, stat, NEON_GREEN)
+            surf.blit(text, (20, y_offset))
+            y_offset += 50
+
+    def draw_towers(self, selected_tower, targeting):
+        surf = self.surface
+        y_offset = 320
+        tower_keys = ["FIREWALL", "ANTIVIRUS", "IDS", "HONEYPOT"]
+        for i, key in enumerate(tower_keys):
+            t_data = TOWER_TYPES[key]
+            color = t_data["color"]
+
+            # Selection Box Highlight
+            if selected_tower == key:
+                pygame.draw.rect(surf, color, (10, y_offset - 10, self.panel_width, 60), 2, border_radius=5)
+
+            # Tower Info
+            name_text = render_text(self.font_body, f"[{i+1}] {t_data['name']}", color)
+            cost_text = render_text(self.font_body, f"${t_data['cost']}", WHITE)
+
+            surf.blit(name_text, (20, y_offset))
+            surf.blit(cost_text, (self.panel_width - 60, y_offset)) # Right align cost
+
+            # Targeting priority new towers of this type will use
+            if selected_tower == key and t_data["damage"] > 0:
+                target_text = render_text(self.font_body, f"TARGET: {targeting} [T]", WHITE)
+                surf.blit(target_text, (20, y_offset + 24))
+            y_offset += 70
+
+    def draw_speed(self, game_speed):
+        surf = self.surface
+        rect = self.speed_rect
+        pygame.draw.rect(surf, (50, 50, 60), rect, border_radius=10)
+        pygame.draw.rect(surf, NEON_BLUE, rect, 2, border_radius=10)
+
+        speed_surf = render_text(self.font_body, f"SPEED: {int(game_speed)}x [S]", NEON_BLUE)
+        surf.blit(speed_surf, speed_surf.get_rect(center=rect.center))
+
+    def update_panel(self, name, key, rect, draw_fn):
+        # Value-based invalidation: redraw only if the panel's inputs changed
+        if self.panel_keys.get(name) == key:
+            return None
+        self.panel_keys[name] = key
+        self.surface.fill(UI_BG, rect)
+        draw_fn(*key)
+        return rect
+
+    def draw(self, screen, game, selected_tower, targeting, dirty=None):
+        stats = (
+            f"MONEY: ${game.money}",
+            f"LIVES: {game.lives}",
+            f"WAVE: {game.wave_index}/{len(game.waves)}"
+        )
+        changed = [
+            self.update_panel("stats", (stats,), self.stats_rect, self.draw_stats),
+            self.update_panel("towers", (selected_tower, targeting), self.towers_rect, self.draw_towers),
+            self.update_panel("speed", (game.game_speed,), self.speed_rect, self.draw_speed),
+        ]
+
+        sidebar_rect = pygame.Rect(MAP_WIDTH, 0, self.width, SCREEN_HEIGHT)
+        if dirty is None or dirty.full:
+            screen.blit(self.surface, sidebar_rect)
+            if dirty is not None:
+                dirty.add(sidebar_rect)
+            return
+
+        # Dirty mode: copy back changed panels, plus any spot where map
+        # entities (last frame or this one) spilled over the sidebar
+        rects = [rect.move(MAP_WIDTH, 0) for rect in changed if rect]
+        dirty.extend(rects)
+        for rect in dirty.previous + dirty.rects:
+            clipped = rect.clip(sidebar_rect)
+            if clipped:
+                rects.append(clipped)
+        for rect in rects:
+            screen.blit(self.surface, rect, rect.move(-MAP_WIDTH, 0))
+
+_sidebars = {} # (font_title, font_body): Sidebar
+
+def draw_sidebar(screen, game, selected_tower, targeting, font_title, font_body, dirty=None):
+    sidebar = _sidebars.get((font_title, font_body))
+    if sidebar is None:
+        sidebar = _sidebars[(font_title, font_body)] = Sidebar(font_title, font_body)
+    sidebar.draw(screen, game, selected_tower, targeting, dirty)
 
 def draw_story_panel(screen, game, font_title, font_body):
     # Overlay
-    s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    s.fill((0, 0, 0, 245)) # Dark overlay
-    screen.blit(s, (0, 0))
+    screen.blit(overlay((0, 0, 0, 245)), (0, 0)) # Dark overlay
     
     # Text Box
     box_rect = pygame.Rect(100, 100, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 200)
@@ -107,7 +170,7 @@ def draw_story_panel(screen, game, font_title, font_body):
     pygame.draw.rect(screen, NEON_BLUE, box_rect, 2, border_radius=10)
     
     # Title
-    title = font_title.render(game.level_data["name"], True, NEON_BLUE)
+    title = render_text(font_title, game.level_data["name"], NEON_BLUE)
     screen.blit(title, (140, 120))
     
     # Content
@@ -116,38 +179,36 @@ def draw_story_panel(screen, game, font_title, font_body):
     
     # Use a medium font for story text if possible, otherwise use font_body (size 18)
     # Or create a local font
-    story_font = pygame.font.SysFont("Consolas", 22)
+    story_font = get_font("Consolas", 22)
     
     max_width_chars = 60 # Approx characters per line
     
     for line in story_lines:
         wrapped_lines = textwrap.wrap(line, width=max_width_chars)
         for wrapped_line in wrapped_lines:
-            text = story_font.render(wrapped_line, True, NEON_GREEN)
+            text = render_text(story_font, wrapped_line, NEON_GREEN)
             screen.blit(text, (140, y_off))
             y_off += 30
         y_off += 10 # Extra spacing between paragraphs
         
     # Instruction
-    inst = font_body.render("PRESS [SPACE] TO INITIALIZE DEFENSE...", True, WHITE)
+    inst = render_text(font_body, "PRESS [SPACE] TO INITIALIZE DEFENSE...", WHITE)
     # Pulsing effect or just static
     screen.blit(inst, (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT - 150))
 
 def draw_codex(screen, font_title, font_body, current_category=None):
     # Overlay
-    s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    s.fill((10, 10, 15, 250)) # Almost opaque background
-    screen.blit(s, (0, 0))
+    screen.blit(overlay((10, 10, 15, 250)), (0, 0)) # Almost opaque background
     
     # Border
     pygame.draw.rect(screen, NEON_PINK, (50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100), 2, border_radius=15)
     
     # Header
-    title = font_title.render("SECURITY CODEX", True, NEON_PINK)
+    title = render_text(font_title, "SECURITY CODEX", NEON_PINK)
     screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 70))
     
     # Close Hint
-    hint = font_body.render("[ESC] CLOSE", True, WHITE)
+    hint = render_text(font_body, "[ESC] CLOSE", WHITE)
     screen.blit(hint, (SCREEN_WIDTH - 180, 70))
 
     mx, my = pygame.mouse.get_pos()
@@ -172,7 +233,7 @@ def draw_codex(screen, font_title, font_body, current_category=None):
             pygame.draw.rect(screen, color, rect, border_radius=10)
             pygame.draw.rect(screen, border, rect, 2, border_radius=10)
             
-            text = font_title.render(cat, True, WHITE)
+            text = render_text(font_title, cat, WHITE)
             screen.blit(text, (rect.centerx - text.get_width()//2, rect.centery - text.get_height()//2))
             
             y += 120
@@ -203,7 +264,7 @@ def draw_codex(screen, font_title, font_body, current_category=None):
                 text_color = NEON_BLUE
                 hovered_item_key = key
             
-            text = font_body.render(key, True, text_color)
+            text = render_text(font_body, key, text_color)
             screen.blit(text, (80, y + 10))
             y += 50
 
@@ -215,9 +276,9 @@ def draw_codex(screen, font_title, font_body, current_category=None):
             # Handle long titles by reducing font size or splitting
             title_text = data["title"]
             if len(title_text) > 30: # Check if title is very long
-                 title_surf = pygame.font.SysFont("Consolas", 24, bold=True).render(title_text, True, NEON_GREEN)
+                 title_surf = render_text(get_font("Consolas", 24, bold=True), title_text, NEON_GREEN)
             else:
-                 title_surf = font_title.render(title_text, True, NEON_GREEN)
+                 title_surf = render_text(font_title, title_text, NEON_GREEN)
             
             screen.blit(title_surf, (340, 150))
             
@@ -238,7 +299,7 @@ def draw_codex(screen, font_title, font_body, current_category=None):
             # Description
             desc_lines = textwrap.wrap(data["desc"], width=60)
             for line in desc_lines:
-                t = font_body.render(line, True, WHITE)
+                t = render_text(font_body, line, WHITE)
                 screen.blit(t, (340, y_det))
                 y_det += 25
             
@@ -246,15 +307,15 @@ def draw_codex(screen, font_title, font_body, current_category=None):
             
             # Stats/Strengths
             if "strength" in data:
-                s_txt = font_body.render(data["strength"], True, NEON_BLUE)
+                s_txt = render_text(font_body, data["strength"], NEON_BLUE)
                 screen.blit(s_txt, (340, y_det))
                 y_det += 30
             if "weakness" in data:
-                w_txt = font_body.render(data["weakness"], True, NEON_RED)
+                w_txt = render_text(font_body, data["weakness"], NEON_RED)
                 screen.blit(w_txt, (340, y_det))
                 y_det += 30
             if "counter" in data:
-                c_txt = font_body.render(data["counter"], True, NEON_YELLOW)
+                c_txt = render_text(font_body, data["counter"], NEON_YELLOW)
                 screen.blit(c_txt, (340, y_det))
                 y_det += 30
                 
@@ -268,17 +329,17 @@ def draw_codex(screen, font_title, font_body, current_category=None):
             pygame.draw.rect(screen, (20, 30, 20), (340, y_det, 600, box_height), border_radius=10)
             pygame.draw.rect(screen, NEON_GREEN, (340, y_det, 600, box_height), 1, border_radius=10)
             
-            edu_label = font_body.render("CYBER INTEL:", True, NEON_GREEN)
+            edu_label = render_text(font_body, "CYBER INTEL:", NEON_GREEN)
             screen.blit(edu_label, (360, y_det + 15))
             
             y_edu = y_det + 45
             for line in edu_lines:
-                t = font_body.render(line, True, (200, 255, 200))
+                t = render_text(font_body, line, (200, 255, 200))
                 screen.blit(t, (360, y_edu))
                 y_edu += 25
 
         else:
-             hint_text = font_body.render("HOVER OVER AN ITEM TO ANALYZE", True, (100, 100, 100))
+             hint_text = render_text(font_body, "HOVER OVER AN ITEM TO ANALYZE", (100, 100, 100))
              screen.blit(hint_text, (450, 300))
              
         # Back Button (Simulated by clicking outside list or pressing ESC handled by main loop)
@@ -286,15 +347,13 @@ def draw_codex(screen, font_title, font_body, current_category=None):
 
 def draw_perk_selection(screen, game, font_title, font_body):
     # Overlay
-    s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    s.fill((0, 0, 0, 220))
-    screen.blit(s, (0, 0))
+    screen.blit(overlay((0, 0, 0, 220)), (0, 0))
     
     # Header
-    title = font_title.render("SYSTEM UPGRADE AVAILABLE", True, NEON_GREEN)
+    title = render_text(font_title, "SYSTEM UPGRADE AVAILABLE", NEON_GREEN)
     screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 100))
     
-    sub = font_body.render("SELECT A PROTOCOL ENHANCEMENT", True, WHITE)
+    sub = render_text(font_body, "SELECT A PROTOCOL ENHANCEMENT", WHITE)
     screen.blit(sub, (SCREEN_WIDTH//2 - sub.get_width()//2, 150))
     
     # Cards
@@ -331,43 +390,41 @@ def draw_perk_selection(screen, game, font_title, font_body):
         
         # Icon (Simple Circle for now)
         pygame.draw.circle(screen, color, (x + card_width//2, y + 80), 40, 2)
-        initial = font_title.render(perk["name"][0], True, color)
+        initial = render_text(font_title, perk["name"][0], color)
         screen.blit(initial, (x + card_width//2 - initial.get_width()//2, y + 80 - initial.get_height()//2))
         
         # Text
         name_lines = textwrap.wrap(perk["name"], width=15)
         ny = y + 140
         for line in name_lines:
-             n_txt = font_title.render(line, True, WHITE)
+             n_txt = render_text(font_title, line, WHITE)
              screen.blit(n_txt, (x + card_width//2 - n_txt.get_width()//2, ny))
              ny += 35
              
         # Rarity
-        r_txt = font_body.render(perk["rarity"], True, color)
+        r_txt = render_text(font_body, perk["rarity"], color)
         screen.blit(r_txt, (x + card_width//2 - r_txt.get_width()//2, y + 200))
         
         # Desc
         desc_lines = textwrap.wrap(perk["desc"], width=20)
         dy = y + 240
         for line in desc_lines:
-            d_txt = font_body.render(line, True, (200, 200, 200))
+            d_txt = render_text(font_body, line, (200, 200, 200))
             screen.blit(d_txt, (x + card_width//2 - d_txt.get_width()//2, dy))
             dy += 20
 
 def draw_level_intel(screen, game, font_title, font_body):
     # Overlay
-    s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    s.fill((10, 10, 20, 252)) # Almost Opaque background
-    screen.blit(s, (0, 0))
+    screen.blit(overlay((10, 10, 20, 252)), (0, 0)) # Almost Opaque background
     
     # Border
     pygame.draw.rect(screen, NEON_BLUE, (50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100), 2, border_radius=15)
     
     # Title
-    title = font_title.render(f"INTEL: {game.level_data['name']}", True, NEON_BLUE)
+    title = render_text(font_title, f"INTEL: {game.level_data['name']}", NEON_BLUE)
     screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 70))
     
-    sub = font_body.render("INCOMING THREATS DETECTED - ANALYZING WEAKNESSES...", True, NEON_RED)
+    sub = render_text(font_body, "INCOMING THREATS DETECTED - ANALYZING WEAKNESSES...", NEON_RED)
     screen.blit(sub, (SCREEN_WIDTH//2 - sub.get_width()//2, 110))
     
     # Get Intel
@@ -390,7 +447,7 @@ def draw_level_intel(screen, game, font_title, font_body):
         
         # Text Info
         # Name
-        name_txt = pygame.font.SysFont("Consolas", 24, bold=True).render(data["name"], True, WHITE)
+        name_txt = render_text(get_font("Consolas", 24, bold=True), data["name"], WHITE)
         screen.blit(name_txt, (x_left + 120, y_start + 15))
         
         # Effective Towers
@@ -401,21 +458,21 @@ def draw_level_intel(screen, game, font_title, font_body):
             eff_str = "NO SPECIFIC WEAKNESS (Use high damage)"
             eff_color = (200, 200, 200)
             
-        eff_txt = font_body.render(eff_str, True, eff_color)
+        eff_txt = render_text(font_body, eff_str, eff_color)
         screen.blit(eff_txt, (x_left + 120, y_start + 50))
         
         y_start += 110
         
     # Continue Prompt
-    prompt = font_body.render("PRESS [SPACE] TO INITIATE DEFENSE PROTOCOLS", True, WHITE)
+    prompt = render_text(font_body, "PRESS [SPACE] TO INITIATE DEFENSE PROTOCOLS", WHITE)
     screen.blit(prompt, (SCREEN_WIDTH//2 - prompt.get_width()//2, SCREEN_HEIGHT - 100))
 
 def draw_main_menu(screen, font_title, font_body):
     screen.fill(BLACK)
     
     # Title
-    title = font_title.render("CODEBREAK", True, NEON_BLUE)
-    sub = font_body.render("CYBER DEFENSE PROTOCOL", True, NEON_GREEN)
+    title = render_text(font_title, "CODEBREAK", NEON_BLUE)
+    sub = render_text(font_body, "CYBER DEFENSE PROTOCOL", NEON_GREEN)
     
     screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 150))
     screen.blit(sub, (SCREEN_WIDTH//2 - sub.get_width()//2, 200))
@@ -445,34 +502,180 @@ def draw_main_menu(screen, font_title, font_body):
         pygame.draw.rect(screen, color, rect, border_radius=10)
         pygame.draw.rect(screen, border, rect, 2, border_radius=10)
         
-        text = font_body.render(opt, True, WHITE)
+        text = render_text(font_body, opt, WHITE)
         screen.blit(text, (rect.centerx - text.get_width()//2, rect.centery - text.get_height()//2))
         
         y += 70
         
     return clicked_option
 
+def draw_profiler_hud(screen, profiler, game):
+    # Frame profiler overlay ([F]): rolling phase averages, frame-time graph
+    # and entity counts. Returns the rect it covered.
+    font = get_font("Consolas", 14)
+    averages = profiler.averages()
+    frame_ms = profiler.frame_average()
+    width = 280
+    line_h = 16
+    graph_h = 60
+    height = 10 + line_h * (len(averages) + 3) + graph_h + 10
+    x, y = 10, 10
+
+    rect = screen.blit(overlay((0, 0, 0, 190), (width, height)), (x, y))
+    pygame.draw.rect(screen, NEON_BLUE, rect, 1)
+
+    fps = 1000 / frame_ms if frame_ms > 0 else 0
+    screen.blit(render_text(font, f"FRAME {frame_ms:5.1f} ms  {fps:5.0f} FPS", NEON_GREEN), (x + 8, y + 6))
+    ty = y + 6 + line_h
+    for name, ms in averages.items():
+        # Bar scaled so a full 60 FPS frame budget spans the panel
+        bar = min(width - 150, int((width - 150) * ms * FPS / 1000))
+        pygame.draw.rect(screen, NEON_BLUE, (x + 140, ty + 4, max(bar, 1), 8))
+        screen.blit(render_text(font, name, WHITE), (x + 8, ty))
+        value = render_text(font, f"{ms:.2f}", WHITE)
+        screen.blit(value, (x + 132 - value.get_width(), ty))
+        ty += line_h
+
+    # Frame-time graph, 0 to two frame budgets, with the budget marked
+    graph = pygame.Rect(x + 8, ty + 4, width - 16, graph_h)
+    budget = 1000 / FPS
+    pygame.draw.line(screen, NEON_YELLOW, (graph.left, graph.bottom - graph_h // 2), (graph.right, graph.bottom - graph_h // 2))
+    frames = list(profiler.frames)
+    if len(frames) >= 2:
+        step = graph.width / (profiler.history - 1)
+        points = [(graph.left + i * step, graph.bottom - min(ms / (2 * budget), 1.0) * graph_h) for i, ms in enumerate(frames)]
+        pygame.draw.lines(screen, NEON_GREEN, False, points)
+    ty = graph.bottom + 4
+
+    shots = len(game.projectiles) + (len(game.projectile_batch) if game.projectile_batch is not None else 0)
+    counts = f"E {len(game.enemies)}  P {shots}  T {len(game.towers)}  L {len(game.loot_drops)}"
+    screen.blit(render_text(font, counts, WHITE), (x + 8, ty))
+    return rect
+
+def arg_value(name):
+    # Value following a command line flag, e.g. --record run.replay
+    if name in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return None
+
+def draw_suggestion(screen, suggestion):
+    # [G] overlay: outlines of the suggested towers, numbered in build order
+    font = get_font("Consolas", 16, bold=True)
+    rects = []
+    result = suggestion.result
+    if result is None:
+        message = "OPTIMIZING LAYOUT..."
+    elif result is False:
+        message = "NO AFFORDABLE LAYOUT FOUND"
+    else:
+        for i, (tower_type, x, y) in enumerate(result["layout"], 1):
+            color = TOWER_TYPES[tower_type]["color"]
+            rects.append(pygame.draw.rect(screen, color, (x - 20, y - 20, 40, 40), 2, border_radius=5))
+            label = render_text(font, str(i), color)
+            rects.append(screen.blit(label, label.get_rect(center=(x, y))))
+        message = f"SUGGESTED: {len(result['layout'])} TOWERS, {result['lives_lost']} LIVES LOST [G]"
+    text = render_text(font, message, NEON_YELLOW)
+    rects.append(screen.blit(text, (10, MAP_HEIGHT - 30)))
+    return rects
+
+def drop_suggestion(suggestion):
+    # Stop a [G] search that is no longer wanted
+    if suggestion is not None:
+        suggestion.cancel()
+
+def finish_game(game, path):
+    # Leaving a match: stop its simulation thread, then save the recording
+    if isinstance(game, SimulationThread):
+        game.stop()
+    if path and game is not None and game.recorder is not None:
+        game.recorder.replay.save(path)
+
+def start_game(previous, game, profiler, record_path, threaded):
+    # Hook up the optional profiler and recorder; with --threaded the
+    # simulation then moves onto its own thread
+    if isinstance(previous, SimulationThread):
+        previous.stop()
+    game.profiler = profiler
+    if record_path: Recorder(game)
+    return SimulationThread(game) if threaded else game
+
+def present(dirty):
+    # Full flip, or only the changed rects when dirty-rect rendering is on
+    if dirty is None:
+        pygame.display.flip()
+    else:
+        dirty.present()
+
 def main():
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("CodeBreak: Cyber Defense Simulator")
     clock = pygame.time.Clock()
     
-    font_title = pygame.font.SysFont("Consolas", 32, bold=True)
-    font_body = pygame.font.SysFont("Consolas", 18)
+    font_title = get_font("Consolas", 32, bold=True)
+    font_body = get_font("Consolas", 18)
     
     state = "MENU" # MENU, GAME, CODEX
     codex_category = None
     game = None
     selected_tower = "FIREWALL"
+    selected_targeting = TARGETING_MODES[0]
     showing_story = False
     showing_intel = False
-    
+    next_level = None # Level queued with [SPACE] on the level-complete screen
+    
+    # Optional dirty-rect rendering (python main.py --dirty-rects)
+    dirty = DirtyRects() if "--dirty-rects" in sys.argv else None
+
+    # Frame profiler HUD, toggled with [F]; None while off so it costs nothing
+    profiler = None
+    show_profiler = False
+
+    # Chrome trace export (--trace out.json): the profiler's laps plus the
+    # draw_* functions and TRACED methods, written at exit or with [F9]
+    trace_path = arg_value("--trace")
+    tracer = None
+    if trace_path:
+        tracer = TraceBuffer()
+        tracer.wrap_all()
+        tracer.wrap(Game, "draw")
+        module = sys.modules[__name__]
+        for name in dir(module):
+            if name.startswith("draw_") or name == "present":
+                tracer.wrap(module, name, label=name)
+        profiler = FrameProfiler(trace=tracer)
+
+    # Placement suggestions for the current level and money, toggled with [G]
+    suggestion = None
+    show_suggestion = False
+
+    # Simulation on a worker thread, rendering from snapshots (--threaded)
+    threaded = "--threaded" in sys.argv
+
+    # Input recording (--record out.replay) and playback (--replay in.replay)
+    record_path = arg_value("--record")
+    replay = None
+    if arg_value("--replay"):
+        replay = Replay.load(arg_value("--replay"))
+        game = Game(mode=replay.mode, enemy_table=replay.enemy_table, seed=replay.seed)
+        game.profiler = profiler
+        replay.seek(game, replay.start_tick)
+        state = "GAME"
+
+    # Resume a saved match (--load in.cbsv); --autosave out.cbsv writes one
+    # every AUTOSAVE_INTERVAL_MS of play, on a background thread
+    if arg_value("--load"):
+        game = start_game(None, load_game(arg_value("--load"), Game), profiler, record_path, threaded)
+        state = "GAME"
+    autosaver = Autosaver(arg_value("--autosave")) if arg_value("--autosave") else None
+
     running = True
     while running:
-        # Check Loot Collection (Mouse Hover)
+        if profiler: profiler.begin_frame()
+
+        # Check Loot Collection (Mouse Hover), only while a match is on screen
         mx, my = pygame.mouse.get_pos()
-        if game and not game.game_over and not game.game_won and not showing_story and not showing_intel:
+        if state == "GAME" and game and replay is None and not game.game_over and not game.game_won and not showing_story and not showing_intel:
             game.check_loot_collection(mx, my)
 
         # Event Handling
@@ -482,15 +685,25 @@ def main():
                 running = False
         
         if state == "MENU":
-            clicked = draw_main_menu(screen, font_title, font_body)
+            clicked = None
+            if dirty is None or dirty.static_changed(("MENU", mx, my, pygame.mouse.get_pressed()[0])):
+                clicked = draw_main_menu(screen, font_title, font_body)
             if clicked == "STORY MODE":
-                game = Game(mode="STORY")
+                game = start_game(game, Game(mode="STORY"), profiler, record_path, threaded)
+                drop_suggestion(suggestion)
+                suggestion = None
+                show_suggestion = False
+                next_level = None
                 state = "GAME"
                 showing_story = True
                 showing_intel = False
                 pygame.time.wait(150)
             elif clicked == "ENDLESS MODE":
-                game = Game(mode="ENDLESS")
+                game = start_game(game, Game(mode="ENDLESS", enemy_table=True), profiler, record_path, threaded)
+                drop_suggestion(suggestion)
+                suggestion = None
+                show_suggestion = False
+                next_level = None
                 state = "GAME"
                 showing_story = True
                 showing_intel = False
@@ -498,22 +711,23 @@ def main():
             elif clicked == "QUIT":
                 running = False
                 
-            pygame.display.flip()
+            present(dirty)
             clock.tick(FPS)
             continue
             
         elif state == "CODEX":
-            # Draw game background faintly if paused
-            if game:
-                game.draw(screen)
-                draw_sidebar(screen, game, selected_tower, font_title, font_body)
-            else:
-                screen.fill(BLACK)
-                
-            # Draw Codex Overlay
-            new_cat = draw_codex(screen, font_title, font_body, codex_category)
-            if new_cat:
-                codex_category = new_cat
+            if dirty is None or dirty.static_changed(("CODEX", codex_category, mx, my, pygame.mouse.get_pressed()[0])):
+                # Draw game background faintly if paused
+                if game:
+                    game.draw(screen)
+                    draw_sidebar(screen, game, selected_tower, selected_targeting, font_title, font_body)
+                else:
+                    screen.fill(BLACK)
+
+                # Draw Codex Overlay
+                new_cat = draw_codex(screen, font_title, font_body, codex_category)
+                if new_cat:
+                    codex_category = new_cat
             
             # Input Handling for Codex
             for event in events:
@@ -524,27 +738,78 @@ def main():
                         else:
                             state = "GAME" if game else "MENU" # Close Codex
             
-            pygame.display.flip()
+            present(dirty)
             clock.tick(FPS)
             continue
 
         # GAME STATE
-        
+
+        # Replay playback drives the match; [LEFT]/[RIGHT] seek between keyframes
+        if replay is not None:
+            for event in events:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        replay = None
+                        state = "MENU"
+                    elif event.key == pygame.K_LEFT:
+                        replay.seek(game, game.tick - KEYFRAME_INTERVAL)
+                    elif event.key == pygame.K_RIGHT:
+                        replay.seek(game, game.tick + KEYFRAME_INTERVAL)
+                    elif event.key == pygame.K_f:
+                        show_profiler = not show_profiler
+                        if tracer is None:
+                            profiler = FrameProfiler() if show_profiler else None
+                            game.profiler = profiler
+                    elif event.key == pygame.K_F9 and tracer:
+                        tracer.flush(trace_path)
+            if replay is None:
+                continue
+
+            if profiler: profiler.lap("input")
+            replay.advance(game)
+            if dirty is not None:
+                dirty.dynamic()
+            game.draw(screen, dirty)
+            if profiler: profiler.lap("draw")
+            draw_sidebar(screen, game, selected_tower, selected_targeting, font_title, font_body, dirty)
+            if profiler: profiler.lap("sidebar")
+            if show_profiler:
+                hud_rect = draw_profiler_hud(screen, profiler, game)
+                if dirty is not None:
+                    dirty.add(hud_rect)
+                profiler.lap("hud")
+            present(dirty)
+            if profiler: profiler.lap("present")
+            clock.tick(FPS)
+            if profiler:
+                profiler.lap("tick wait")
+                profiler.end_frame()
+            continue
+
         # Perk Selection Screen (Blocks Game Loop)
         if game.pending_perk_choice:
-            game.draw(screen)
-            draw_sidebar(screen, game, selected_tower, font_title, font_body)
-            draw_perk_selection(screen, game, font_title, font_body)
+            if dirty is None or dirty.static_changed(("PERKS", id(game), tuple(game.generated_perks), mx, my, pygame.mouse.get_pressed()[0])):
+                game.draw(screen)
+                draw_sidebar(screen, game, selected_tower, selected_targeting, font_title, font_body)
+                draw_perk_selection(screen, game, font_title, font_body)
             
             # Handle basic events like Quit
             for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     
-            pygame.display.flip()
+            present(dirty)
             clock.tick(FPS)
             continue
 
+        # A level load has landed (with --threaded, once a snapshot of it is
+        # published): show the new level's story unless that was the last
+        if next_level is not None and (game.game_won or game.level_index == next_level):
+            if not game.game_won:
+                showing_story = True
+                showing_intel = False
+            next_level = None
+
         # Handle Input
         for event in events:
             if showing_story:
@@ -559,16 +824,15 @@ def main():
                 continue
             
             if game.level_complete:
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    game.load_level(game.level_index + 1)
-                    if not game.game_won: 
-                        showing_story = True
-                        showing_intel = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and next_level is None:
+                    next_level = game.level_index + 1
+                    game.load_level(next_level)
                 continue
                 
             if game.game_won or game.game_over:
                  # Press ESC to return to menu
                  if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                     finish_game(game, record_path)
                      state = "MENU"
                  continue
 
@@ -577,114 +841,160 @@ def main():
                 elif event.key == pygame.K_2: selected_tower = "ANTIVIRUS"
                 elif event.key == pygame.K_3: selected_tower = "IDS"
                 elif event.key == pygame.K_4: selected_tower = "HONEYPOT"
+                elif event.key == pygame.K_t:
+                    # Cycle the priority for new towers, and for the tower under the cursor
+                    selected_targeting = TARGETING_MODES[(TARGETING_MODES.index(selected_targeting) + 1) % len(TARGETING_MODES)]
+                    game.set_tower_targeting(mx, my, selected_targeting)
                 elif event.key == pygame.K_SPACE: game.start_next_wave()
-                elif event.key == pygame.K_s: 
-                        if game.game_speed == 1.0: game.game_speed = 2.0
-                        elif game.game_speed == 2.0: game.game_speed = 4.0
-                        else: game.game_speed = 1.0
+                elif event.key == pygame.K_s: game.cycle_game_speed()
                 elif event.key == pygame.K_c: 
                     state = "CODEX"
                     codex_category = None
+                elif event.key == pygame.K_f:
+                    show_profiler = not show_profiler
+                    if tracer is None:
+                        profiler = FrameProfiler() if show_profiler else None
+                        game.profiler = profiler
+                elif event.key == pygame.K_F9 and tracer:
+                    tracer.flush(trace_path)
+                elif event.key == pygame.K_g:
+                    if show_suggestion:
+                        show_suggestion = False
+                        if suggestion.result is None:
+                            suggestion.cancel() # Nothing to keep; free the workers
+                            suggestion = None
+                    elif game.mode == "STORY":
+                        # Reuse a finished search if nothing it depends on has changed
+                        fixed = [(t.type, t.x, t.y) for t in game.towers]
+                        key = Suggester.key_for(game.level_index, game.money, fixed, game.modifiers)
+                        if suggestion is None or suggestion.key != key:
+                            drop_suggestion(suggestion)
+                            suggestion = Suggester(game.level_index, game.money, fixed, dict(game.modifiers))
+                        show_suggestion = True
                 elif event.key == pygame.K_p:
-                    if game.money >= 500:
-                        game.money -= 500
-                        game.lives += 5
-                        if game.lives > STARTING_LIVES: game.lives = STARTING_LIVES
+                    game.buy_patch()
                 elif event.key == pygame.K_ESCAPE:
+                    finish_game(game, record_path)
                     state = "MENU"
             
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left Click
                     if mx < MAP_WIDTH:
-                        game.place_tower(selected_tower, mx, my)
+                        game.place_tower(selected_tower, mx, my, selected_targeting)
                     else:
                         if SCREEN_HEIGHT - 60 < my < SCREEN_HEIGHT - 20:
                             game.start_next_wave()
                         if SCREEN_HEIGHT - 110 < my < SCREEN_HEIGHT - 70:
-                            if game.game_speed == 1.0: game.game_speed = 2.0
-                            elif game.game_speed == 2.0: game.game_speed = 4.0
-                            else: game.game_speed = 1.0
+                            game.cycle_game_speed()
                         if SCREEN_HEIGHT - 160 < my < SCREEN_HEIGHT - 120: # Codex Button
                             state = "CODEX"
                             codex_category = None
                         if 600 < my < 650: 
-                                if game.money >= 500:
-                                    game.money -= 500
-                                    game.lives += 5
-                                    if game.lives > STARTING_LIVES: game.lives = STARTING_LIVES
+                                game.buy_patch()
                 elif event.button == 3: # Right Click
                     if mx < MAP_WIDTH:
                         game.sell_tower(mx, my)
 
         # Render Logic
         if showing_story:
-            game.draw(screen) 
-            draw_story_panel(screen, game, font_title, font_body) 
-            pygame.display.flip()
+            if dirty is None or dirty.static_changed(("STORY", id(game), game.level_index)):
+                game.draw(screen)
+                draw_story_panel(screen, game, font_title, font_body)
+            present(dirty)
             clock.tick(FPS)
             continue
             
         if showing_intel:
-            game.draw(screen)
-            draw_level_intel(screen, game, font_title, font_body)
-            pygame.display.flip()
+            if dirty is None or dirty.static_changed(("INTEL", id(game), game.level_index)):
+                game.draw(screen)
+                draw_level_intel(screen, game, font_title, font_body)
+            present(dirty)
             clock.tick(FPS)
             continue
 
         if game.level_complete:
-            game.draw(screen)
-            draw_sidebar(screen, game, selected_tower, font_title, font_body)
-            s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            s.fill((0, 0, 0, 200))
-            screen.blit(s, (0,0))
-            text = font_title.render("LEVEL COMPLETE", True, NEON_GREEN)
-            screen.blit(text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 - 50))
-            sub = font_body.render("PRESS [SPACE] TO PROCEED", True, WHITE)
-            screen.blit(sub, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 20))
-            pygame.display.flip()
+            if dirty is None or dirty.static_changed(("LEVEL_COMPLETE", id(game), game.level_index)):
+                game.draw(screen)
+                draw_sidebar(screen, game, selected_tower, selected_targeting, font_title, font_body)
+                screen.blit(overlay((0, 0, 0, 200)), (0, 0))
+                text = render_text(font_title, "LEVEL COMPLETE", NEON_GREEN)
+                screen.blit(text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 - 50))
+                sub = render_text(font_body, "PRESS [SPACE] TO PROCEED", WHITE)
+                screen.blit(sub, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 20))
+            present(dirty)
             clock.tick(FPS)
             continue
 
         if not game.game_over and not game.game_won:
+            if profiler: profiler.lap("input")
             game.update()
-        
-        game.draw(screen)
+            if autosaver and replay is None:
+                autosaver.maybe_save(game, pygame.time.get_ticks())
+            if dirty is not None:
+                dirty.dynamic()
+        elif dirty is not None and not dirty.static_changed(("END", id(game), game.game_over, game.game_won)):
+            # End screens are static once shown
+            clock.tick(FPS)
+            continue
+
+        game.draw(screen, dirty)
+        if profiler: profiler.lap("draw")
         
         # Hover Range
         if mx < MAP_WIDTH and not game.game_over and not game.game_won:
             range_val = TOWER_TYPES[selected_tower]["range"]
             color = TOWER_TYPES[selected_tower]["color"]
-            s = pygame.Surface((range_val*2, range_val*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*color, 50), (range_val, range_val), range_val)
-            pygame.draw.circle(s, (*color, 150), (range_val, range_val), range_val, 1)
-            screen.blit(s, (mx - range_val, my - range_val))
+            range_rect = screen.blit(range_circle(range_val, color, 50, 150), (mx - range_val, my - range_val))
             pygame.draw.circle(screen, color, (mx, my), 5)
+            if dirty is not None:
+                dirty.add(range_rect)
+        if show_suggestion and suggestion.level_index == game.level_index and not game.game_over:
+            suggestion_rects = draw_suggestion(screen, suggestion)
+            if dirty is not None:
+                dirty.extend(suggestion_rects)
+        if profiler: profiler.lap("range")
 
-        draw_sidebar(screen, game, selected_tower, font_title, font_body)
+        draw_sidebar(screen, game, selected_tower, selected_targeting, font_title, font_body, dirty)
+        if profiler: profiler.lap("sidebar")
 
         if game.game_over:
-            s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            s.fill((0, 0, 0, 200))
-            screen.blit(s, (0,0))
-            text = font_title.render("SYSTEM COMPROMISED", True, NEON_RED)
+            screen.blit(overlay((0, 0, 0, 200)), (0, 0))
+            text = render_text(font_title, "SYSTEM COMPROMISED", NEON_RED)
             screen.blit(text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2))
-            sub = font_body.render("PRESS [ESC] FOR MENU", True, WHITE)
+            sub = render_text(font_body, "PRESS [ESC] FOR MENU", WHITE)
             screen.blit(sub, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 40))
             
         elif game.game_won:
-            s = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            s.fill((0, 0, 0, 200))
-            screen.blit(s, (0,0))
-            text = font_title.render("MISSION ACCOMPLISHED", True, NEON_GREEN)
-            sub = font_body.render("ALL THREATS ELIMINATED.", True, WHITE)
+            screen.blit(overlay((0, 0, 0, 200)), (0, 0))
+            text = render_text(font_title, "MISSION ACCOMPLISHED", NEON_GREEN)
+            sub = render_text(font_body, "ALL THREATS ELIMINATED.", WHITE)
             screen.blit(text, (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 50))
             screen.blit(sub, (SCREEN_WIDTH//2 - 250, SCREEN_HEIGHT//2 + 20))
-            sub2 = font_body.render("PRESS [ESC] FOR MENU", True, WHITE)
+            sub2 = render_text(font_body, "PRESS [ESC] FOR MENU", WHITE)
             screen.blit(sub2, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 60))
+
+        if show_profiler:
+            hud_rect = draw_profiler_hud(screen, profiler, game)
+            if dirty is not None:
+                dirty.add(hud_rect)
+            profiler.lap("hud")
             
-        pygame.display.flip()
+        present(dirty)
+        if profiler: profiler.lap("present")
         clock.tick(FPS)
-
+        if profiler:
+            profiler.lap("tick wait")
+            profiler.end_frame()
+
+    drop_suggestion(suggestion)
+    finish_game(game, record_path)
+    if autosaver:
+        # Final save; any simulation thread has stopped, so save its game directly
+        sim = game.game if isinstance(game, SimulationThread) else game
+        if sim is not None and replay is None and not (sim.game_over or sim.game_won):
+            autosaver.save(sim)
+        autosaver.close()
+    if tracer: tracer.flush(trace_path)
     pygame.quit()
     sys.exit()
 
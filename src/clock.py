@@ -0,0 +1,9 @@
+class SimClock:
+    # Explicit simulation clock (milliseconds). Only advances when the
+    # simulation is stepped, so headless runs are not tied to wall time.
+    def __init__(self, start_ms=0):
+        self.now = start_ms
+
+    def advance(self, dt_ms):
+        self.now += dt_ms
+        return self.now
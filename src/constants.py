@@ -1,5 +1,3 @@
-import pygame
-
 # Screen Dimensions
 SCREEN_WIDTH = 1100  # Wider for sidebar
 SCREEN_HEIGHT = 850  # Taller for sidebar content (Increased from 720)
@@ -7,6 +5,10 @@ MAP_WIDTH = 800      # Playable area width
 MAP_HEIGHT = 850     # Playable area height
 GRID_SIZE = 40
 FPS = 60
+FRAME_MS = 16 # Reference frame length (speeds below are pixels per frame)
+SIM_STEP_MS = FRAME_MS # Fixed simulation step in game ms; faster game speeds run more steps
+MAX_SUBSTEPS = 32 # Steps per frame before the rest of a long frame is dropped
+GAME_SPEEDS = (1.0, 2.0, 4.0) # Cycled by the speed button and [S]
 
 # Colors (Cyberpunk / Matrix Theme)
 BLACK = (10, 10, 12)
@@ -91,6 +93,9 @@ TOWER_TYPES = {
     }
 }
 
+# Tower targeting priorities (cycled with [T]; FIRST is furthest along the path)
+TARGETING_MODES = ["FIRST", "LAST", "STRONGEST", "WEAKEST", "CLOSEST"]
+
 # Enemies
 ENEMY_TYPES = {
     "MALWARE": {
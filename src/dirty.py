@@ -0,0 +1,58 @@
+import pygame
+
+MAX_DIRTY_RECTS = 300 # Past this many rects a plain full-screen flip is cheaper
+
+class DirtyRects:
+    # Optional dirty-rectangle presenter. Everything drawn during a frame
+    # reports its rect; present() then pushes only last frame's rects (to
+    # erase) plus this frame's rects instead of flipping the whole display.
+    def __init__(self):
+        self.rects = [] # Touched this frame
+        self.previous = [] # Touched last frame (restored to the static layer this frame)
+        self.full = True # Next frame must be drawn and presented in full
+        self.static_key = None # Inputs of the last static screen shown
+
+    def add(self, rect):
+        if rect:
+            self.rects.append(rect)
+        return rect
+
+    def extend(self, rects):
+        self.rects.extend(rects)
+
+    def invalidate(self):
+        self.full = True
+
+    def static_changed(self, key):
+        # Static screens (story, intel, codex, perks, end screens) are redrawn
+        # and presented only when the inputs that affect them change
+        if self.full or key != self.static_key:
+            self.static_key = key
+            self.full = True
+            return True
+        return False
+
+    def dynamic(self):
+        # Called on gameplay frames; leaving a static screen needs a full redraw
+        if self.static_key is not None:
+            self.static_key = None
+            self.full = True
+
+    def restore(self, screen, layer):
+        # Put the static layer back under everything drawn last frame
+        if self.full or len(self.previous) > MAX_DIRTY_RECTS:
+            screen.blit(layer, (0, 0))
+        else:
+            for rect in self.previous:
+                screen.blit(layer, rect, rect)
+
+    def present(self):
+        if self.full or len(self.rects) + len(self.previous) > MAX_DIRTY_RECTS:
+            pygame.display.flip()
+        else:
+            # Static things (sidebar, range preview) report the same rect every frame
+            unique = {tuple(rect): rect for rect in self.previous + self.rects}
+            pygame.display.update(list(unique.values()))
+        self.previous = self.rects
+        self.rects = []
+        self.full = False
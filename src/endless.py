@@ -0,0 +1,118 @@
+import random
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from src.constants import *
+
+ENDLESS_LOOKAHEAD = 3 # Endless waves built ahead of time on the worker thread
+REJECT_COST = 200 # Picks dearer than this that the budget can't cover are re-rolled
+
+# (first wave, type): the enemy types endless mode picks from, by wave
+ENDLESS_UNLOCKS = [
+    (1, "MALWARE"), (1, "PHISHING"), (1, "DDOS"), (1, "SOCIAL_ENG"), (1, "RANSOMWARE"),
+    (5, "ZEUS"),
+    (10, "SQL_INJECTION"),
+    (20, "APT"),
+]
+
+def enemy_cost(enemy_type):
+    # Spawn cost, from the current stats
+    stats = ENEMY_TYPES[enemy_type]
+    return stats["health"] * 0.5 + stats["speed"] * 10
+
+_cost_tables = {} # ((type, cost), ...) unlocked: sorted (types, costs)
+
+def cost_table(wave_num):
+    # Unlocked types sorted by cost, with their costs, for bisecting on
+    # budget. Cached on the costs themselves, so edits to ENEMY_TYPES (see
+    # tools/balance_sweep.py) are picked up by the next wave.
+    key = tuple((etype, enemy_cost(etype)) for first, etype in ENDLESS_UNLOCKS if wave_num >= first)
+    table = _cost_tables.get(key)
+    if table is None:
+        if len(_cost_tables) >= 64:
+            _cost_tables.clear()
+        ordered = sorted(key, key=lambda entry: entry[1])
+        table = _cost_tables[key] = ([etype for etype, cost in ordered], [cost for etype, cost in ordered])
+    return table
+
+class EndlessWave:
+    # Lazy (type, count, delay) runs for one endless wave; SpawnSchedule pulls
+    # them as the wave plays, so starting even a huge wave is constant time.
+    #
+    # A random type is picked for each run until the budget (wave_num * 300
+    # + 500) runs out. Picking a type the budget can't cover ends the wave
+    # if it costs at most REJECT_COST and is re-rolled otherwise, so a
+    # single draw over the affordable plus wave-ending types (counted by
+    # bisecting the cost table) replaces the rejection loop.
+    #
+    # Each wave has its own generator seeded from the match seed, so the
+    # same wave comes out the same whether it was built here, on the worker
+    # thread, or after loading a save.
+    def __init__(self, seed, wave_num):
+        self.seed = seed
+        self.wave_num = wave_num
+        self.rng = random.Random(f"{seed}/{wave_num}")
+        self.budget = wave_num * 300 + 500
+        self.types, self.costs = cost_table(wave_num)
+        self.cheap = bisect_right(self.costs, REJECT_COST) # Types that end the wave when unaffordable
+        self.runs = 0
+
+        # Boss Waves (Guaranteed Spawns)
+        self.bosses = []
+        if wave_num % 10 == 0:
+            # Every 10th wave is a mini-boss wave
+            self.bosses.append(("SQL_INJECTION", wave_num // 5, 2000))
+        if wave_num % 25 == 0:
+            # Every 25th wave is a MEGA boss wave
+            self.bosses.append(("APT", 1, 0))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.bosses:
+            self.runs += 1
+            return self.bosses.pop(0)
+        affordable = bisect_right(self.costs, self.budget) if self.budget > 50 else 0
+        ending = max(0, self.cheap - affordable)
+        pick = self.rng.randrange(affordable + ending) if affordable else None
+        if pick is None or pick >= affordable:
+            self.budget = 0
+            if self.runs:
+                raise StopIteration
+            self.runs = 1
+            return ("MALWARE", 5, 500)
+
+        etype = self.types[pick]
+        cost = self.costs[pick]
+        count = min(self.rng.randint(1, 5), int(self.budget // cost))
+        self.budget -= cost * count
+        self.runs += 1
+        return (etype, count, self.rng.randint(300, 1500))
+
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="endless")
+
+def build_wave(seed, wave_num):
+    return list(EndlessWave(seed, wave_num))
+
+class WaveQueue:
+    # The next ENDLESS_LOOKAHEAD endless waves, built on a worker thread
+    # while the current one plays.
+    def __init__(self, lookahead=ENDLESS_LOOKAHEAD):
+        self.lookahead = lookahead
+        self.pending = {} # (seed, wave_num): Future of the wave's runs
+
+    def take(self, seed, wave_num):
+        # The runs for wave_num: prebuilt if the worker has finished it,
+        # otherwise a lazy EndlessWave. Either way this doesn't wait.
+        future = self.pending.pop((seed, wave_num), None)
+        if future is not None and future.done():
+            groups = future.result()
+        else:
+            if future is not None: future.cancel()
+            groups = EndlessWave(seed, wave_num)
+        for ahead in range(wave_num + 1, wave_num + 1 + self.lookahead):
+            if (seed, ahead) not in self.pending:
+                self.pending[(seed, ahead)] = _worker.submit(build_wave, seed, ahead)
+        for key in [key for key in self.pending if key[0] != seed or key[1] <= wave_num]:
+            self.pending.pop(key).cancel()
+        return groups
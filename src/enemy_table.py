@@ -0,0 +1,204 @@
+from src.constants import *
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError: # Optional: the simulation falls back to plain Enemy objects
+    np = None
+    HAVE_NUMPY = False
+
+# Small integer ids so per-type lookups can be done with array indexing
+ENEMY_TYPE_IDS = {name: i for i, name in enumerate(ENEMY_TYPES)}
+
+class EnemyRow:
+    # Detached single-row copy of a table entry, so views of removed enemies
+    # keep their last state after the slot is reused
+    def __init__(self, table, i):
+        for name in EnemyTable.COLUMNS:
+            setattr(self, name, getattr(table, name)[i:i+1].copy())
+        self.path = table.path
+
+class EnemyView:
+    # Thin Enemy-compatible view onto one row of an EnemyTable. Drawing,
+    # towers and projectiles use it exactly like an Enemy.
+    def __init__(self, table, index, enemy_type):
+        self.table = table
+        self.index = index
+        self.type = enemy_type
+        stats = ENEMY_TYPES[enemy_type]
+        self.base_speed = stats["speed"]
+        self.max_health = stats["health"]
+        self.reward = stats["reward"]
+        self.color = stats["color"]
+        self.radius = stats["radius"]
+        self.waypoints = table.waypoints
+
+    @property
+    def x(self): return float(self.table.x[self.index])
+
+    @property
+    def y(self): return float(self.table.y[self.index])
+
+    @property
+    def prev_x(self): return float(self.table.prev_x[self.index])
+
+    @property
+    def prev_y(self): return float(self.table.prev_y[self.index])
+
+    @property
+    def speed(self): return float(self.table.speed[self.index])
+
+    @property
+    def health(self): return float(self.table.health[self.index])
+
+    @property
+    def slow_timer(self): return float(self.table.slow_timer[self.index])
+
+    @property
+    def waypoint_index(self): return int(self.table.seg[self.index])
+
+    @property
+    def distance(self): return float(self.table.dist[self.index])
+
+    @property
+    def progress(self): return self.table.path.progress(self.distance)
+
+    @property
+    def finished(self): return bool(self.table.finished[self.index])
+
+    def detach(self):
+        self.table = EnemyRow(self.table, self.index)
+        self.index = 0
+
+    def apply_slow(self, factor, duration):
+        # Apply slow effect (doesn't stack, just refreshes)
+        self.table.speed[self.index] = self.base_speed * factor
+        self.table.slow_timer[self.index] = duration
+
+    def take_damage(self, amount):
+        self.table.health[self.index] -= amount
+        return self.table.health[self.index] <= 0
+
+class EnemyTable:
+    # Structure-of-arrays enemy store. Every per-tick rule (slow expiry,
+    # movement, waypoint advancement, finish detection) is one vectorized pass.
+    COLUMNS = ("x", "y", "prev_x", "prev_y", "base_speed", "speed", "health", "slow_timer", "dist", "seg", "finished", "alive", "type_id", "gen")
+
+    def __init__(self, path, capacity=256):
+        # path is the level's PathIndex; its segment tables are mirrored as arrays
+        self.path = path
+        self.waypoints = path.waypoints
+        self.wp = np.array(path.waypoints, dtype=np.float64)
+        self.starts = np.array(path.starts, dtype=np.float64)
+        self.units = np.array(path.units, dtype=np.float64).reshape(-1, 2)
+        self.capacity = 0
+        self.high_water = 0 # Rows [0, high_water) may be in use
+        self.free = []
+        self.views = []
+        for name in self.COLUMNS:
+            setattr(self, name, None)
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        def resized(old, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                new[:self.capacity] = old
+            return new
+
+        self.x = resized(self.x, np.float64)
+        self.y = resized(self.y, np.float64)
+        self.prev_x = resized(self.prev_x, np.float64) # Position before the last step, for interpolation
+        self.prev_y = resized(self.prev_y, np.float64)
+        self.base_speed = resized(self.base_speed, np.float64)
+        self.speed = resized(self.speed, np.float64)
+        self.health = resized(self.health, np.float64)
+        self.slow_timer = resized(self.slow_timer, np.float64)
+        self.dist = resized(self.dist, np.float64) # Arc length travelled along the path
+        self.seg = resized(self.seg, np.int32)
+        self.finished = resized(self.finished, np.bool_)
+        self.alive = resized(self.alive, np.bool_)
+        self.type_id = resized(self.type_id, np.int32)
+        self.gen = resized(self.gen, np.int64) # Bumped on release so stale references can be detected
+        self.views.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def spawn(self, enemy_type):
+        if self.free:
+            i = self.free.pop()
+        else:
+            if self.high_water == self.capacity:
+                self.grow(self.capacity * 2)
+            i = self.high_water
+            self.high_water += 1
+
+        stats = ENEMY_TYPES[enemy_type]
+        self.x[i], self.y[i] = self.wp[0]
+        self.prev_x[i], self.prev_y[i] = self.wp[0]
+        self.base_speed[i] = stats["speed"]
+        self.speed[i] = stats["speed"]
+        self.health[i] = stats["health"]
+        self.slow_timer[i] = 0
+        self.dist[i] = 0
+        self.seg[i] = 1 # Index of the waypoint being walked towards
+        self.finished[i] = False
+        self.alive[i] = True
+        self.type_id[i] = ENEMY_TYPE_IDS[enemy_type]
+
+        view = EnemyView(self, i, enemy_type)
+        self.views[i] = view
+        return view
+
+    def release(self, view):
+        i = view.index
+        view.detach()
+        self.alive[i] = False
+        self.gen[i] += 1
+        self.views[i] = None
+        self.free.append(i)
+
+    def step(self, dt_ms, speed_mult=1.0, cell_size=GRID_SIZE):
+        # Returns (finished, dead, moved_cell) row indices for this tick
+        n = self.high_water
+        idx = np.flatnonzero(self.alive[:n])
+        if idx.size == 0:
+            return idx, idx, idx
+
+        # Slow expiry
+        slow = self.slow_timer[idx]
+        slowed = slow > 0
+        slow = np.where(slowed, slow - dt_ms, slow)
+        self.slow_timer[idx] = slow
+        speed = np.where(slow <= 0, self.base_speed[idx], self.speed[idx])
+        self.speed[idx] = speed
+
+        # Movement along the path (speeds are pixels per reference frame).
+        # Positions come from the arc-length index, so fast enemies cross any
+        # number of waypoints in one step without overshooting.
+        step = speed * speed_mult * (dt_ms / FRAME_MS)
+        x = self.x[idx]
+        y = self.y[idx]
+        self.prev_x[idx] = x
+        self.prev_y[idx] = y
+        dist = self.dist[idx] + step
+        self.dist[idx] = dist
+
+        last = len(self.units) - 1
+        along = np.minimum(dist, self.path.length)
+        seg = np.clip(np.searchsorted(self.starts, along, side="right") - 1, 0, last)
+        along -= self.starts[seg]
+        new_x = self.wp[seg, 0] + self.units[seg, 0] * along
+        new_y = self.wp[seg, 1] + self.units[seg, 1] * along
+
+        # Finish detection; waypoint index is the one being walked towards
+        finished = dist >= self.path.length
+        new_x[finished] = self.wp[-1, 0]
+        new_y[finished] = self.wp[-1, 1]
+        self.seg[idx] = np.where(finished, len(self.wp), seg + 1)
+        self.finished[idx] = finished
+        self.x[idx] = new_x
+        self.y[idx] = new_y
+
+        moved_cell = ((x // cell_size) != (new_x // cell_size)) | ((y // cell_size) != (new_y // cell_size))
+        dead = ~finished & (self.health[idx] <= 0)
+        return idx[finished], idx[dead], idx[moved_cell]
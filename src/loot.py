@@ -0,0 +1,34 @@
+import math
+from src.constants import *
+from src.pool import Pool
+
+class LootDrop:
+    __slots__ = ("x", "y", "type", "data", "creation_time", "duration", "collected",
+                 "float_offset", "float_speed")
+
+    def __init__(self, x, y, loot_type, created_at):
+        self.reset(x, y, loot_type, created_at)
+
+    def reset(self, x, y, loot_type, created_at):
+        self.x = x
+        self.y = y
+        self.type = loot_type
+        self.data = LOOT_TYPES[loot_type]
+        self.creation_time = created_at # Simulation clock, ms
+        self.duration = self.data["duration"] * 1000
+        self.collected = False
+
+        # Floating animation
+        self.float_offset = 0
+        self.float_speed = 5.0
+
+    def update(self, now):
+        # Check if expired
+        if now - self.creation_time > self.duration:
+            return False # Remove me
+
+        # Animate
+        self.float_offset = math.sin(now / 1000 * self.float_speed) * 3
+        return True # Keep me
+
+loot_pool = Pool(LootDrop)
@@ -0,0 +1,73 @@
+import math
+from bisect import bisect_right
+
+class PathIndex:
+    # A level's waypoints compiled once into segment lengths, unit vectors
+    # and cumulative arc length. Enemies then only track how far along the
+    # path they are; positions are looked up from that distance.
+    def __init__(self, waypoints):
+        self.waypoints = waypoints
+        self.lengths = [] # Length of segment i (waypoint i -> i + 1)
+        self.units = [] # (ux, uy) direction of segment i
+        self.starts = [0.0] # Arc length at waypoint i
+        for (x0, y0), (x1, y1) in zip(waypoints, waypoints[1:]):
+            length = math.hypot(x1 - x0, y1 - y0)
+            self.lengths.append(length)
+            self.units.append(((x1 - x0) / length, (y1 - y0) / length) if length > 0 else (0.0, 0.0))
+            self.starts.append(self.starts[-1] + length)
+        self.length = self.starts[-1]
+
+    def segment(self, distance):
+        # Index of the segment containing distance, O(log n). Zero-length
+        # segments are skipped, and anything past the end is on the last one.
+        seg = bisect_right(self.starts, distance) - 1
+        return max(0, min(seg, len(self.lengths) - 1))
+
+    def position(self, distance, hint=None):
+        # (x, y, segment) at distance along the path, clamped to its ends.
+        # hint is the caller's last segment: if distance is still on it the
+        # bisect is skipped, which is the common case for a moving enemy.
+        if not self.lengths:
+            x, y = self.waypoints[0]
+            return x, y, 0
+        if distance >= self.length:
+            x, y = self.waypoints[-1]
+            return x, y, len(self.lengths) - 1
+        starts = self.starts
+        if hint is not None and starts[hint] <= distance < starts[hint + 1]:
+            seg = hint
+        else:
+            seg = self.segment(distance)
+        x0, y0 = self.waypoints[seg]
+        ux, uy = self.units[seg]
+        along = distance - self.starts[seg]
+        return x0 + ux * along, y0 + uy * along, seg
+
+    def ranges_within(self, x, y, radius):
+        # Stretches of the path within radius of (x, y): one (lo, hi, near)
+        # per segment that enters the circle, in path order, where lo..hi is
+        # the distance interval inside the circle and near the distance in
+        # it closest to (x, y). Positions are a function of distance, so an
+        # enemy is in range exactly when its distance falls in an interval.
+        pieces = []
+        r2 = radius * radius
+        for seg, length in enumerate(self.lengths):
+            x0, y0 = self.waypoints[seg]
+            ux, uy = self.units[seg]
+            px, py = x - x0, y - y0
+            # Solve |p - t*u| <= radius for t along the segment
+            b = px * ux + py * uy
+            disc = b * b - (px * px + py * py - r2)
+            if disc < 0:
+                continue
+            root = math.sqrt(disc)
+            lo, hi = max(0.0, b - root), min(length, b + root)
+            if lo > hi:
+                continue
+            start = self.starts[seg]
+            pieces.append((start + lo, start + hi, start + min(max(b, lo), hi)))
+        return pieces
+
+    def progress(self, distance):
+        # Fraction of the route covered, O(1); handy for sorting by "first"
+        return distance / self.length if self.length > 0 else 1.0
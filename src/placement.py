@@ -0,0 +1,186 @@
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from src.constants import *
+from src.simulation import Simulation
+
+PATH_CLEARANCE = 35 # No building closer than this to the path
+SPOTS_PER_TYPE = 12 # Best-covering lattice cells tried for each tower type
+BEAM_WIDTH = 4 # Layouts kept and extended at each search depth
+MAX_MATCH_MS = 30 * 60 * 1000 # Game time before a match is called off
+
+def path_samples(waypoints, spacing=10):
+    points = []
+    for (x0, y0), (x1, y1) in zip(waypoints, waypoints[1:]):
+        steps = max(1, int(math.hypot(x1 - x0, y1 - y0) // spacing))
+        for i in range(steps):
+            points.append((x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps))
+    points.append(waypoints[-1])
+    return points
+
+def build_spots(waypoints, tower_range):
+    # GRID_SIZE cell centres off the path, best coverage of the path first
+    samples = path_samples(waypoints)
+    spots = []
+    for x in range(GRID_SIZE // 2, MAP_WIDTH, GRID_SIZE):
+        for y in range(GRID_SIZE // 2, MAP_HEIGHT, GRID_SIZE):
+            nearest = min((sx - x)**2 + (sy - y)**2 for sx, sy in samples)
+            if nearest < PATH_CLEARANCE * PATH_CLEARANCE:
+                continue
+            r2 = tower_range * tower_range
+            coverage = sum(1 for sx, sy in samples if (sx - x)**2 + (sy - y)**2 <= r2)
+            if coverage:
+                spots.append((-coverage, x, y))
+    spots.sort()
+    return [(x, y) for _, x, y in spots]
+
+def tower_cost(tower_type, cost_mult=1.0):
+    # What place_tower charges under a "cost" modifier
+    return int(TOWER_TYPES[tower_type]["cost"] * cost_mult)
+
+def layout_cost(layout, cost_mult=1.0):
+    return sum(tower_cost(tower_type, cost_mult) for tower_type, x, y in layout)
+
+def evaluate(job):
+    # Play a level headless with a fixed layout and no further building:
+    # (layout, level_index, budget, seed, dt_ms, max_lives_lost, modifiers).
+    # The match is abandoned (pruned) as soon as it loses more than
+    # max_lives_lost. modifiers are (name, value) perk modifiers in effect.
+    layout, level_index, budget, seed, dt_ms, max_lives_lost, modifiers = job
+    sim = Simulation(mode="STORY", seed=seed)
+    sim.load_level(level_index)
+    sim.modifiers.update(modifiers)
+    sim.money = budget
+    for tower_type, x, y in layout:
+        sim.place_tower(tower_type, x, y)
+
+    lives_lost = 0
+    elapsed = 0
+    pruned = False
+    while not (sim.game_over or sim.level_complete) and elapsed < MAX_MATCH_MS:
+        if sim.pending_perk_choice and sim.generated_perks:
+            sim.apply_perk(sim.generated_perks[0])
+        if not sim.wave_in_progress:
+            sim.start_next_wave()
+        lives = sim.lives
+        sim.step(dt_ms)
+        # Perks can add lives, so only count leaks
+        lives_lost += max(0, lives - sim.lives)
+        if lives_lost > max_lives_lost:
+            pruned = True
+            break
+        elapsed += dt_ms
+
+    return {
+        "layout": layout,
+        "lives_lost": lives_lost,
+        "money_left": sim.money,
+        "won": sim.level_complete and not sim.game_over,
+        "pruned": pruned,
+    }
+
+def rank(result):
+    # Fewest leaks, then most money left (kill rewards plus unspent budget)
+    return (result["lives_lost"], -result["money_left"], len(result["layout"]))
+
+def optimize(level_index, budget=None, fixed=(), beam=BEAM_WIDTH, spots=SPOTS_PER_TYPE, seed=0,
+             dt_ms=FRAME_MS, workers=None, pool=None, modifiers=None, cancel=None):
+    # Beam search over tower layouts for LEVELS[level_index]. Each depth adds
+    # one affordable tower on a candidate lattice cell to every layout in the
+    # beam. Every new layout is scored by playing the level's waves headless,
+    # spread over a process pool. Once the beam is full, a match is cut short
+    # when it loses more lives than the worst layout in the beam.
+    # fixed are towers already placed; they keep their spots but don't count
+    # against budget. modifiers are the player's perk modifiers (a dict);
+    # costs and tower stats follow them. Setting the cancel Event stops the
+    # search after the current depth. Returns evaluated layouts best first;
+    # each "layout" is only the added towers.
+    level = LEVELS[level_index]
+    budget = level["starting_money"] if budget is None else budget
+    modifiers = tuple(sorted((modifiers or {}).items()))
+    cost_mult = dict(modifiers).get("cost", 1.0)
+    fixed = tuple(fixed)
+    occupied = {(x, y) for tower_type, x, y in fixed}
+    candidates = [(tower_type, x, y) for tower_type, stats in TOWER_TYPES.items()
+                  for x, y in build_spots(level["waypoints"], stats["range"])[:spots]
+                  if (x, y) not in occupied]
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = {}
+        frontier = [()]
+        while frontier and not (cancel is not None and cancel.is_set()):
+            layouts = set()
+            for layout in frontier:
+                spent = layout_cost(layout, cost_mult)
+                used = {(x, y) for tower_type, x, y in layout}
+                for tower_type, x, y in candidates:
+                    if (x, y) not in used and spent + tower_cost(tower_type, cost_mult) <= budget:
+                        layouts.add(tuple(sorted(layout + ((tower_type, x, y),))))
+            layouts = [layout for layout in layouts if layout not in results]
+            if not layouts:
+                break
+
+            best = sorted((r for r in results.values() if not r["pruned"]), key=rank)[:beam]
+            bound = best[-1]["lives_lost"] if len(best) == beam else STARTING_LIVES
+            jobs = [(fixed + layout, level_index, budget + layout_cost(fixed, cost_mult), seed, dt_ms, bound, modifiers)
+                    for layout in layouts]
+            chunksize = max(1, len(jobs) // ((workers or 4) * 4))
+            for layout, result in zip(layouts, pool.map(evaluate, jobs, chunksize=chunksize)):
+                result["layout"] = layout
+                results[layout] = result
+
+            ranked = sorted((results[layout] for layout in layouts if not results[layout]["pruned"]), key=rank)
+            frontier = [result["layout"] for result in ranked[:beam]]
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    return sorted((r for r in results.values() if not r["pruned"]), key=rank)
+
+class Suggester:
+    # Runs optimize() on a background thread for the in-game [G] overlay;
+    # the search itself runs in worker processes, so the game keeps drawing.
+    # result is None until it finishes, then the best layout (or False if
+    # nothing affordable helps).
+    #
+    # The workers are started with "spawn": forking a process that holds a
+    # display and several threads (simulation, autosave, endless waves) can
+    # deadlock the child.
+    def __init__(self, level_index, budget, fixed=(), modifiers=None):
+        self.level_index = level_index
+        self.budget = budget
+        self.key = Suggester.key_for(level_index, budget, fixed, modifiers)
+        self.result = None
+        self.cancelled = threading.Event()
+        self.pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        self.thread = threading.Thread(target=self.run, args=(fixed, modifiers), daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def key_for(level_index, budget, fixed=(), modifiers=None):
+        # Equal keys give the same suggestion, so a finished one can be reused
+        return (level_index, budget, tuple(sorted(fixed)), tuple(sorted((modifiers or {}).items())))
+
+    def run(self, fixed, modifiers):
+        try:
+            ranked = optimize(self.level_index, self.budget, fixed, pool=self.pool, modifiers=modifiers,
+                              cancel=self.cancelled)
+        except (CancelledError, RuntimeError):
+            # The pool was shut down under a search in flight by cancel()
+            if self.cancelled.is_set():
+                return
+            raise
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        if not self.cancelled.is_set():
+            self.result = ranked[0] if ranked else False
+
+    def cancel(self):
+        # Stop the search, dropping queued matches; running ones finish in
+        # their workers and are discarded
+        self.cancelled.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,22 @@
+class Pool:
+    # Free list of recycled entity objects. acquire() reuses a released
+    # instance through its reset() (same arguments as __init__), so steady
+    # play stops allocating new Enemy/Projectile/LootDrop objects.
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0 # Instances ever allocated (for benchmarks)
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+    def clear(self):
+        self.free.clear()
@@ -0,0 +1,46 @@
+import time
+from collections import deque
+
+PROFILE_HISTORY = 120 # Frames kept for rolling averages and the frame-time graph
+
+class FrameProfiler:
+    # Lap timer for the game loop. Each phase calls lap(name) when it ends and
+    # the time since the previous lap is charged to it. Callers hold None
+    # instead of a profiler while the HUD is off, so an idle profiler costs
+    # one attribute test per phase. With a TraceBuffer attached every lap is
+    # also recorded as a trace span.
+    def __init__(self, history=PROFILE_HISTORY, trace=None):
+        self.history = history
+        self.trace = trace
+        self.phases = {} # name: deque of ms per frame (insertion order is display order)
+        self.frames = deque(maxlen=history) # Whole-frame ms
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        self.current = {}
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last) * 1000
+        if self.trace: self.trace.span(name, self.last, now, "phase")
+        self.last = now
+
+    def end_frame(self):
+        self.lap("other")
+        self.frames.append((self.last - self.frame_start) * 1000)
+        if self.trace: self.trace.span("frame", self.frame_start, self.last, "frame")
+        for name in self.current:
+            if name not in self.phases:
+                # Pad so every phase history lines up with self.frames
+                self.phases[name] = deque([0.0] * (len(self.frames) - 1), maxlen=self.history)
+        for name, samples in self.phases.items():
+            samples.append(self.current.get(name, 0.0))
+
+    def averages(self):
+        # Rolling mean ms per phase
+        return {name: sum(samples) / len(samples) for name, samples in self.phases.items() if samples}
+
+    def frame_average(self):
+        return sum(self.frames) / len(self.frames) if self.frames else 0.0
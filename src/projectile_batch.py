@@ -0,0 +1,117 @@
+from src.constants import *
+from src.enemy_table import np, ENEMY_TYPE_IDS
+
+TOWER_TYPE_IDS = {name: i for i, name in enumerate(TOWER_TYPES)}
+PROJECTILE_SPEED = 12 # Pixels per reference frame (same as Projectile.speed)
+
+def build_multiplier_table():
+    # DAMAGE_MULTIPLIERS as a dense [tower_type_id, enemy_type_id] matrix
+    table = np.ones((len(TOWER_TYPE_IDS), len(ENEMY_TYPE_IDS)), dtype=np.float64)
+    for tower_type, multipliers in DAMAGE_MULTIPLIERS.items():
+        for enemy_type, value in multipliers.items():
+            table[TOWER_TYPE_IDS[tower_type], ENEMY_TYPE_IDS[enemy_type]] = value
+    return table
+
+class ProjectileBatch:
+    # All in-flight projectiles as parallel arrays, homing on EnemyTable rows.
+    # Homing, arrival and damage are one vectorized pass; damage is
+    # scatter-added onto enemy health and spent shots are compacted out.
+    def __init__(self, enemy_table, capacity=256):
+        self.enemy_table = enemy_table
+        self.multipliers = build_multiplier_table()
+        self.colors = [TOWER_TYPES[name]["color"] for name in TOWER_TYPE_IDS]
+        self.count = 0
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.prev_x = np.zeros(capacity, dtype=np.float64) # Position before the last step, for interpolation
+        self.prev_y = np.zeros(capacity, dtype=np.float64)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.target = np.zeros(capacity, dtype=np.int64) # EnemyTable row
+        self.target_gen = np.zeros(capacity, dtype=np.int64) # Row generation at fire time
+        self.type_id = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = self.capacity * 2
+        for name in ("x", "y", "prev_x", "prev_y", "damage", "target", "target_gen", "type_id"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def fire(self, tower, target):
+        return self.add(tower.x, tower.y, tower.damage, target, tower.type)
+
+    def add(self, x, y, damage, target, tower_type):
+        # A shot at (x, y) homing on target (an EnemyView); returns its slot
+        if self.count == self.capacity:
+            self.grow()
+        i = self.count
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.damage[i] = damage
+        self.target[i] = target.index
+        self.target_gen[i] = self.enemy_table.gen[target.index]
+        self.type_id[i] = TOWER_TYPE_IDS[tower_type]
+        self.count += 1
+        return i
+
+    def step(self, dt_ms):
+        n = self.count
+        if n == 0:
+            return
+        table = self.enemy_table
+        t = self.target[:n]
+
+        # Shots whose target died or left the table fizzle (like Projectile.move)
+        valid = (table.gen[t] == self.target_gen[:n]) & (table.health[t] > 0)
+
+        x = self.x[:n]
+        y = self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        dx = table.x[t] - x
+        dy = table.y[t] - y
+        dist = np.sqrt(dx*dx + dy*dy)
+        step = PROJECTILE_SPEED * (dt_ms / FRAME_MS)
+
+        hit = valid & (dist < step)
+        flying = valid & ~hit
+
+        # Homing
+        scale = np.where(flying, step / np.maximum(dist, 1e-9), 0.0)
+        x += dx * scale
+        y += dy * scale
+
+        # Damage, scatter-added so several hits on one enemy accumulate
+        if hit.any():
+            ht = t[hit]
+            dmg = self.damage[:n][hit] * self.multipliers[self.type_id[:n][hit], table.type_id[ht]]
+            np.subtract.at(table.health, ht, dmg)
+
+        # Stable compaction of the surviving shots
+        if not flying.all():
+            keep = np.flatnonzero(flying)
+            m = keep.size
+            for name in ("x", "y", "prev_x", "prev_y", "damage", "target", "target_gen", "type_id"):
+                arr = getattr(self, name)
+                arr[:m] = arr[:n][keep]
+            self.count = m
+
+    def draw_items(self, alpha=1.0):
+        # (x, y, color) for each live shot, for the renderer, alpha of the
+        # way from the previous step's positions to the current ones
+        n = self.count
+        colors = self.colors
+        x = self.x[:n]
+        y = self.y[:n]
+        if alpha < 1.0:
+            px = self.prev_x[:n]
+            py = self.prev_y[:n]
+            x = px + (x - px) * alpha
+            y = py + (y - py) * alpha
+        return zip(x.tolist(), y.tolist(), [colors[i] for i in self.type_id[:n].tolist()])
@@ -0,0 +1,110 @@
+import gzip
+import pickle
+from src.simulation import Simulation
+
+REPLAY_VERSION = 1
+KEYFRAME_INTERVAL = 600 # Ticks between state keyframes (~10 s at 60 FPS)
+
+class Recorder:
+    # Attached to a simulation as sim.recorder. Logs the dt of every step and
+    # every player command, and snapshots the full state every
+    # KEYFRAME_INTERVAL ticks so playback can seek without replaying from 0.
+    def __init__(self, sim, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.replay = Replay(sim.mode, sim.use_enemy_table, sim.seed, sim.tick)
+        self.replay.keyframes[sim.tick] = sim.save_state()
+        sim.recorder = self
+
+    def on_step(self, sim, dt_ms):
+        self.replay.dts.append(dt_ms)
+        if sim.tick % self.keyframe_interval == 0:
+            self.replay.keyframes[sim.tick] = sim.save_state()
+
+    def on_input(self, tick, command, args):
+        self.replay.inputs.append((tick, command, args))
+
+class Replay:
+    # A recorded match: per-tick dts, player commands by tick and state
+    # keyframes. Commands stamped with tick T were issued after T steps,
+    # before step T + 1; a keyframe at T is the state right after T steps.
+    def __init__(self, mode, enemy_table, seed, start_tick=0):
+        self.mode = mode
+        self.enemy_table = enemy_table
+        self.seed = seed
+        self.start_tick = start_tick
+        self.dts = [] # dt_ms of each step from start_tick on
+        self.inputs = [] # (tick, command, args)
+        self.keyframes = {} # tick: Simulation.save_state() bytes
+
+    @property
+    def end_tick(self):
+        return self.start_tick + len(self.dts)
+
+    def save(self, path):
+        # dts are run-length encoded: almost every frame has the same length
+        runs = []
+        for dt in self.dts:
+            if runs and runs[-1][0] == dt:
+                runs[-1][1] += 1
+            else:
+                runs.append([dt, 1])
+        data = {
+            "version": REPLAY_VERSION,
+            "mode": self.mode,
+            "enemy_table": self.enemy_table,
+            "seed": self.seed,
+            "start_tick": self.start_tick,
+            "dts": runs,
+            "inputs": self.inputs,
+            "keyframes": self.keyframes,
+        }
+        with gzip.open(path, "wb") as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        # Replays contain pickled state: only load files you trust
+        with gzip.open(path, "rb") as f:
+            data = pickle.load(f)
+        if data["version"] != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {data['version']}")
+        replay = cls(data["mode"], data["enemy_table"], data["seed"], data["start_tick"])
+        for dt, count in data["dts"]:
+            replay.dts.extend([dt] * count)
+        replay.inputs = [tuple(entry) for entry in data["inputs"]]
+        replay.keyframes = data["keyframes"]
+        return replay
+
+    def inputs_at(self, tick):
+        if getattr(self, "input_index_size", None) != len(self.inputs):
+            self.input_index = {}
+            for t, command, args in self.inputs:
+                self.input_index.setdefault(t, []).append((command, args))
+            self.input_index_size = len(self.inputs)
+        return self.input_index.get(tick, ())
+
+    def seek(self, sim, tick):
+        # Put sim (a Simulation or Game) at tick: load the nearest keyframe
+        # at or before it and simulate only the remaining ticks
+        tick = max(self.start_tick, min(tick, self.end_tick))
+        keyframe = max(t for t in self.keyframes if t <= tick)
+        sim.load_state(self.keyframes[keyframe])
+        sim.recorder = None
+        while sim.tick < tick:
+            self.advance(sim)
+        return sim
+
+    def advance(self, sim):
+        # Apply the commands issued at sim.tick, then take the recorded step.
+        # Returns False once the recording is exhausted.
+        if sim.tick >= self.end_tick:
+            return False
+        for command, args in self.inputs_at(sim.tick):
+            getattr(sim, command)(*args)
+        sim.step(self.dts[sim.tick - self.start_tick])
+        return True
+
+    def simulation(self, tick=None):
+        # Headless Simulation positioned at tick (default: the start)
+        sim = Simulation(self.mode, enemy_table=self.enemy_table, seed=self.seed)
+        return self.seek(sim, self.start_tick if tick is None else tick)
@@ -0,0 +1,439 @@
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from src.constants import *
+from src.enemy import enemy_pool
+from src.tower import Tower, projectile_pool
+from src.loot import loot_pool
+from src.spawn import SpawnSchedule
+from src.endless import EndlessWave
+from src.simulation import Simulation
+from src.sim_thread import SimulationThread
+
+# Binary save games.
+#
+# capture() copies a match into plain tuples and lists; it is cheap enough
+# to run on the main thread between frames. encode() turns that into a
+# compact little-endian file: a header (magic, version, payload length and
+# CRC-32), then fixed struct fields, then each entity collection as columns
+# packed with array. Type names are written once in a string table and
+# referenced by index. decode() and restore() reverse it into a fresh Game
+# (or Simulation); a file that is truncated or damaged raises ValueError.
+
+SAVE_MAGIC = b"CBSV"
+SAVE_VERSION = 2
+AUTOSAVE_INTERVAL_MS = 30000
+HEADER = "<4sHII" # magic, version, payload length, payload CRC-32
+
+def capture(sim):
+    # Plain-data copy of everything needed to resume the match
+    enemies = sim.enemies
+    slot = {id(enemy): i for i, enemy in enumerate(enemies)}
+    table = sim.enemy_table
+    if table is not None:
+        rows = [enemy.index for enemy in enemies]
+        enemy_rows = list(zip([e.type for e in enemies], table.dist[rows].tolist(), table.seg[rows].tolist(),
+                              table.x[rows].tolist(), table.y[rows].tolist(), table.prev_x[rows].tolist(),
+                              table.prev_y[rows].tolist(), table.health[rows].tolist(), table.speed[rows].tolist(),
+                              table.slow_timer[rows].tolist(), table.finished[rows].tolist()))
+    else:
+        enemy_rows = [(e.type, e.distance, e.waypoint_index, e.x, e.y, e.prev_x, e.prev_y, e.health, e.speed,
+                       e.slow_timer, e.finished) for e in enemies]
+
+    # Shots and sticky targets refer to enemies by position in the list;
+    # anything aimed at an enemy that is already gone is dropped
+    towers = [(t.type, t.x, t.y, t.targeting, t.damage, t.range, t.rate, t.reload_timer,
+               slot.get(id(t.target), -1) if t.target is not None and t.is_valid_target(t.target, sim.enemy_grid) else -1)
+              for t in sim.towers]
+    shots = [(p.tower_type, p.x, p.y, p.prev_x, p.prev_y, p.damage, slot.get(id(p.target), -1))
+             for p in sim.projectiles if p.active and p.target.gen == p.target_gen]
+    batch = sim.projectile_batch
+    if batch is not None and batch.count:
+        n = batch.count
+        row_slot = {enemy.index: i for i, enemy in enumerate(enemies)}
+        tower_types = list(TOWER_TYPES)
+        live = (table.gen[batch.target[:n]] == batch.target_gen[:n]).tolist()
+        for ok, type_id, x, y, px, py, damage, row in zip(live, batch.type_id[:n].tolist(), batch.x[:n].tolist(),
+                                                          batch.y[:n].tolist(), batch.prev_x[:n].tolist(), batch.prev_y[:n].tolist(),
+                                                          batch.damage[:n].tolist(), batch.target[:n].tolist()):
+            if ok:
+                shots.append((tower_types[type_id], x, y, px, py, damage, row_slot.get(row, -1)))
+
+    # Runs still to spawn. A lazy endless wave that hasn't been drawn out is
+    # saved as its generator state rather than expanded here.
+    schedule = sim.enemies_to_spawn
+    source = schedule.source
+    if source is not None and not isinstance(source, EndlessWave):
+        raise ValueError(f"Cannot save a spawn source of type {type(source).__name__}")
+    if source is not None:
+        source = (source.seed, source.wave_num, source.budget, source.runs, list(source.bosses), source.rng.getstate())
+
+    return {
+        "mode": sim.mode,
+        "enemy_table": table is not None,
+        "seed": check_seed(sim.seed),
+        "level_index": sim.level_index,
+        "ints": (sim.tick, sim.money, sim.lives, sim.wave_index),
+        "floats": (sim.clock.now, sim.accumulator, sim.game_speed),
+        "flags": (sim.wave_in_progress, sim.level_complete, sim.game_over, sim.game_won, sim.pending_perk_choice),
+        "rng": sim.rng.getstate(),
+        "modifiers": list(sim.modifiers.items()),
+        "buffs": list(sim.active_buffs.items()),
+        "generated_perks": list(sim.generated_perks),
+        "claimed_perks": sorted(sim.claimed_perks),
+        "spawn_groups": schedule.groups[schedule.group:],
+        "spawn_cursor": (schedule.spawned, schedule.remaining, schedule.elapsed, schedule.next_due),
+        "spawn_source": source,
+        "enemies": enemy_rows,
+        "towers": towers,
+        "shots": [shot for shot in shots if shot[6] >= 0],
+        "loot": [(l.type, l.x, l.y, l.creation_time, l.float_offset) for l in sim.loot_drops],
+    }
+
+def check_seed(seed):
+    # Seeds are saved as text, so any int (negative, or past 64 bits) or str
+    # round-trips; other seed types are refused here, on the saving thread
+    if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+        raise ValueError(f"Cannot save a game with a {type(seed).__name__} seed")
+    return seed
+
+class Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(struct.pack("<" + fmt, *values))
+
+    def string(self, text):
+        data = text.encode("utf-8")
+        self.pack("H", len(data))
+        self.parts.append(data)
+
+    def seed(self, seed):
+        # Tagged text: 0 for an int, 1 for a str
+        data = str(seed).encode("utf-8")
+        self.pack("BI", isinstance(seed, str), len(data))
+        self.parts.append(data)
+
+    def rng(self, state):
+        version, words, gauss = state
+        self.pack("B", version)
+        self.column("I", words)
+        self.pack("?d", gauss is not None, gauss or 0.0)
+
+    def column(self, typecode, values):
+        packed = array(typecode, values)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        self.pack("I", len(packed))
+        self.parts.append(packed.tobytes())
+
+    def columns(self, spec, rows):
+        # rows of tuples written column by column; spec has one typecode per field
+        fields = list(zip(*rows)) if rows else [()] * len(spec)
+        self.pack("I", len(rows))
+        for typecode, values in zip(spec, fields):
+            self.column(typecode, values)
+
+    def bytes(self):
+        return b"".join(self.parts)
+
+class Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+        fmt = "<" + fmt
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def take(self, size):
+        if self.offset + size > len(self.data):
+            raise ValueError("Truncated save file")
+        data = bytes(self.data[self.offset:self.offset + size])
+        self.offset += size
+        return data
+
+    def string(self):
+        (length,) = self.unpack("H")
+        return self.take(length).decode("utf-8")
+
+    def seed(self):
+        is_text, length = self.unpack("BI")
+        text = self.take(length).decode("utf-8")
+        return text if is_text else int(text)
+
+    def rng(self):
+        (version,) = self.unpack("B")
+        words = tuple(self.column("I"))
+        has_gauss, gauss = self.unpack("?d")
+        return (version, words, gauss if has_gauss else None)
+
+    def column(self, typecode):
+        (count,) = self.unpack("I")
+        values = array(typecode)
+        values.frombytes(self.take(values.itemsize * count))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def columns(self, spec):
+        (count,) = self.unpack("I")
+        fields = [self.column(typecode) for typecode in spec]
+        return list(zip(*fields)) if count else []
+
+# Entity columns: array typecodes per field. Type and targeting names are
+# "H" indices into the string table.
+ENEMY_COLUMNS = ("H", "d", "i", "d", "d", "d", "d", "d", "d", "d", "B")
+TOWER_COLUMNS = ("H", "d", "d", "H", "d", "d", "d", "d", "i")
+SHOT_COLUMNS = ("H", "d", "d", "d", "d", "d", "i")
+LOOT_COLUMNS = ("H", "d", "d", "d", "d")
+
+def encode(state):
+    # Compact bytes for a capture() dict
+    names = sorted({row[0] for key in ("enemies", "towers", "shots", "loot") for row in state[key]} |
+                   {row[3] for row in state["towers"]})
+    name_id = {name: i for i, name in enumerate(names)}
+
+    out = Writer()
+    out.string(state["mode"])
+    out.seed(state["seed"])
+    out.pack("?H", state["enemy_table"], state["level_index"])
+    out.pack("qqqq", *state["ints"])
+    out.pack("ddd", *state["floats"])
+    out.pack("5?", *state["flags"])
+    out.rng(state["rng"])
+
+    for pairs in (state["modifiers"], state["buffs"]):
+        out.pack("H", len(pairs))
+        for key, value in pairs:
+            out.string(key)
+            out.pack("d", value)
+    out.pack("H", len(state["generated_perks"]))
+    for key in state["generated_perks"]:
+        out.string(key)
+    out.column("i", state["claimed_perks"])
+
+    out.pack("H", len(state["spawn_groups"]))
+    for enemy_type, count, delay in state["spawn_groups"]:
+        out.string(enemy_type)
+        out.pack("id", count, delay)
+    out.pack("iidd", *state["spawn_cursor"])
+    source = state["spawn_source"]
+    out.pack("?", source is not None)
+    if source is not None:
+        seed, wave_num, budget, runs, bosses, rng = source
+        out.seed(seed)
+        out.pack("idi", wave_num, budget, runs)
+        out.pack("H", len(bosses))
+        for enemy_type, count, delay in bosses:
+            out.string(enemy_type)
+            out.pack("id", count, delay)
+        out.rng(rng)
+
+    out.pack("H", len(names))
+    for name in names:
+        out.string(name)
+    out.columns(ENEMY_COLUMNS, [(name_id[r[0]],) + tuple(r[1:]) for r in state["enemies"]])
+    out.columns(TOWER_COLUMNS, [(name_id[r[0]],) + tuple(r[1:3]) + (name_id[r[3]],) + tuple(r[4:]) for r in state["towers"]])
+    out.columns(SHOT_COLUMNS, [(name_id[r[0]],) + tuple(r[1:]) for r in state["shots"]])
+    out.columns(LOOT_COLUMNS, [(name_id[r[0]],) + tuple(r[1:]) for r in state["loot"]])
+    payload = out.bytes()
+    return struct.pack(HEADER, SAVE_MAGIC, SAVE_VERSION, len(payload), zlib.crc32(payload)) + payload
+
+def decode(data):
+    if len(data) < struct.calcsize(HEADER) or data[:4] != SAVE_MAGIC:
+        raise ValueError("Not a CodeBreak save file")
+    magic, version, length, crc = struct.unpack_from(HEADER, data)
+    if version != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version {version}")
+    payload = data[struct.calcsize(HEADER):]
+    if len(payload) != length:
+        raise ValueError("Truncated save file")
+    if zlib.crc32(payload) != crc:
+        raise ValueError("Corrupt save file (checksum mismatch)")
+    try:
+        return decode_payload(payload)
+    except (struct.error, UnicodeDecodeError, IndexError) as e:
+        raise ValueError(f"Corrupt save file ({e})") from e
+
+def decode_payload(payload):
+    reader = Reader(payload)
+    state = {"mode": reader.string()}
+    state["seed"] = reader.seed()
+    state["enemy_table"], state["level_index"] = reader.unpack("?H")
+    state["ints"] = reader.unpack("qqqq")
+    state["floats"] = reader.unpack("ddd")
+    state["flags"] = reader.unpack("5?")
+    state["rng"] = reader.rng()
+
+    for key in ("modifiers", "buffs"):
+        (count,) = reader.unpack("H")
+        state[key] = [(reader.string(), reader.unpack("d")[0]) for _ in range(count)]
+    (count,) = reader.unpack("H")
+    state["generated_perks"] = [reader.string() for _ in range(count)]
+    state["claimed_perks"] = list(reader.column("i"))
+
+    (count,) = reader.unpack("H")
+    state["spawn_groups"] = [(reader.string(),) + reader.unpack("id") for _ in range(count)]
+    state["spawn_cursor"] = reader.unpack("iidd")
+    state["spawn_source"] = None
+    if reader.unpack("?")[0]:
+        seed = reader.seed()
+        wave_num, budget, runs = reader.unpack("idi")
+        (count,) = reader.unpack("H")
+        bosses = [(reader.string(),) + reader.unpack("id") for _ in range(count)]
+        state["spawn_source"] = (seed, wave_num, budget, runs, bosses, reader.rng())
+
+    (count,) = reader.unpack("H")
+    names = [reader.string() for _ in range(count)]
+    state["enemies"] = [(names[r[0]],) + r[1:] for r in reader.columns(ENEMY_COLUMNS)]
+    state["towers"] = [(names[r[0]],) + r[1:3] + (names[r[3]],) + r[4:] for r in reader.columns(TOWER_COLUMNS)]
+    state["shots"] = [(names[r[0]],) + r[1:] for r in reader.columns(SHOT_COLUMNS)]
+    state["loot"] = [(names[r[0]],) + r[1:] for r in reader.columns(LOOT_COLUMNS)]
+    if reader.offset != len(payload):
+        raise ValueError("Corrupt save file (trailing data)")
+    return state
+
+def restore(state, cls=Simulation):
+    # A new cls (Simulation or Game) in the captured state
+    sim = cls(mode=state["mode"], enemy_table=state["enemy_table"], seed=state["seed"])
+    if state["level_index"] != sim.level_index:
+        sim.load_level(state["level_index"])
+
+    sim.tick, sim.money, sim.lives, sim.wave_index = state["ints"]
+    sim.clock.now, sim.accumulator, sim.game_speed = state["floats"]
+    sim.wave_in_progress, sim.level_complete, sim.game_over, sim.game_won, sim.pending_perk_choice = state["flags"]
+    sim.rng.setstate(state["rng"])
+    sim.modifiers.update(state["modifiers"])
+    sim.active_buffs = dict(state["buffs"])
+    sim.generated_perks = list(state["generated_perks"])
+    sim.claimed_perks = set(state["claimed_perks"])
+
+    schedule = SpawnSchedule()
+    schedule.groups = [tuple(group) for group in state["spawn_groups"]]
+    schedule.spawned, schedule.remaining, schedule.elapsed, schedule.next_due = state["spawn_cursor"]
+    if state["spawn_source"] is not None:
+        seed, wave_num, budget, runs, bosses, rng = state["spawn_source"]
+        source = schedule.source = EndlessWave(seed, wave_num)
+        source.budget, source.runs, source.bosses = budget, runs, [tuple(boss) for boss in bosses]
+        source.rng.setstate(rng)
+    sim.enemies_to_spawn = schedule
+
+    table = sim.enemy_table
+    for enemy_type, distance, waypoint_index, x, y, prev_x, prev_y, health, speed, slow_timer, finished in state["enemies"]:
+        if table is not None:
+            enemy = table.spawn(enemy_type)
+            i = enemy.index
+            table.dist[i], table.seg[i] = distance, waypoint_index
+            table.x[i], table.y[i], table.prev_x[i], table.prev_y[i] = x, y, prev_x, prev_y
+            table.health[i], table.speed[i], table.slow_timer[i], table.finished[i] = health, speed, slow_timer, finished
+        else:
+            enemy = enemy_pool.acquire(enemy_type, sim.path)
+            enemy.distance, enemy.waypoint_index = distance, waypoint_index
+            enemy.x, enemy.y, enemy.prev_x, enemy.prev_y = x, y, prev_x, prev_y
+            enemy.health, enemy.speed, enemy.slow_timer, enemy.finished = health, speed, slow_timer, bool(finished)
+        sim.enemies.append(enemy)
+        sim.enemy_grid.insert(enemy)
+
+    enemies = sim.enemies
+    for tower_type, x, y, targeting, damage, tower_range, rate, reload_timer, target in state["towers"]:
+        tower = Tower(tower_type, x, y, targeting)
+        tower.damage, tower.range, tower.rate, tower.reload_timer = damage, tower_range, rate, reload_timer
+        if target >= 0:
+            tower.target = enemies[target]
+            tower.target_gen = getattr(tower.target, "gen", None)
+        sim.towers.append(tower)
+
+    for tower_type, x, y, prev_x, prev_y, damage, target in state["shots"]:
+        if sim.projectile_batch is not None:
+            i = sim.projectile_batch.add(x, y, damage, enemies[target], tower_type)
+            sim.projectile_batch.prev_x[i], sim.projectile_batch.prev_y[i] = prev_x, prev_y
+        else:
+            shot = projectile_pool.acquire(x, y, enemies[target], damage, TOWER_TYPES[tower_type]["color"], tower_type)
+            shot.prev_x, shot.prev_y = prev_x, prev_y
+            sim.projectiles.append(shot)
+
+    for loot_type, x, y, creation_time, float_offset in state["loot"]:
+        drop = loot_pool.acquire(x, y, loot_type, creation_time)
+        drop.float_offset = float_offset
+        sim.loot_drops.append(drop)
+    return sim
+
+def write_file(path, data):
+    # Write to a temporary file, fsync, then rename over the old save, so a
+    # crash mid-write never leaves a truncated save behind
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+def save_game(sim, path):
+    write_file(path, encode(capture(sim)))
+
+def load_game(path, cls=Simulation):
+    with open(path, "rb") as f:
+        return restore(decode(f.read()), cls)
+
+class Autosaver:
+    # Periodic background saves. save() only runs capture() on the calling
+    # thread; encoding, writing and fsync happen on a worker thread, so an
+    # autosave never stalls a frame. If saves queue up, only the newest is
+    # written. A failed write (disk full, say) is kept in error and the
+    # worker carries on with the next save.
+    def __init__(self, path, interval_ms=AUTOSAVE_INTERVAL_MS):
+        self.path = path
+        self.interval_ms = interval_ms
+        self.error = None
+        self.last_save = None
+        self.pending = None
+        self.closing = False
+        self.ready = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def maybe_save(self, sim, now_ms):
+        # Call every frame of a match with a wall-clock ms time
+        if self.last_save is None:
+            self.last_save = now_ms
+        elif now_ms - self.last_save >= self.interval_ms:
+            self.last_save = now_ms
+            self.save(sim)
+
+    def save(self, sim):
+        if isinstance(sim, SimulationThread):
+            # Capture between steps, on the thread that owns the game
+            sim.call(self.save)
+            return
+        state = capture(sim)
+        with self.ready:
+            self.pending = state
+            self.ready.notify()
+
+    def run(self):
+        while True:
+            with self.ready:
+                while self.pending is None and not self.closing:
+                    self.ready.wait()
+                state, self.pending = self.pending, None
+                if state is None:
+                    return
+            try:
+                write_file(self.path, encode(state))
+                self.error = None
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        # Finish any pending save, then stop the worker
+        with self.ready:
+            self.closing = True
+            self.ready.notify()
+        self.thread.join()
@@ -0,0 +1,179 @@
+import threading
+import time
+from queue import SimpleQueue, Empty
+from src.constants import *
+from src.clock import SimClock
+from src.simulation import Simulation
+
+HEARTBEAT_S = 0.25 # The simulation pauses once update() hasn't been called for this long
+
+# Player commands: queued from the render thread, run on the simulation thread
+COMMANDS = ("place_tower", "sell_tower", "set_tower_targeting", "start_next_wave", "apply_perk",
+            "set_game_speed", "cycle_game_speed", "buy_patch", "check_loot_collection", "load_level")
+
+class EnemyState:
+    __slots__ = ("type", "x", "y", "prev_x", "prev_y", "radius", "color", "health", "max_health", "slow_timer")
+
+    def __init__(self, enemy_type, x, y, prev_x, prev_y, radius, color, health, max_health, slow_timer):
+        self.type = enemy_type
+        self.x = x
+        self.y = y
+        self.prev_x = prev_x
+        self.prev_y = prev_y
+        self.radius = radius
+        self.color = color
+        self.health = health
+        self.max_health = max_health
+        self.slow_timer = slow_timer
+
+class ShotState:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "color")
+
+    def __init__(self, x, y, prev_x, prev_y, color):
+        self.x = x
+        self.y = y
+        self.prev_x = prev_x
+        self.prev_y = prev_y
+        self.color = color
+
+class LootState:
+    __slots__ = ("type", "x", "y", "float_offset")
+
+    def __init__(self, loot_type, x, y, float_offset):
+        self.type = loot_type
+        self.x = x
+        self.y = y
+        self.float_offset = float_offset
+
+class TowerState:
+    __slots__ = ("type", "x", "y", "width", "height", "color", "range", "targeting")
+
+    def __init__(self, tower):
+        self.type = tower.type
+        self.x = tower.x
+        self.y = tower.y
+        self.width = tower.width
+        self.height = tower.height
+        self.color = tower.color
+        self.range = tower.range
+        self.targeting = tower.targeting
+
+class Snapshot:
+    # Read-only copy of everything the renderer, sidebar and menus read from
+    # a game, taken between steps. It has the same attribute names as the
+    # game, so Game.draw and draw_sidebar accept either.
+    SCALARS = ("mode", "level_index", "level_data", "waves", "waypoints", "money", "lives", "wave_index",
+               "game_speed", "game_over", "game_won", "level_complete", "wave_in_progress",
+               "pending_perk_choice", "accumulator", "tick")
+
+    def __init__(self, sim):
+        for name in self.SCALARS:
+            setattr(self, name, getattr(sim, name))
+        self.generated_perks = list(sim.generated_perks)
+        self.active_buffs = dict(sim.active_buffs)
+        self.clock = SimClock(sim.clock.now)
+        self.projectile_batch = None # Batch shots are copied into projectiles
+
+        table = sim.enemy_table
+        if table is not None:
+            # Columns are read in bulk rather than through each view's properties
+            rows = [enemy.index for enemy in sim.enemies]
+            columns = zip(table.x[rows].tolist(), table.y[rows].tolist(), table.prev_x[rows].tolist(),
+                          table.prev_y[rows].tolist(), table.health[rows].tolist(), table.slow_timer[rows].tolist())
+            self.enemies = [EnemyState(e.type, x, y, px, py, e.radius, e.color, health, e.max_health, slow)
+                            for e, (x, y, px, py, health, slow) in zip(sim.enemies, columns)]
+        else:
+            self.enemies = [EnemyState(e.type, e.x, e.y, e.prev_x, e.prev_y, e.radius, e.color, e.health, e.max_health, e.slow_timer)
+                            for e in sim.enemies]
+
+        self.projectiles = [ShotState(p.x, p.y, p.prev_x, p.prev_y, p.color) for p in sim.projectiles]
+        batch = sim.projectile_batch
+        if batch is not None and batch.count:
+            n = batch.count
+            colors = [batch.colors[i] for i in batch.type_id[:n].tolist()]
+            self.projectiles.extend(ShotState(*shot) for shot in zip(batch.x[:n].tolist(), batch.y[:n].tolist(),
+                                                                     batch.prev_x[:n].tolist(), batch.prev_y[:n].tolist(), colors))
+
+        self.loot_drops = [LootState(l.type, l.x, l.y, l.float_offset) for l in sim.loot_drops]
+        self.towers = [TowerState(t) for t in sim.towers]
+
+class SimulationThread:
+    # Runs a Game's simulation on a worker thread (python main.py --threaded).
+    #
+    # The worker steps in real time, one FRAME_MS tick at a time, and after
+    # every step publishes a new Snapshot by swapping one reference: the
+    # renderer always holds a complete, unchanging frame while the next one
+    # is built. Player commands are queued and applied between steps.
+    #
+    # Stands in for the game in the main loop: command methods enqueue,
+    # draw() renders the latest snapshot, update() is a heartbeat (the
+    # simulation runs only while the loop keeps calling it), and other
+    # attributes read from the snapshot or, for level data, the game.
+    def __init__(self, game):
+        self.game = game
+        self.profiler = None # Render-side only; the worker is not lapped
+        game.profiler = None
+        self.commands = SimpleQueue()
+        self.snapshot = Snapshot(game)
+        self.heartbeat = 0.0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        if name in COMMANDS:
+            return lambda *args: self.queue(name, args)
+        try:
+            return getattr(self.snapshot, name)
+        except AttributeError:
+            # Level data, get_level_intel, recorder: not changed by steps
+            return getattr(self.game, name)
+
+    def call(self, fn, *args):
+        # Queue fn(game, *args) to run on the simulation thread between steps
+        self.queue(fn, args)
+
+    def queue(self, command, args):
+        # Nothing drains the queue after stop(), so later commands are dropped
+        if self.running:
+            self.commands.put((command, args))
+
+    def update(self):
+        self.heartbeat = time.perf_counter()
+
+    def draw(self, screen, dirty=None):
+        self.game.draw(screen, dirty, self.snapshot)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def run(self):
+        game = self.game
+        last = time.perf_counter()
+        owed = 0.0 # Real ms not yet stepped (steps are whole ms, like Game.update's)
+        while self.running:
+            while True:
+                try:
+                    name, args = self.commands.get_nowait()
+                except Empty:
+                    break
+                # Simulation's methods: Game.load_level would also rebuild
+                # render caches, which belong to the render thread
+                command = getattr(Simulation, name) if isinstance(name, str) else name
+                command(game, *args)
+
+            now = time.perf_counter()
+            paused = game.game_over or game.game_won or game.level_complete or game.pending_perk_choice
+            if paused or now - self.heartbeat > HEARTBEAT_S:
+                owed = 0.0
+            else:
+                owed += min((now - last) * 1000, 100)
+                dt_ms = int(owed)
+                if dt_ms:
+                    owed -= dt_ms
+                    game.step(dt_ms)
+            last = now
+            self.snapshot = Snapshot(game)
+
+            time.sleep(max(0.0, FRAME_MS / 1000 - (time.perf_counter() - now)))
@@ -0,0 +1,523 @@
+import math
+import pickle
+import random
+from src.constants import *
+from src.clock import SimClock
+from src.enemy import enemy_pool, release_enemy
+from src.tower import Tower, projectile_pool
+from src.loot import loot_pool
+from src.spatial import SpatialHash
+from src.targeting import TargetIndex, TableTargetIndex
+from src.path import PathIndex
+from src.spawn import SpawnSchedule
+from src.endless import WaveQueue, build_wave
+from src.enemy_table import EnemyTable, HAVE_NUMPY
+from src.projectile_batch import ProjectileBatch
+
+class Simulation:
+    # Display-free game state. Advances only through step(dt_ms), so it can
+    # run headless and faster than real time. Nothing here imports pygame.
+    TRANSIENT = ("recorder", "profiler", "endless_waves", "targets") # Attributes left out of save_state()
+
+    def __init__(self, mode="STORY", clock=None, enemy_table=False, seed=None):
+        self.mode = mode
+        self.clock = clock if clock is not None else SimClock()
+        # All randomness comes from this generator, so a seed (plus the
+        # recorded inputs, see src/replay.py) reproduces a whole match
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.tick = 0 # Steps taken
+        self.recorder = None # Optional replay Recorder
+        self.profiler = None # Optional FrameProfiler, set while the profiler HUD is on
+        self.endless_waves = WaveQueue() # Upcoming endless waves, built in the background
+        # Optional NumPy structure-of-arrays enemy store (see src/enemy_table.py)
+        self.use_enemy_table = enemy_table and HAVE_NUMPY
+        self.level_index = 0
+        self.load_level(self.level_index)
+
+        self.game_over = False
+        self.game_won = False
+
+    def get_level_intel(self):
+        # Gather unique enemy types from all waves
+        unique_enemies = set()
+        for wave in self.waves:
+            for group in wave:
+                # group is (type, count, delay)
+                unique_enemies.add(group[0])
+
+        intel_data = []
+        for enemy_type in unique_enemies:
+            # Find effective towers
+            effective_towers = []
+            for tower_type, multipliers in DAMAGE_MULTIPLIERS.items():
+                if enemy_type in multipliers and multipliers[enemy_type] > 1.0:
+                    effective_towers.append(TOWER_TYPES[tower_type]["name"])
+
+            intel_data.append({
+                "type": enemy_type,
+                "name": ENEMY_TYPES[enemy_type]["name"],
+                "color": ENEMY_TYPES[enemy_type]["color"],
+                "radius": ENEMY_TYPES[enemy_type]["radius"],
+                "effective": effective_towers
+            })
+
+        return intel_data
+
+    def load_level(self, index):
+        self.record("load_level", index)
+        if self.mode == "STORY":
+            if index >= len(LEVELS):
+                self.game_won = True
+                return
+            self.level_data = LEVELS[index]
+            self.waves = self.level_data["waves"]
+        else: # ENDLESS
+            # Pick a map (Corporate Server is good)
+            self.level_data = {
+                "name": f"ENDLESS WAVE {self.level_index + 1}",
+                "story": [
+                    "MODE: ENDLESS",
+                    "OBJECTIVE: SURVIVE",
+                    "WAVES ARE INFINITE."
+                ],
+                "waypoints": LEVELS[1]["waypoints"],
+                "starting_money": 600,
+                "waves": [] # Placeholder
+            }
+            self.waves = []
+
+        self.level_index = index
+        self.money = self.level_data["starting_money"]
+        self.lives = STARTING_LIVES
+
+        self.waypoints = self.level_data["waypoints"]
+        self.path = PathIndex(self.waypoints) # Compiled once per level
+
+        self.wave_index = 0
+        self.enemies = []
+        self.enemy_grid = SpatialHash(GRID_SIZE) # Kept in sync with self.enemies
+        self.enemy_table = EnemyTable(self.path) if self.use_enemy_table else None
+        self.towers = []
+        self.projectiles = []
+        # With the enemy table, shots live in arrays instead of self.projectiles
+        self.projectile_batch = ProjectileBatch(self.enemy_table) if self.enemy_table is not None else None
+        self.targets = self.make_target_index()
+
+        self.wave_in_progress = False
+        self.enemies_to_spawn = SpawnSchedule()
+        self.level_complete = False
+
+        self.game_speed = 1.0
+        self.accumulator = 0.0 # Game ms not yet simulated (less than one SIM_STEP_MS)
+
+        # Roguelike Perk System
+        self.modifiers = {
+            "damage": 1.0,
+            "range": 1.0,
+            "rate": 1.0,
+            "cost": 1.0,
+            "reward": 1.0,
+            "enemy_slow": 1.0 # Multiplier for enemy speed (lower is slower)
+        }
+        self.pending_perk_choice = False
+        self.generated_perks = []
+        self.claimed_perks = set()
+
+        self.loot_drops = []
+        self.active_buffs = {} # "buff_name": end_time (clock ms)
+
+    def generate_endless_wave(self):
+        # The whole spawn list for the next endless wave (see src/endless.py)
+        return build_wave(self.seed, self.wave_index + 1)
+
+    def generate_perk_choices(self):
+        keys = list(PERK_TYPES.keys())
+        weights = [PERK_TYPES[k].get("weight", 10) for k in keys]
+
+        # Weighted selection without replacement is tricky with random.choices (it does replacement)
+        # So we iterate 3 times
+
+        choices = []
+        temp_keys = keys[:]
+        temp_weights = weights[:]
+
+        for _ in range(3):
+            if not temp_keys: break
+            choice = self.rng.choices(temp_keys, weights=temp_weights, k=1)[0]
+            choices.append(choice)
+
+            # Remove chosen to avoid duplicates
+            idx = temp_keys.index(choice)
+            temp_keys.pop(idx)
+            temp_weights.pop(idx)
+
+        self.generated_perks = choices
+
+    def apply_perk(self, perk_key):
+        # Only one of the offered perks, once: a threaded game can queue a
+        # second click before the perk screen closes
+        if not self.pending_perk_choice or perk_key not in self.generated_perks:
+            return
+        self.record("apply_perk", perk_key)
+        perk = PERK_TYPES[perk_key]
+        eff = perk["effect"]
+        val = perk["value"]
+
+        if eff == "lives":
+            self.lives += val
+        elif eff == "hybrid_dmg_spd":
+            # Legendary Quantum Core
+            self.modifiers["damage"] *= 1.5
+            self.modifiers["rate"] *= 0.8
+            # Update towers
+            for t in self.towers:
+                t.damage *= 1.5
+                t.rate *= 0.8
+        elif eff == "enemy_slow":
+            # Legendary Time Warp
+            self.modifiers["enemy_slow"] *= val
+        else:
+            self.modifiers[eff] *= val
+            # Update existing towers
+            if eff in ["damage", "range", "rate"]:
+                for t in self.towers:
+                    if eff == "damage": t.damage *= val
+                    elif eff == "range": t.range *= val
+                    elif eff == "rate": t.rate *= val
+
+        self.pending_perk_choice = False
+        self.claimed_perks.add(self.wave_index)
+        self.generated_perks = []
+
+    def check_loot_collection(self, mx, my):
+        # Polled every frame with the mouse position; only calls that collect
+        # something are recorded
+        collected = False
+        loot_drops = self.loot_drops
+        kept = 0
+        for loot in loot_drops:
+            dx = mx - loot.x
+            dy = my - loot.y
+            dist = math.sqrt(dx*dx + dy*dy)
+
+            # Collection radius slightly larger than visual
+            if dist < 25:
+                # Collect!
+                effect = loot.data["effect"]
+                value = loot.data["value"]
+
+                if effect == "money":
+                    self.money += value
+                elif effect == "life":
+                    self.lives += value
+                    if self.lives > STARTING_LIVES: self.lives = STARTING_LIVES
+                elif effect == "buff_rate":
+                    self.active_buffs["rate_boost"] = self.clock.now + loot.duration
+
+                loot_pool.release(loot)
+                collected = True
+            else:
+                loot_drops[kept] = loot
+                kept += 1
+        del loot_drops[kept:]
+
+        if collected:
+            self.record("check_loot_collection", mx, my)
+
+    def start_next_wave(self):
+        self.record("start_next_wave")
+        # Prevent starting next wave if one is active
+        if self.wave_in_progress:
+            return
+
+        # Check for Perk Milestone (every 3 waves)
+        if self.wave_index > 0 and self.wave_index % 3 == 0 and not self.level_complete:
+             if self.wave_index not in self.claimed_perks:
+                 self.pending_perk_choice = True
+                 self.generate_perk_choices()
+                 return
+
+        wave_data = []
+        if self.mode == "STORY":
+            if self.wave_index < len(self.waves):
+                wave_data = self.waves[self.wave_index]
+        else:
+            # Usually prebuilt on the worker thread; lazy otherwise
+            wave_data = self.endless_waves.take(self.seed, self.wave_index + 1)
+
+        if wave_data:
+            # wave_data is like [("MALWARE", 5, 1000), ("PHISHING", 2, 500)]
+            self.enemies_to_spawn = SpawnSchedule(wave_data)
+            self.wave_in_progress = True
+            self.wave_index += 1
+
+    def step(self, dt_ms):
+        # Advance the simulation by dt_ms of real time (game speed is applied here)
+        self.advance(dt_ms)
+        self.tick += 1
+        if self.recorder is not None:
+            self.recorder.on_step(self, dt_ms)
+
+    def advance(self, dt_ms):
+        # Fixed timestep: dt_ms of real time is dt_ms * game_speed of game
+        # time, simulated as whole SIM_STEP_MS sub-steps. Every speed runs the
+        # same sequence of steps; the remainder carries over and is what the
+        # renderer interpolates across.
+        self.accumulator += dt_ms * self.game_speed
+        steps = 0
+        while self.accumulator >= SIM_STEP_MS:
+            if steps == MAX_SUBSTEPS:
+                # Too far behind to catch up; drop the backlog
+                self.accumulator %= SIM_STEP_MS
+                break
+            self.accumulator -= SIM_STEP_MS
+            self.substep(SIM_STEP_MS)
+            steps += 1
+
+    def substep(self, game_dt):
+        if self.lives <= 0:
+            self.game_over = True
+            return
+
+        if self.game_won:
+            return
+
+        self.clock.advance(game_dt)
+        now = self.clock.now
+        prof = self.profiler
+
+        # Spawning
+        if self.wave_in_progress and self.enemies_to_spawn:
+            # Everything due this tick spawns, however large game_dt is
+            for enemy_type in self.enemies_to_spawn.due(game_dt):
+                if self.enemy_table is not None:
+                    enemy = self.enemy_table.spawn(enemy_type)
+                else:
+                    # Enemies walk the level's compiled path
+                    enemy = enemy_pool.acquire(enemy_type, self.path)
+                self.enemies.append(enemy)
+                self.enemy_grid.insert(enemy)
+
+        elif self.wave_in_progress and not self.enemies_to_spawn and not self.enemies:
+            self.wave_in_progress = False
+            if self.mode == "STORY":
+                if self.wave_index == len(self.waves):
+                    self.level_complete = True
+            # Endless Mode: Just waits for next wave, no level complete condition
+
+        if prof: prof.lap("spawning")
+
+        # Updates
+
+        # Buff Expiration
+        if "rate_boost" in self.active_buffs:
+            if now > self.active_buffs["rate_boost"]:
+                del self.active_buffs["rate_boost"]
+
+        # Loot Updates. Live entries are compacted to the front in one pass
+        # (the enemy and projectile loops below do the same)
+        loot_drops = self.loot_drops
+        kept = 0
+        for loot in loot_drops:
+            if loot.update(now):
+                loot_drops[kept] = loot
+                kept += 1
+            else:
+                loot_pool.release(loot)
+        del loot_drops[kept:]
+
+        if prof: prof.lap("loot")
+
+        if self.enemy_table is not None:
+            self.update_enemy_table(game_dt, now)
+        else:
+            enemies = self.enemies
+            kept = 0
+            for enemy in enemies:
+                # Apply global slow modifier
+                enemy.move(game_dt, self.modifiers["enemy_slow"])
+                self.enemy_grid.update(enemy)
+                if enemy.finished:
+                    self.lives -= 1
+                elif enemy.health <= 0:
+                    self.on_enemy_killed(enemy, now)
+                else:
+                    enemies[kept] = enemy
+                    kept += 1
+                    continue
+                self.enemy_grid.remove(enemy)
+                release_enemy(enemy)
+            del enemies[kept:]
+
+        if prof: prof.lap("enemies")
+
+        # Towers
+        rate_multiplier = 1.0
+        if "rate_boost" in self.active_buffs:
+             rate_multiplier = 2.0 # 100% faster (half delay)
+
+        self.targets.reset(self.enemies)
+
+        if self.projectile_batch is not None:
+            batch = self.projectile_batch
+            for tower in self.towers:
+                target = tower.acquire_target(self.enemy_grid, game_dt, rate_multiplier, self.targets)
+                if target:
+                    batch.fire(tower, target)
+            if prof: prof.lap("towers")
+            batch.step(game_dt)
+            if prof: prof.lap("projectiles")
+            return
+
+        for tower in self.towers:
+            projectile = tower.update(self.enemy_grid, game_dt, rate_multiplier, self.targets)
+            if projectile:
+                self.projectiles.append(projectile)
+
+        if prof: prof.lap("towers")
+
+        projectiles = self.projectiles
+        kept = 0
+        for p in projectiles:
+            p.move(game_dt)
+            if p.active:
+                projectiles[kept] = p
+                kept += 1
+            else:
+                projectile_pool.release(p)
+        del projectiles[kept:]
+
+        if prof: prof.lap("projectiles")
+
+    def make_target_index(self):
+        # Enemies by path distance, for tower targeting (see src/targeting.py)
+        if self.enemy_table is not None:
+            return TableTargetIndex(self.enemy_table)
+        return TargetIndex(self.path)
+
+    def update_enemy_table(self, game_dt, now):
+        # Vectorized movement pass; only enemies that finished, died or
+        # changed grid cell are touched from Python
+        table = self.enemy_table
+        finished, dead, moved = table.step(game_dt, self.modifiers["enemy_slow"], self.enemy_grid.cell_size)
+        views = table.views
+
+        for i in moved:
+            self.enemy_grid.update(views[i])
+
+        self.lives -= len(finished)
+        for i in dead:
+            self.on_enemy_killed(views[i], now)
+
+        if len(finished) or len(dead):
+            for i in finished.tolist() + dead.tolist():
+                enemy = views[i]
+                if enemy is not None:
+                    self.enemy_grid.remove(enemy)
+                    table.release(enemy)
+            # Released views are detached from the table; compact them out
+            enemies = self.enemies
+            kept = 0
+            for enemy in enemies:
+                if enemy.table is table:
+                    enemies[kept] = enemy
+                    kept += 1
+            del enemies[kept:]
+
+    def on_enemy_killed(self, enemy, now):
+        self.money += int(enemy.reward * self.modifiers["reward"])
+
+        # Loot Drop Chance
+        if self.rng.random() < 0.2: # 20% chance
+            roll = self.rng.random()
+            loot_type = None
+            if roll < LOOT_TYPES["PATCH"]["chance"]: loot_type = "PATCH"
+            elif roll < LOOT_TYPES["PATCH"]["chance"] + LOOT_TYPES["DATA_STREAM"]["chance"]: loot_type = "DATA_STREAM"
+            elif roll < LOOT_TYPES["PATCH"]["chance"] + LOOT_TYPES["DATA_STREAM"]["chance"] + LOOT_TYPES["CRYPTO"]["chance"]: loot_type = "CRYPTO"
+
+            if loot_type:
+                self.loot_drops.append(loot_pool.acquire(enemy.x, enemy.y, loot_type, now))
+
+    def run(self, ticks, dt_ms=FRAME_MS):
+        # Headless driver: step a fixed number of ticks as fast as possible
+        for _ in range(ticks):
+            if self.game_over or self.game_won:
+                break
+            self.step(dt_ms)
+
+    def place_tower(self, tower_type, x, y, targeting="FIRST"):
+        self.record("place_tower", tower_type, x, y, targeting)
+        base_cost = TOWER_TYPES[tower_type]["cost"]
+        cost = int(base_cost * self.modifiers["cost"])
+
+        if self.money >= cost:
+            t = Tower(tower_type, x, y, targeting)
+            # Apply current modifiers
+            t.damage *= self.modifiers["damage"]
+            t.range *= self.modifiers["range"]
+            t.rate *= self.modifiers["rate"]
+
+            self.towers.append(t)
+            self.money -= cost
+            return True
+        return False
+
+    def tower_at(self, x, y):
+        # Find tower at x, y
+        for tower in self.towers:
+            # Simple distance check (assume ~20px radius click area)
+            dist = ((tower.x - x)**2 + (tower.y - y)**2)**0.5
+            if dist < 20:
+                return tower
+        return None
+
+    def sell_tower(self, x, y):
+        self.record("sell_tower", x, y)
+        tower = self.tower_at(x, y)
+        if tower:
+            self.towers.remove(tower)
+            refund = int(TOWER_TYPES[tower.type]["cost"] * 0.5)
+            self.money += refund
+            return True, refund
+        return False, 0
+
+    def set_tower_targeting(self, x, y, mode):
+        self.record("set_tower_targeting", x, y, mode)
+        tower = self.tower_at(x, y)
+        if tower:
+            tower.set_targeting(mode)
+
+    def set_game_speed(self, speed):
+        self.record("set_game_speed", speed)
+        self.game_speed = speed
+
+    def cycle_game_speed(self):
+        # Next of GAME_SPEEDS, worked out from the current speed here rather
+        # than by the caller, so queued presses (see src/sim_thread.py) each
+        # step it once
+        speed = GAME_SPEEDS[0]
+        if self.game_speed in GAME_SPEEDS:
+            speed = GAME_SPEEDS[(GAME_SPEEDS.index(self.game_speed) + 1) % len(GAME_SPEEDS)]
+        self.set_game_speed(speed)
+
+    def buy_patch(self):
+        # [P] Patch System: $500 for 5 lives (capped)
+        self.record("buy_patch")
+        if self.money >= 500:
+            self.money -= 500
+            self.lives += 5
+            if self.lives > STARTING_LIVES: self.lives = STARTING_LIVES
+
+    def record(self, command, *args):
+        # Player commands are logged (by method name) for replays
+        if self.recorder is not None:
+            self.recorder.on_input(self.tick, command, args)
+
+    def save_state(self):
+        # Everything needed to resume the match, as bytes (replay keyframes)
+        return pickle.dumps({k: v for k, v in vars(self).items() if k not in self.TRANSIENT}, pickle.HIGHEST_PROTOCOL)
+
+    def load_state(self, data):
+        vars(self).update(pickle.loads(data))
+        self.targets = self.make_target_index()
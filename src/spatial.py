@@ -0,0 +1,81 @@
+from src.constants import GRID_SIZE
+
+class SpatialHash:
+    # Uniform grid bucketing of enemies, using the same GRID_SIZE cells as the map.
+    # Range queries only visit cells that the query circle actually overlaps.
+    def __init__(self, cell_size=GRID_SIZE):
+        self.cell_size = cell_size
+        self.cells = {} # (cx, cy): {enemy: None} (dict as an ordered set)
+        self.cell_of = {} # enemy: (cx, cy)
+
+    def cell_key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, enemy):
+        key = self.cell_key(enemy.x, enemy.y)
+        self.cells.setdefault(key, {})[enemy] = None
+        self.cell_of[enemy] = key
+
+    def remove(self, enemy):
+        key = self.cell_of.pop(enemy, None)
+        if key is None:
+            return
+        bucket = self.cells[key]
+        del bucket[enemy]
+        if not bucket:
+            del self.cells[key]
+
+    def update(self, enemy):
+        # Re-bucket an enemy after it moved (cheap no-op while it stays in its cell)
+        key = self.cell_key(enemy.x, enemy.y)
+        old_key = self.cell_of.get(enemy)
+        if old_key == key:
+            return
+        if old_key is not None:
+            bucket = self.cells[old_key]
+            del bucket[enemy]
+            if not bucket:
+                del self.cells[old_key]
+        self.cells.setdefault(key, {})[enemy] = None
+        self.cell_of[enemy] = key
+
+    def clear(self):
+        self.cells.clear()
+        self.cell_of.clear()
+
+    def query(self, x, y, radius):
+        # Yield enemies within radius of (x, y), compared on squared distance
+        size = self.cell_size
+        r2 = radius * radius
+        cx0, cy0 = self.cell_key(x - radius, y - radius)
+        cx1, cy1 = self.cell_key(x + radius, y + radius)
+        cells = self.cells
+
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(cells):
+            # Dense grid: walk the cells under the circle's bounding box
+            keys = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1) if (cx, cy) in cells]
+        else:
+            # Sparse grid: fewer occupied cells than cells in the box
+            keys = [k for k in cells if cx0 <= k[0] <= cx1 and cy0 <= k[1] <= cy1]
+
+        for key in keys:
+            # Gap between the point and the nearest edge of this cell
+            left = key[0] * size
+            if x < left: gx = left - x
+            elif x > left + size: gx = x - left - size
+            else: gx = 0
+
+            top = key[1] * size
+            if y < top: gy = top - y
+            elif y > top + size: gy = y - top - size
+            else: gy = 0
+
+            # Skip cells in the bounding box that the circle doesn't touch
+            if gx*gx + gy*gy > r2:
+                continue
+
+            for enemy in cells[key]:
+                dx = enemy.x - x
+                dy = enemy.y - y
+                if dx*dx + dy*dy <= r2:
+                    yield enemy
@@ -0,0 +1,82 @@
+class SpawnSchedule:
+    # Lazy spawn queue for one wave. Groups stay as (type, count, delay) runs
+    # and a cursor walks them, so a wave of thousands of enemies is a handful
+    # of tuples. Each enemy is due `delay` game ms after the one before it;
+    # due times are absolute, so every enemy due within a tick is released
+    # however long the tick is, and nothing drifts at high game speeds.
+    #
+    # groups is a list of runs, or an iterator (an EndlessWave, say) that is
+    # drawn from lazily: one run at a time, when the one before has been
+    # spawned.
+    def __init__(self, groups=()):
+        self.groups = []
+        self.group = 0 # Index of the group being spawned
+        self.spawned = 0 # Enemies already released from that group
+        self.remaining = 0 # Enemies not yet released from pulled groups
+        self.elapsed = 0.0 # Game ms since the wave started
+        self.next_due = 0.0 # Game ms at which the next enemy is due
+        self.source = None # Lazy iterator of runs not pulled yet
+        if iter(groups) is groups:
+            self.source = groups
+            self.start()
+        else:
+            self.extend(groups)
+
+    def pull(self):
+        # Move the next non-empty run from the lazy source into groups
+        if self.source is not None:
+            for enemy_type, count, delay in self.source:
+                if count > 0:
+                    self.groups.append((enemy_type, count, delay))
+                    self.remaining += count
+                    return True
+            self.source = None
+        return False
+
+    def start(self):
+        # Queue the next run when nothing is, timing it from now
+        if not self.remaining and self.pull():
+            self.next_due = max(self.next_due, self.elapsed) + self.groups[self.group][2]
+
+    def extend(self, groups):
+        # Queue more (type, count, delay) runs behind the current ones. A
+        # lazy source is drawn out first, to keep the order.
+        self.materialize()
+        for enemy_type, count, delay in groups:
+            if count <= 0:
+                continue
+            if not self.remaining:
+                self.next_due = max(self.next_due, self.elapsed) + delay
+            self.groups.append((enemy_type, count, delay))
+            self.remaining += count
+
+    def materialize(self):
+        # Pull every run, so groups and remaining describe the whole wave
+        while self.pull():
+            pass
+
+    def __len__(self):
+        # Nonzero while anything is left to spawn (a lower bound on how
+        # many while a lazy source is not drawn out)
+        return self.remaining
+
+    def due(self, game_dt):
+        # Advance the wave clock and return the types of all enemies now due, in order
+        self.elapsed += game_dt
+        if not self.remaining or self.next_due > self.elapsed:
+            return ()
+        released = []
+        groups = self.groups
+        while self.remaining and self.next_due <= self.elapsed:
+            enemy_type, count, delay = groups[self.group]
+            released.append(enemy_type)
+            self.remaining -= 1
+            self.spawned += 1
+            if self.spawned == count:
+                self.group += 1
+                self.spawned = 0
+                if self.group == len(groups):
+                    self.pull()
+            if self.remaining:
+                self.next_due += groups[self.group][2]
+        return released
@@ -0,0 +1,87 @@
+import pygame
+from src.constants import *
+from src import surfaces
+from src.visuals import draw_enemy_visual, draw_tower_visual, draw_loot_visual, draw_slow_indicator, draw_health_bar
+
+SPRITE_PAD = 20 # Room around an enemy for spikes, the phishing tip and the slow indicator
+
+class SpriteAtlas:
+    # Pre-rendered entity visuals. Each (kind, type, size, color[, slowed])
+    # combination is drawn once; drawing an entity is then a single blit.
+    # Sprites are drawn into pooled buffers (src/surfaces.py), which go back
+    # to the pool on the next build(), so reloading a level reuses them.
+    def __init__(self):
+        self.sprites = {} # key: (surface, (anchor_x, anchor_y))
+
+    def canvas(self, size):
+        surface = surfaces.acquire(size)
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def build(self):
+        # Called at level load: render every combination the level can show
+        for surface, anchor in self.sprites.values():
+            surfaces.release(surface)
+        self.sprites.clear()
+        for enemy_type, stats in ENEMY_TYPES.items():
+            for slowed in (False, True):
+                self.enemy(enemy_type, stats["radius"], stats["color"], slowed)
+        for tower_type, stats in TOWER_TYPES.items():
+            self.tower(tower_type, 40, 40, stats["color"])
+        for loot_type in LOOT_TYPES:
+            self.loot(loot_type)
+
+    def enemy(self, enemy_type, radius, color, slowed=False):
+        key = ("enemy", enemy_type, radius, color, slowed)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            c = radius + SPRITE_PAD
+            surface = self.canvas((c * 2, c * 2))
+            draw_enemy_visual(surface, enemy_type, c, c, radius, color)
+            if slowed:
+                draw_slow_indicator(surface, c, c, radius)
+            sprite = self.sprites[key] = (surface, (c, c))
+        return sprite
+
+    def tower(self, tower_type, width, height, color):
+        key = ("tower", tower_type, width, height, color)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            # Glow extends 5px past the body on every side
+            surface = self.canvas((width + 10, height + 10))
+            cx, cy = width//2 + 5, height//2 + 5
+            draw_tower_visual(surface, tower_type, cx, cy, width, height, color)
+            sprite = self.sprites[key] = (surface, (cx, cy))
+        return sprite
+
+    def loot(self, loot_type):
+        key = ("loot", loot_type)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            radius = LOOT_TYPES[loot_type]["radius"]
+            surface = draw_loot_visual(loot_type, self.canvas((radius*4, radius*4)))
+            sprite = self.sprites[key] = (surface, (radius*2, radius*2))
+        return sprite
+
+    def draw_enemy(self, screen, enemy, alpha=1.0):
+        # Returns the screen rect touched (sprite plus health bar). alpha
+        # interpolates between the enemy's last two simulation steps.
+        surface, (ax, ay) = self.enemy(enemy.type, enemy.radius, enemy.color, enemy.slow_timer > 0)
+        x, y = enemy.x, enemy.y
+        if alpha < 1.0:
+            x = enemy.prev_x + (x - enemy.prev_x) * alpha
+            y = enemy.prev_y + (y - enemy.prev_y) * alpha
+        rect = screen.blit(surface, (int(x) - ax, int(y) - ay))
+
+        health_pct = enemy.health / enemy.max_health
+        if health_pct < 1.0:
+            rect = rect.union(draw_health_bar(screen, enemy.type, x, y, enemy.radius, health_pct))
+        return rect
+
+    def draw_tower(self, screen, tower):
+        surface, (ax, ay) = self.tower(tower.type, tower.width, tower.height, tower.color)
+        return screen.blit(surface, (tower.x - ax, tower.y - ay))
+
+    def draw_loot(self, screen, loot):
+        surface, (ax, ay) = self.loot(loot.type)
+        return screen.blit(surface, (loot.x - ax, loot.y - ay + loot.float_offset))
@@ -0,0 +1,53 @@
+import pygame
+from collections import OrderedDict
+from src.constants import *
+
+SURFACE_CACHE_SIZE = 64 # Pre-tinted overlays and range circles kept before recycling
+
+_pool = {} # (size, flags): [Surface, ...] free buffers
+_cache = OrderedDict() # key: Surface built from a pooled buffer
+
+def acquire(size, flags=pygame.SRCALPHA):
+    # Hand out a free buffer of this size, allocating only when none is free.
+    # Contents are whatever the last user left, so clear before drawing.
+    free = _pool.get((tuple(size), flags))
+    if free:
+        return free.pop()
+    surface = pygame.Surface(size, flags)
+    if flags & pygame.SRCALPHA and pygame.display.get_surface() is not None:
+        # Display pixel format, so blits from the buffer take the fast path
+        surface = surface.convert_alpha()
+    return surface
+
+def release(surface):
+    # Give a buffer back once nothing still draws from it
+    flags = surface.get_flags() & pygame.SRCALPHA
+    _pool.setdefault((surface.get_size(), flags), []).append(surface)
+
+def cached(key, size, build):
+    # Surface for key, built once into a pooled buffer. The least recently
+    # used entry goes back to the pool when the cache is full.
+    surface = _cache.get(key)
+    if surface is not None:
+        _cache.move_to_end(key)
+        return surface
+
+    surface = acquire(size)
+    surface.fill((0, 0, 0, 0))
+    build(surface)
+    _cache[key] = surface
+    if len(_cache) > SURFACE_CACHE_SIZE:
+        _, old = _cache.popitem(last=False)
+        release(old)
+    return surface
+
+def overlay(color, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+    # Full-screen tint, e.g. overlay((0, 0, 0, 200)) behind menus and end screens
+    return cached(("overlay", tuple(size), color), size, lambda s: s.fill(color))
+
+def range_circle(radius, color, fill_alpha, edge_alpha):
+    # Translucent range disc with a stronger rim, centred at (radius, radius)
+    def build(s):
+        pygame.draw.circle(s, (*color, fill_alpha), (radius, radius), radius)
+        pygame.draw.circle(s, (*color, edge_alpha), (radius, radius), radius, 1)
+    return cached(("range", radius, color, fill_alpha, edge_alpha), (radius * 2, radius * 2), build)
@@ -0,0 +1,206 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from src.enemy_table import ENEMY_TYPE_IDS, np
+
+DISTANCE = attrgetter("distance")
+
+class TargetIndex:
+    # Live enemies ordered by distance along the path, for tower targeting.
+    # A tower's range covers fixed distance intervals of the path (see
+    # PathIndex.ranges_within), so each mode is a bisect or a slice:
+    #   FIRST/LAST: the last/first enemy inside the intervals.
+    #   CLOSEST: distance to the tower is convex along each segment, so the
+    #     closest enemy is a neighbour of the segment's nearest point.
+    #   STRONGEST/WEAKEST: max/min over the health column, also in path
+    #     order, for the in-range slices.
+    # The order is rebuilt lazily, at most once per simulation step, and
+    # only if some tower actually needs a new target.
+    def __init__(self, path):
+        self.path = path
+        self.enemies = ()
+        self.stale = True
+        self.order = [] # Enemies sorted by distance
+        self.dists = [] # Their distances
+        self.healths = None # Their healths, built on first use
+        self.ranges = {} # (x, y, radius): (pieces, merged spans) in range
+
+    def reset(self, enemies):
+        # Call once per step, after enemies have moved
+        self.enemies = enemies
+        self.stale = True
+
+    def build(self):
+        self.order = sorted(self.enemies, key=DISTANCE)
+        self.dists = [enemy.distance for enemy in self.order]
+        self.healths = None
+        self.stale = False
+
+    def ranges_for(self, x, y, radius):
+        key = (x, y, radius)
+        ranges = self.ranges.get(key)
+        if ranges is None:
+            pieces = self.path.ranges_within(x, y, radius)
+            spans = []
+            for lo, hi, near in pieces:
+                # Pieces of consecutive segments meet at the waypoint
+                if spans and lo <= spans[-1][1]:
+                    spans[-1] = (spans[-1][0], max(spans[-1][1], hi))
+                else:
+                    spans.append((lo, hi))
+            ranges = self.ranges[key] = (pieces, spans)
+        return ranges
+
+    def slices(self, spans):
+        dists = self.dists
+        for lo, hi in spans:
+            i, j = bisect_left(dists, lo), bisect_right(dists, hi)
+            if i < j:
+                yield i, j
+
+    def within(self, x, y, radius):
+        # Enemies in range, in path order
+        if self.stale:
+            self.build()
+        order = self.order
+        found = []
+        for i, j in self.slices(self.ranges_for(x, y, radius)[1]):
+            found.extend(order[i:j])
+        return found
+
+    def apply_slow(self, x, y, radius, slows, duration):
+        # Honeypot aura: slow every enemy in range by slows[enemy type]
+        for enemy in self.within(x, y, radius):
+            enemy.apply_slow(slows[enemy.type], duration)
+
+    def best(self, tower):
+        # Best in-range enemy for tower's targeting mode (None if none)
+        if self.stale:
+            self.build()
+        order, dists = self.order, self.dists
+        pieces, spans = self.ranges_for(tower.x, tower.y, tower.range)
+        mode = tower.targeting
+        if mode == "FIRST":
+            for lo, hi in reversed(spans):
+                j = bisect_right(dists, hi)
+                if j and dists[j - 1] >= lo:
+                    return order[j - 1]
+            return None
+        if mode == "LAST":
+            for lo, hi in spans:
+                i = bisect_left(dists, lo)
+                if i < len(dists) and dists[i] <= hi:
+                    return order[i]
+            return None
+        if mode == "CLOSEST":
+            x, y = tower.x, tower.y
+            best, best_d2 = None, None
+            for lo, hi, near in pieces:
+                k = bisect_left(dists, near)
+                for i in (k - 1, k):
+                    if 0 <= i < len(dists) and lo <= dists[i] <= hi:
+                        enemy = order[i]
+                        d2 = (enemy.x - x)**2 + (enemy.y - y)**2
+                        if best is None or d2 < best_d2:
+                            best, best_d2 = enemy, d2
+            return best
+        if mode in ("STRONGEST", "WEAKEST"):
+            if self.healths is None:
+                self.healths = [enemy.health for enemy in order]
+            healths = self.healths
+            pick = max if mode == "STRONGEST" else min
+            best = None
+            for i, j in self.slices(spans):
+                value = pick(healths[i:j])
+                if best is None or pick(value, best_value) != best_value:
+                    best, best_value = healths.index(value, i, j), value
+            return order[best] if best is not None else None
+        return tower.pick_target(self.within(tower.x, tower.y, tower.range))
+
+class TableTargetIndex(TargetIndex):
+    # TargetIndex over an EnemyTable's columns: the sort, the bisects and the
+    # per-mode picks are NumPy calls, so no enemy row is read from Python.
+    def __init__(self, table):
+        super().__init__(table.path)
+        self.table = table
+        self.order = np.empty(0, dtype=np.intp) # Live rows sorted by distance
+        self.dists = np.empty(0)
+
+    def build(self):
+        table = self.table
+        rows = np.flatnonzero(table.alive[:table.high_water])
+        self.order = rows[np.argsort(table.dist[rows], kind="stable")]
+        self.dists = table.dist[self.order]
+        self.stale = False
+
+    def ranges_for(self, x, y, radius):
+        key = (x, y, radius)
+        ranges = self.ranges.get(key)
+        if ranges is None:
+            pieces, spans = super().ranges_for(x, y, radius)
+            pieces = np.array(pieces, dtype=np.float64).reshape(-1, 3)
+            spans = np.array(spans, dtype=np.float64).reshape(-1, 2)
+            ranges = self.ranges[key] = (pieces, spans)
+        return ranges
+
+    def bounds(self, spans):
+        # [start, end) positions in order of each span
+        return (np.searchsorted(self.dists, spans[:, 0], side="left"),
+                np.searchsorted(self.dists, spans[:, 1], side="right"))
+
+    def rows_within(self, x, y, radius):
+        if self.stale:
+            self.build()
+        starts, ends = self.bounds(self.ranges_for(x, y, radius)[1])
+        if len(starts) == 0:
+            return self.order[:0]
+        if len(starts) == 1:
+            return self.order[starts[0]:ends[0]]
+        return np.concatenate([self.order[i:j] for i, j in zip(starts.tolist(), ends.tolist())])
+
+    def within(self, x, y, radius):
+        views = self.table.views
+        return [views[i] for i in self.rows_within(x, y, radius).tolist()]
+
+    def apply_slow(self, x, y, radius, slows, duration):
+        rows = self.rows_within(x, y, radius)
+        if rows.size:
+            factors = np.array([slows[etype] for etype in ENEMY_TYPE_IDS])
+            table = self.table
+            table.speed[rows] = table.base_speed[rows] * factors[table.type_id[rows]]
+            table.slow_timer[rows] = duration
+
+    def best(self, tower):
+        if self.stale:
+            self.build()
+        table = self.table
+        pieces, spans = self.ranges_for(tower.x, tower.y, tower.range)
+        mode = tower.targeting
+        if mode == "CLOSEST":
+            if not len(pieces):
+                return None
+            k = np.searchsorted(self.dists, pieces[:, 2])
+            at = np.concatenate((k - 1, k))
+            lo, hi = np.tile(pieces[:, 0], 2), np.tile(pieces[:, 1], 2)
+            ok = (at >= 0) & (at < len(self.dists))
+            at, lo, hi = at[ok], lo[ok], hi[ok]
+            inside = (self.dists[at] >= lo) & (self.dists[at] <= hi)
+            rows = self.order[at[inside]]
+            if not rows.size:
+                return None
+            d2 = (table.x[rows] - tower.x)**2 + (table.y[rows] - tower.y)**2
+            return table.views[rows[np.argmin(d2)]]
+
+        starts, ends = self.bounds(spans)
+        hit = np.flatnonzero(ends > starts)
+        if not hit.size:
+            return None
+        if mode == "FIRST":
+            return table.views[self.order[ends[hit[-1]] - 1]]
+        if mode == "LAST":
+            return table.views[self.order[starts[hit[0]]]]
+        rows = self.rows_within(tower.x, tower.y, tower.range)
+        if mode == "STRONGEST":
+            return table.views[rows[np.argmax(table.health[rows])]]
+        if mode == "WEAKEST":
+            return table.views[rows[np.argmin(table.health[rows])]]
+        return tower.pick_target(self.within(tower.x, tower.y, tower.range))
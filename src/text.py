@@ -0,0 +1,30 @@
+import pygame
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 512 # Rendered strings kept before the least recently used is evicted
+
+_fonts = {} # (name, size, bold): Font
+_text_cache = OrderedDict() # (font, text, color): Surface
+
+def get_font(name, size, bold=False):
+    # SysFont scans the system font list, so only ever do that once per font
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+def render_text(font, text, color):
+    # Antialiased render, cached by (font, text, color). Callers must treat the
+    # returned surface as read-only since it is shared.
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    surface = font.render(text, True, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
@@ -1,91 +1,57 @@
-import pygame
 import math
 from src.constants import *
-
-def draw_tower_visual(screen, tower_type, x, y, width, height, color):
-    rect = pygame.Rect(x - width//2, y - height//2, width, height)
-    
-    # Base Glow
-    s = pygame.Surface((width + 10, height + 10), pygame.SRCALPHA)
-    pygame.draw.rect(s, (*color, 50), s.get_rect(), border_radius=5)
-    screen.blit(s, (x - width//2 - 5, y - height//2 - 5))
-
-    # Main Body
-    pygame.draw.rect(screen, (20, 20, 30), rect, border_radius=5)
-    pygame.draw.rect(screen, color, rect, 2, border_radius=5)
-    
-    # Specific Designs
-    if tower_type == "FIREWALL":
-        # Brick pattern or shield
-        pygame.draw.line(screen, color, (x - 10, y - 10), (x + 10, y - 10), 2)
-        pygame.draw.line(screen, color, (x - 10, y), (x + 10, y), 2)
-        pygame.draw.line(screen, color, (x - 10, y + 10), (x + 10, y + 10), 2)
-        pygame.draw.line(screen, color, (x, y - 15), (x, y + 15), 2)
-        
-    elif tower_type == "ANTIVIRUS":
-        # Cross
-        pygame.draw.rect(screen, color, (x - 5, y - 12, 10, 24))
-        pygame.draw.rect(screen, color, (x - 12, y - 5, 24, 10))
-        
-    elif tower_type == "IDS":
-        # Eye / Radar
-        pygame.draw.circle(screen, color, (x, y), 12, 2)
-        pygame.draw.circle(screen, color, (x, y), 4)
-
-    elif tower_type == "HONEYPOT":
-         # Trap / Hexagon
-         points = [
-             (x, y - 15),
-             (x + 13, y - 7),
-             (x + 13, y + 7),
-             (x, y + 15),
-             (x - 13, y + 7),
-             (x - 13, y - 7)
-         ]
-         pygame.draw.polygon(screen, color, points, 2)
-         pygame.draw.circle(screen, color, (x, y), 5)
+from src.pool import Pool
 
 class Projectile:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "target", "target_gen", "damage", "color", "tower_type", "speed", "active")
+
     def __init__(self, x, y, target, damage, color, tower_type):
+        self.reset(x, y, target, damage, color, tower_type)
+
+    def reset(self, x, y, target, damage, color, tower_type):
         self.x = x
         self.y = y
+        self.prev_x = x # Position before the last step, for interpolation
+        self.prev_y = y
         self.target = target
+        self.target_gen = target.gen # Pooled enemies are reused; see move()
         self.damage = damage
         self.color = color
         self.tower_type = tower_type
         self.speed = 12
         self.active = True
-        
-    def move(self, speed_mult=1.0):
-        if self.target.health <= 0:
+
+    def move(self, dt_ms):
+        if self.target.health <= 0 or self.target.gen != self.target_gen:
+            # Target died, or left the field and was recycled into a new enemy
             self.active = False
             return
 
-        effective_speed = self.speed * speed_mult
+        # Speed is pixels per reference frame, dt_ms is game time
+        self.prev_x = self.x
+        self.prev_y = self.y
+        effective_speed = self.speed * (dt_ms / FRAME_MS)
         dx = self.target.x - self.x
         dy = self.target.y - self.y
         distance = math.sqrt(dx**2 + dy**2)
-        
+
         if distance < effective_speed:
             # Calculate Damage Multiplier
             multiplier = 1.0
             if self.tower_type in DAMAGE_MULTIPLIERS:
                 multiplier = DAMAGE_MULTIPLIERS[self.tower_type].get(self.target.type, 1.0)
-                
+
             final_damage = self.damage * multiplier
             self.target.take_damage(final_damage)
             self.active = False
         else:
             self.x += (dx / distance) * effective_speed
             self.y += (dy / distance) * effective_speed
-            
-    def draw(self, screen):
-        # Glowing effect
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), 4)
-        pygame.draw.circle(screen, (255, 255, 255), (int(self.x), int(self.y)), 2)
+
+projectile_pool = Pool(Projectile)
 
 class Tower:
-    def __init__(self, tower_type, x, y):
+    def __init__(self, tower_type, x, y, targeting="FIRST"):
         self.type = tower_type
         stats = TOWER_TYPES[tower_type]
         self.name = stats["name"]
@@ -94,81 +60,94 @@ class Tower:
         self.rate = stats["rate"]
         self.color = stats["color"]
         self.slow_factor = stats.get("slow_factor", 1.0)
-        
+
         self.x = x
         self.y = y
         self.reload_timer = 0
         self.width = 40
         self.height = 40
-        
-    def draw(self, screen):
-        draw_tower_visual(screen, self.type, self.x, self.y, self.width, self.height, self.color)
 
-    def draw_range(self, screen):
-         range_surface = pygame.Surface((self.range * 2, self.range * 2), pygame.SRCALPHA)
-         pygame.draw.circle(range_surface, (*self.color, 30), (self.range, self.range), self.range)
-         pygame.draw.circle(range_surface, (*self.color, 100), (self.range, self.range), self.range, 1)
-         screen.blit(range_surface, (self.x - self.range, self.y - self.range))
+        # Targeting priority (one of TARGETING_MODES) and the sticky target
+        self.targeting = targeting
+        self.target = None
+        self.target_gen = None
+
+    def update(self, enemy_grid, dt, rate_multiplier=1.0, targets=None):
+        # enemy_grid is the simulation's SpatialHash of live enemies
+        # dt is game time in ms since the last simulation step
+        # targets is an optional TargetIndex (see src/targeting.py) to pick from
+        target = self.acquire_target(enemy_grid, dt, rate_multiplier, targets)
+        if target:
+            return projectile_pool.acquire(self.x, self.y, target, self.damage, self.color, self.type)
+        return None
 
-    def update(self, enemies, dt, rate_multiplier=1.0):
+    def acquire_target(self, enemy_grid, dt, rate_multiplier=1.0, targets=None):
+        # Runs reload/aura logic and returns the enemy to shoot this tick (or None)
         if self.type == "HONEYPOT":
             # Passive effect: Slow enemies in range
-            for enemy in enemies:
-                dist = math.sqrt((self.x - enemy.x)**2 + (self.y - enemy.y)**2)
-                if dist <= self.range:
-                    # Calculate Multiplier
-                    multiplier = 1.0
-                    if self.type in DAMAGE_MULTIPLIERS:
-                         multiplier = DAMAGE_MULTIPLIERS[self.type].get(enemy.type, 1.0)
-                    
-                    effective_slow = self.slow_factor / multiplier
-                    if effective_slow > 1.0: effective_slow = 1.0
-
-                    enemy.apply_slow(effective_slow, 100) # Apply slow for 100ms (refreshes every frame)
+            # Effective slow per enemy type, after its damage multiplier
+            multipliers = DAMAGE_MULTIPLIERS.get(self.type, {})
+            slows = {etype: min(1.0, self.slow_factor / multipliers.get(etype, 1.0)) for etype in ENEMY_TYPES}
+            # Apply slow for 100ms (refreshes every frame)
+            if targets is not None:
+                targets.apply_slow(self.x, self.y, self.range, slows, 100)
+            else:
+                for enemy in enemy_grid.query(self.x, self.y, self.range):
+                    enemy.apply_slow(slows[enemy.type], 100)
             return None
 
         if self.reload_timer > 0:
-            self.reload_timer -= dt # dt is actually time elapsed since last frame OR time.time() delta?
-            # Wait, in game.py we are passing time.time()! 
-            # That is WRONG. 'dt' should be delta time.
-            # But the original code passed time.time() ??
-            # Let's check game.py again.
-            # "tower.update(self.enemies, time.time())" -> This was passing absolute time as dt?
-            # If reload_timer is decreased by absolute time, it would be negative instantly.
-            # Unless reload_timer was set to future timestamp?
-            # self.reload_timer = self.rate (which is like 500ms?)
-            # If self.rate is in milliseconds (e.g. 500), and dt is absolute time (huge number), 
-            # then reload_timer -= huge_number -> instantly ready.
-            # This implies the original code might have been broken or I misunderstood 'rate'.
-            # rate in constants.py is "rate": 500.
-            # If update was called with time.time(), reload_timer would break.
-            # BUT, let's look at previous game.py
-            # "tower.update(self.enemies, time.time())"
-            # And tower.py: "self.reload_timer -= dt"
-            # This confirms the original code was likely broken or rate logic was different.
-            # Wait, maybe 'rate' is a timestamp of NEXT shot?
-            # "self.reload_timer = self.rate"
-            # If self.rate is 500 (ms), reload_timer is 500.
-            # dt is time.time() (seconds, e.g. 1700000000).
-            # 500 - 1700000000 is negative. Always fires.
-            # So towers were firing every frame?
-            
-            # Correction: I should fix this to use proper delta time.
-            # In game.py, I will calculate dt.
-            
-            # For now, let's update signature.
+            self.reload_timer -= dt
             return None
-            
-        target = self.find_target(enemies)
+
+        target = self.find_target(enemy_grid, targets)
         if target:
             # Scale reload rate by multiplier (rate is delay in ms, so lower is faster)
             self.reload_timer = self.rate * (1.0 / rate_multiplier)
-            return Projectile(self.x, self.y, target, self.damage, self.color, self.type)
-        return None
-        
-    def find_target(self, enemies):
-        for enemy in enemies:
-            dist = math.sqrt((self.x - enemy.x)**2 + (self.y - enemy.y)**2)
-            if dist <= self.range:
-                return enemy
-        return None
+        return target
+
+    def find_target(self, enemy_grid, targets=None):
+        # Sticky: keep shooting the current target while it's alive and in range
+        target = self.target
+        if target is not None and self.is_valid_target(target, enemy_grid):
+            return target
+
+        if targets is not None:
+            # Progress-ordered index: a bisect for FIRST/LAST
+            target = targets.best(self)
+        else:
+            # Only enemies in grid cells overlapping our range are checked
+            target = self.pick_target(enemy_grid.query(self.x, self.y, self.range))
+        self.target = target
+        self.target_gen = getattr(target, "gen", None)
+        return target
+
+    def is_valid_target(self, enemy, enemy_grid):
+        # Still on the field (pooled enemies are reused, so check the generation too)
+        if enemy not in enemy_grid.cell_of or getattr(enemy, "gen", None) != self.target_gen:
+            return False
+        if enemy.health <= 0:
+            return False
+        dx = enemy.x - self.x
+        dy = enemy.y - self.y
+        return dx*dx + dy*dy <= self.range * self.range
+
+    def pick_target(self, candidates):
+        # Best in-range enemy for this tower's targeting mode (None if none)
+        mode = self.targeting
+        if mode == "FIRST":
+            return max(candidates, key=lambda e: e.distance, default=None)
+        elif mode == "LAST":
+            return min(candidates, key=lambda e: e.distance, default=None)
+        elif mode == "STRONGEST":
+            return max(candidates, key=lambda e: e.health, default=None)
+        elif mode == "WEAKEST":
+            return min(candidates, key=lambda e: e.health, default=None)
+        elif mode == "CLOSEST":
+            x, y = self.x, self.y
+            return min(candidates, key=lambda e: (e.x - x)**2 + (e.y - y)**2, default=None)
+        return next(iter(candidates), None)
+
+    def set_targeting(self, mode):
+        self.targeting = mode
+        self.target = None # Re-pick under the new priority
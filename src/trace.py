@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from array import array
+
+from src.simulation import Simulation
+from src.tower import Tower
+from src.projectile_batch import ProjectileBatch
+from src.enemy_table import EnemyTable
+
+TRACE_CAPACITY = 1 << 19 # Spans kept; once full the oldest are overwritten
+
+# Methods timed while tracing: tower scans, projectile batches, spawns and
+# the player actions worth lining hitches up against
+TRACED = [
+    (Tower, "find_target"),
+    (ProjectileBatch, "step"),
+    (EnemyTable, "spawn"),
+    (Simulation, "start_next_wave"),
+    (Simulation, "apply_perk"),
+    (Simulation, "load_level"),
+]
+
+class TraceBuffer:
+    # Span recorder that writes Chrome trace-event JSON (chrome://tracing,
+    # ui.perfetto.dev). Spans go into a ring of preallocated arrays, so
+    # recording one is a few stores and never allocates; the JSON is only
+    # built by flush(). Spans can come from several threads (--threaded runs
+    # the simulation on its own): each is tagged with its thread, which gets
+    # its own track, and a lock keeps writers from sharing a slot.
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.names = [None] * capacity
+        self.cats = [None] * capacity
+        self.starts = array("d", bytes(8 * capacity)) # perf_counter seconds
+        self.durations = array("d", bytes(8 * capacity))
+        self.threads = array("Q", bytes(8 * capacity)) # threading.get_ident() of the writer
+        self.head = 0 # Next slot to write
+        self.count = 0
+        self.lock = threading.Lock()
+        self.thread_names = {} # ident: name, kept after the thread exits
+        self.origin = time.perf_counter()
+        self.wrapped = [] # (owner, name, original) installed by wrap()
+
+    def span(self, name, start, end, cat="loop"):
+        ident = threading.get_ident()
+        if ident not in self.thread_names:
+            self.thread_names[ident] = threading.current_thread().name
+        with self.lock:
+            i = self.head
+            self.names[i] = name
+            self.cats[i] = cat
+            self.starts[i] = start
+            self.durations[i] = end - start
+            self.threads[i] = ident
+            self.head = i + 1 if i + 1 < self.capacity else 0
+            if self.count < self.capacity:
+                self.count += 1
+
+    def wrap(self, owner, name, label=None, cat="call"):
+        # Replace owner.name with a timed version until unwrap()
+        original = getattr(owner, name)
+        label = label or f"{getattr(owner, '__name__', type(owner).__name__)}.{name}"
+        span = self.span
+        clock = time.perf_counter
+
+        def traced(*args, **kwargs):
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                span(label, start, clock(), cat)
+        setattr(owner, name, traced)
+        self.wrapped.append((owner, name, original))
+
+    def wrap_all(self, targets=TRACED):
+        for owner, name in targets:
+            self.wrap(owner, name)
+
+    def unwrap(self):
+        for owner, name, original in reversed(self.wrapped):
+            setattr(owner, name, original)
+        self.wrapped = []
+
+    def spans(self):
+        # (name, cat, start, duration, thread) oldest first, copied under the
+        # lock so other threads can keep recording meanwhile
+        with self.lock:
+            first = (self.head - self.count) % self.capacity
+            slots = [(first + k) % self.capacity for k in range(self.count)]
+            return [(self.names[i], self.cats[i], self.starts[i], self.durations[i], self.threads[i]) for i in slots]
+
+    def events(self, spans=None):
+        # Timestamps in microseconds since the buffer was made. Threads get
+        # small track ids in order of their first span; the main thread is 1.
+        spans = self.spans() if spans is None else spans
+        tids = {threading.main_thread().ident: 1}
+        origin = self.origin
+        pid = os.getpid()
+        for name, cat, start, duration, ident in spans:
+            tid = tids.setdefault(ident, len(tids) + 1)
+            yield {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round((start - origin) * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+            }
+
+    def flush(self, path):
+        # Write everything still in the ring. The ring is kept, so later
+        # flushes to the same path hold the most recent window.
+        spans = self.spans()
+        events = list(self.events(spans))
+        names = dict(self.thread_names)
+        names[threading.main_thread().ident] = "game loop"
+        meta = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "CodeBreak"}}]
+        tracks = {}
+        for (name, cat, start, duration, ident), event in zip(spans, events):
+            tracks.setdefault(event["tid"], ident)
+        for tid, ident in sorted(tracks.items()):
+            meta.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                         "args": {"name": names.get(ident, f"thread {tid}")}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
@@ -0,0 +1,188 @@
+import pygame
+import math
+from src.constants import *
+from src.text import get_font, render_text
+from src import surfaces
+
+def draw_enemy_visual(screen, enemy_type, x, y, radius, color, health_pct=1.0):
+    # Draw distinct shapes for new types
+    if enemy_type == "MALWARE":
+        pygame.draw.circle(screen, color, (int(x), int(y)), radius)
+        for i in range(0, 360, 45):
+            rad = math.radians(i)
+            sx = x + math.cos(rad) * (radius + 5)
+            sy = y + math.sin(rad) * (radius + 5)
+            pygame.draw.circle(screen, color, (int(sx), int(sy)), 3)
+
+    elif enemy_type == "PHISHING":
+        points = [
+            (x, y - radius - 5),
+            (x - radius - 2, y + radius),
+            (x + radius + 2, y + radius)
+        ]
+        pygame.draw.polygon(screen, color, points)
+
+    elif enemy_type == "DDOS":
+        pygame.draw.circle(screen, color, (int(x), int(y)), radius)
+        pygame.draw.circle(screen, (50, 0, 0), (int(x), int(y)), radius - 5)
+        pygame.draw.circle(screen, color, (int(x), int(y)), radius - 10)
+
+    elif enemy_type == "RANSOMWARE":
+        # Square / Lock shape
+        rect = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
+        pygame.draw.rect(screen, color, rect)
+        pygame.draw.rect(screen, BLACK, (x - 5, y - 5, 10, 10)) # Keyhole
+
+    elif enemy_type == "SOCIAL_ENG":
+        # Question mark / Deceptive shape
+        pygame.draw.circle(screen, color, (int(x), int(y)), radius)
+        text = render_text(get_font("Arial", 20, bold=True), "?", BLACK)
+        screen.blit(text, (x - 5, y - 12))
+
+    elif enemy_type == "ZEUS":
+        # Boss visual - Large Red Skull-like shape
+        pygame.draw.circle(screen, color, (int(x), int(y)), radius)
+        # Eyes
+        pygame.draw.circle(screen, BLACK, (int(x) - 15, int(y) - 10), 8)
+        pygame.draw.circle(screen, BLACK, (int(x) + 15, int(y) - 10), 8)
+        # Glowing pupils
+        pygame.draw.circle(screen, NEON_YELLOW, (int(x) - 15, int(y) - 10), 3)
+        pygame.draw.circle(screen, NEON_YELLOW, (int(x) + 15, int(y) - 10), 3)
+        # Mouth / Grin
+        pygame.draw.arc(screen, BLACK, (int(x) - 20, int(y) - 20, 40, 50), 3.14, 0, 3)
+
+    elif enemy_type == "SQL_INJECTION":
+            # Orange Diamond / Injection Needle
+            points = [
+                (x, y - radius),
+                (x + radius//2, y),
+                (x, y + radius),
+                (x - radius//2, y)
+            ]
+            pygame.draw.polygon(screen, color, points)
+            pygame.draw.line(screen, WHITE, (x, y - radius), (x, y + radius), 2)
+
+    elif enemy_type == "APT":
+            # Mega Boss - Dark Purple Hexagon with core
+            points = []
+            for i in range(6):
+                angle_deg = 60 * i
+                rad = math.radians(angle_deg)
+                px = x + math.cos(rad) * radius
+                py = y + math.sin(rad) * radius
+                points.append((px, py))
+            pygame.draw.polygon(screen, color, points)
+            pygame.draw.circle(screen, (50, 0, 50), (int(x), int(y)), radius - 10)
+            pygame.draw.circle(screen, NEON_PURPLE, (int(x), int(y)), 10) # Core
+
+    # Health Bar (Optional, only if health_pct < 1 or strictly requested, but for codex we might skip it or show full)
+    if health_pct < 1.0:
+        draw_health_bar(screen, enemy_type, x, y, radius, health_pct)
+
+def draw_health_bar(screen, enemy_type, x, y, radius, health_pct):
+    health_width = 30
+    if enemy_type == "ZEUS": health_width = 60 # Bigger bar for boss
+    elif enemy_type == "APT": health_width = 80
+
+    health_height = 4
+    health_x = x - health_width / 2
+    health_y = y - radius - 12
+
+    rect = pygame.draw.rect(screen, (50, 0, 0), (health_x, health_y, health_width, health_height))
+    current_health_width = health_pct * health_width
+    pygame.draw.rect(screen, NEON_GREEN, (health_x, health_y, current_health_width, health_height))
+    return rect
+
+def draw_slow_indicator(screen, x, y, radius):
+    pygame.draw.circle(screen, NEON_PINK, (int(x), int(y - radius - 15)), 3)
+
+def draw_tower_visual(screen, tower_type, x, y, width, height, color):
+    rect = pygame.Rect(x - width//2, y - height//2, width, height)
+
+    # Base Glow. Into a sprite canvas (per-pixel alpha, cleared) the glow is
+    # copied as-is with BLEND_RGBA_MAX rather than alpha-blended, which
+    # would darken it, so the baked sprite looks like the direct draw.
+    s = surfaces.acquire((width + 10, height + 10))
+    s.fill((0, 0, 0, 0))
+    pygame.draw.rect(s, (*color, 50), s.get_rect(), border_radius=5)
+    flags = pygame.BLEND_RGBA_MAX if screen.get_flags() & pygame.SRCALPHA else 0
+    screen.blit(s, (x - width//2 - 5, y - height//2 - 5), special_flags=flags)
+    surfaces.release(s)
+
+    # Main Body
+    pygame.draw.rect(screen, (20, 20, 30), rect, border_radius=5)
+    pygame.draw.rect(screen, color, rect, 2, border_radius=5)
+
+    # Specific Designs
+    if tower_type == "FIREWALL":
+        # Brick pattern or shield
+        pygame.draw.line(screen, color, (x - 10, y - 10), (x + 10, y - 10), 2)
+        pygame.draw.line(screen, color, (x - 10, y), (x + 10, y), 2)
+        pygame.draw.line(screen, color, (x - 10, y + 10), (x + 10, y + 10), 2)
+        pygame.draw.line(screen, color, (x, y - 15), (x, y + 15), 2)
+
+    elif tower_type == "ANTIVIRUS":
+        # Cross
+        pygame.draw.rect(screen, color, (x - 5, y - 12, 10, 24))
+        pygame.draw.rect(screen, color, (x - 12, y - 5, 24, 10))
+
+    elif tower_type == "IDS":
+        # Eye / Radar
+        pygame.draw.circle(screen, color, (x, y), 12, 2)
+        pygame.draw.circle(screen, color, (x, y), 4)
+
+    elif tower_type == "HONEYPOT":
+         # Trap / Hexagon
+         points = [
+             (x, y - 15),
+             (x + 13, y - 7),
+             (x + 13, y + 7),
+             (x, y + 15),
+             (x - 13, y + 7),
+             (x - 13, y - 7)
+         ]
+         pygame.draw.polygon(screen, color, points, 2)
+         pygame.draw.circle(screen, color, (x, y), 5)
+
+def draw_projectile(screen, p, alpha=1.0):
+    # alpha interpolates between the shot's last two simulation steps
+    x = int(p.prev_x + (p.x - p.prev_x) * alpha)
+    y = int(p.prev_y + (p.y - p.prev_y) * alpha)
+    # Glowing effect
+    rect = pygame.draw.circle(screen, p.color, (x, y), 4)
+    pygame.draw.circle(screen, (255, 255, 255), (x, y), 2)
+    return rect
+
+def draw_projectile_batch(screen, batch, alpha=1.0):
+    rects = []
+    for x, y, color in batch.draw_items(alpha):
+        rects.append(pygame.draw.circle(screen, color, (int(x), int(y)), 4))
+        pygame.draw.circle(screen, (255, 255, 255), (int(x), int(y)), 2)
+    return rects
+
+def draw_loot_visual(loot_type, s=None):
+    # Glowing orb on its own (radius*4)^2 alpha surface, orb centred.
+    # Draws into s when given (a cleared buffer of that size).
+    data = LOOT_TYPES[loot_type]
+    color = data["color"]
+    radius = data["radius"]
+
+    if s is None:
+        s = pygame.Surface((radius*4, radius*4), pygame.SRCALPHA)
+
+    # Outer glow
+    pygame.draw.circle(s, (*color, 100), (radius*2, radius*2), radius + 2)
+    # Inner core
+    pygame.draw.circle(s, (*color, 255), (radius*2, radius*2), radius)
+
+    # Symbol
+    if loot_type == "CRYPTO":
+         # $ sign
+         txt = render_text(get_font("Arial", 12, bold=True), "$", BLACK)
+         s.blit(txt, (radius*2 - 3, radius*2 - 7))
+    elif loot_type == "PATCH":
+         # + sign
+         pygame.draw.line(s, BLACK, (radius*2 - 4, radius*2), (radius*2 + 4, radius*2), 2)
+         pygame.draw.line(s, BLACK, (radius*2, radius*2 - 4), (radius*2, radius*2 + 4), 2)
+
+    return s
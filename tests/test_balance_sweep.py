@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+from src.constants import DAMAGE_MULTIPLIERS, ENEMY_TYPES, TOWER_TYPES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from balance_sweep import DEFAULTS, apply_overrides, check_param, main
+
+@pytest.fixture(autouse=True)
+def shipped_tables():
+    yield
+    apply_overrides([])
+
+def test_overrides_apply_and_reset():
+    health = ENEMY_TYPES["MALWARE"]["health"]
+    apply_overrides([("ENEMY_TYPES.MALWARE.health", health * 3), ("DAMAGE_MULTIPLIERS.IDS.DDOS", 1.7)])
+    assert ENEMY_TYPES["MALWARE"]["health"] == health * 3
+    assert DAMAGE_MULTIPLIERS["IDS"]["DDOS"] == 1.7
+    apply_overrides([("TOWER_TYPES.FIREWALL.damage", 99)])
+    assert ENEMY_TYPES["MALWARE"]["health"] == health
+    assert "DDOS" not in DAMAGE_MULTIPLIERS["IDS"]
+    assert TOWER_TYPES["FIREWALL"]["damage"] == 99
+    apply_overrides([])
+    assert {"TOWER_TYPES": TOWER_TYPES, "ENEMY_TYPES": ENEMY_TYPES, "DAMAGE_MULTIPLIERS": DAMAGE_MULTIPLIERS} == DEFAULTS
+
+@pytest.mark.parametrize("name", ["TOWER_TYPES.FIREWALL.damage", "ENEMY_TYPES.ZEUS.speed", "DAMAGE_MULTIPLIERS.IDS.DDOS"])
+def test_known_params_are_accepted(name):
+    assert check_param(name) is None
+
+@pytest.mark.parametrize("name", ["TOWER_TYPE.FIREWALL.damage", "TOWER_TYPES.FIREWAL.damage", "TOWER_TYPES.FIREWALL.dmg",
+                                  "ENEMY_TYPES.MALWARE.heath", "DAMAGE_MULTIPLIERS.IDS.DDoS", "DAMAGE_MULTIPLIERS.PHISHING.IDS",
+                                  "ENEMY_TYPES.MALWARE"])
+def test_misspelt_params_are_rejected(name, capsys):
+    assert check_param(name)
+    with pytest.raises(SystemExit) as exit:
+        main(["--grid", f"{name}=1,2", "--seeds", "1", "--workers", "1"])
+    assert exit.value.code == 2
+    assert "error" in capsys.readouterr().err
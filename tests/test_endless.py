@@ -0,0 +1,25 @@
+from src.constants import ENEMY_TYPES
+from src.endless import EndlessWave, WaveQueue, build_wave
+
+def test_waves_are_deterministic_per_seed_and_wave():
+    assert build_wave(3, 42) == build_wave(3, 42) == list(EndlessWave(3, 42))
+    assert build_wave(3, 42) != build_wave(4, 42)
+
+def test_prebuilt_and_lazy_waves_match():
+    queue = WaveQueue()
+    queue.take(5, 1)
+    for future in queue.pending.values():
+        future.result()
+    assert queue.take(5, 2) == build_wave(5, 2)
+    assert list(WaveQueue(lookahead=0).take(5, 3)) == build_wave(5, 3)
+
+def test_cost_table_follows_enemy_stat_changes(monkeypatch):
+    # Like a tools/balance_sweep.py override: MALWARE becomes the dearest type
+    before = EndlessWave(1, 30)
+    monkeypatch.setitem(ENEMY_TYPES, "MALWARE", dict(ENEMY_TYPES["MALWARE"], health=10**5))
+    after = EndlessWave(1, 30)
+    assert before.types[-1] != "MALWARE"
+    assert after.types[-1] == "MALWARE" and after.costs[-1] >= 10**5 * 0.5
+    # Now dearer than the whole budget, so it is never picked
+    assert "MALWARE" not in {enemy_type for enemy_type, count, delay in after}
+    assert "MALWARE" in {enemy_type for enemy_type, count, delay in before}
@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.constants import LEVELS, TOWER_TYPES
+from src.placement import PATH_CLEARANCE, build_spots, layout_cost, optimize, path_samples
+
+def test_spots_keep_off_the_path_best_coverage_first():
+    waypoints = LEVELS[2]["waypoints"]
+    tower_range = TOWER_TYPES["FIREWALL"]["range"]
+    samples = path_samples(waypoints)
+    spots = build_spots(waypoints, tower_range)
+    assert spots
+    coverage = []
+    for x, y in spots:
+        assert min((sx - x)**2 + (sy - y)**2 for sx, sy in samples) >= PATH_CLEARANCE**2
+        coverage.append(sum(1 for sx, sy in samples if (sx - x)**2 + (sy - y)**2 <= tower_range**2))
+    assert coverage == sorted(coverage, reverse=True)
+
+def test_search_stays_in_budget_and_ranks_best_first():
+    budget = min(stats["cost"] for stats in TOWER_TYPES.values())
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results = optimize(0, budget=budget, beam=2, spots=2, pool=pool, modifiers={"cost": 0.5})
+    assert results
+    keys = [(r["lives_lost"], -r["money_left"], len(r["layout"])) for r in results]
+    assert keys == sorted(keys)
+    for result in results:
+        assert layout_cost(result["layout"], 0.5) <= budget
+    # At full price the budget buys one tower; the cost perk halves prices
+    assert max(len(r["layout"]) for r in results) == 2
@@ -0,0 +1,52 @@
+from src.enemy import enemy_pool, release_enemy
+from src.simulation import Simulation
+from src.tower import Tower, projectile_pool
+
+def test_released_enemy_is_reused_with_a_new_generation():
+    sim = Simulation(seed=1)
+    enemy = enemy_pool.acquire("MALWARE", sim.path)
+    gen = enemy.gen
+    release_enemy(enemy)
+    again = enemy_pool.acquire("DDOS", sim.path)
+    assert again is enemy and again.gen == gen + 1
+    assert again.type == "DDOS" and again.distance == 0 and not again.finished
+
+def test_shot_at_a_recycled_enemy_fizzles():
+    sim = Simulation(seed=1)
+    enemy = enemy_pool.acquire("MALWARE", sim.path)
+    shot = projectile_pool.acquire(enemy.x + 100, enemy.y, enemy, 50, (255, 0, 0), "FIREWALL")
+    release_enemy(enemy)
+    reused = enemy_pool.acquire("MALWARE", sim.path)
+    assert reused is enemy
+    health = reused.health
+    for _ in range(20):
+        shot.move(16)
+    assert not shot.active and reused.health == health
+
+def test_tower_drops_a_recycled_sticky_target():
+    sim = Simulation(seed=1)
+    x, y = sim.waypoints[0]
+    tower = Tower("FIREWALL", x, y)
+    enemy = enemy_pool.acquire("MALWARE", sim.path)
+    sim.enemy_grid.insert(enemy)
+    assert tower.find_target(sim.enemy_grid) is enemy
+    sim.enemy_grid.remove(enemy)
+    release_enemy(enemy)
+    reused = enemy_pool.acquire("MALWARE", sim.path)
+    sim.enemy_grid.insert(reused)
+    # Same object in the same place, but a new enemy: not the old target
+    assert not tower.is_valid_target(reused, sim.enemy_grid)
+
+def test_table_shot_at_a_reused_row_fizzles():
+    sim = Simulation(enemy_table=True, seed=1)
+    table, batch = sim.enemy_table, sim.projectile_batch
+    enemy = table.spawn("MALWARE")
+    tower = Tower("FIREWALL", enemy.x + 100, enemy.y)
+    batch.fire(tower, enemy)
+    table.release(enemy)
+    reused = table.spawn("MALWARE")
+    assert reused.index == enemy.index
+    health = reused.health
+    for _ in range(20):
+        batch.step(16)
+    assert len(batch) == 0 and reused.health == health
@@ -0,0 +1,35 @@
+from src.replay import Recorder
+from src.savegame import capture
+from src.simulation import Simulation
+
+def record_match(ticks, keyframe_interval):
+    sim = Simulation(seed=11)
+    recorder = Recorder(sim, keyframe_interval)
+    x, y = sim.waypoints[1]
+    for tick in range(ticks):
+        if tick == 5:
+            sim.place_tower("FIREWALL", x + 40, y + 40)
+        if tick == 400:
+            sim.cycle_game_speed()
+        if tick == 700:
+            sim.set_tower_targeting(x + 40, y + 40, "STRONG")
+        if not sim.wave_in_progress and tick % 50 == 0:
+            sim.start_next_wave()
+        sim.step(16)
+    return sim, recorder.replay
+
+def test_seek_matches_a_full_replay():
+    sim, replay = record_match(1500, keyframe_interval=250)
+    assert len(replay.keyframes) > 2
+    for tick in (0, 249, 250, 251, 777, 1000, 1499, 1500):
+        full = Simulation(replay.mode, enemy_table=replay.enemy_table, seed=replay.seed)
+        while full.tick < tick:
+            assert replay.advance(full)
+        assert capture(replay.simulation(tick)) == capture(full)
+    assert capture(replay.simulation(replay.end_tick)) == capture(sim)
+
+def test_seek_clamps_to_the_recording():
+    sim, replay = record_match(300, keyframe_interval=100)
+    assert replay.simulation(-50).tick == 0
+    assert replay.simulation(10**6).tick == 300
+    assert not replay.advance(replay.simulation(300))
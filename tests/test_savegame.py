@@ -0,0 +1,119 @@
+import copy
+import pytest
+from src.savegame import Autosaver, capture, decode, encode, load_game, restore, save_game
+from src.simulation import Simulation
+
+def spawn_order(sim):
+    # Every enemy type still to spawn, in order, without touching the live schedule
+    schedule = copy.deepcopy(sim.enemies_to_spawn)
+    schedule.materialize()
+    groups = schedule.groups[schedule.group:]
+    if not groups:
+        return []
+    types = [enemy_type for enemy_type, count, delay in groups for _ in range(count)]
+    return types[schedule.spawned:]
+
+def fingerprint(sim):
+    # capture() minus how the spawn queue happens to be split into runs
+    state = capture(sim)
+    for key in ("spawn_groups", "spawn_cursor", "spawn_source"):
+        del state[key]
+    return state, spawn_order(sim), sim.enemies_to_spawn.next_due - sim.enemies_to_spawn.elapsed
+
+def play(sim, ticks):
+    for _ in range(ticks):
+        if not sim.wave_in_progress:
+            sim.start_next_wave()
+        if sim.pending_perk_choice:
+            sim.apply_perk(sim.generated_perks[0])
+        sim.step(16)
+
+def new_match(mode="STORY", enemy_table=False, seed=7):
+    sim = Simulation(mode=mode, enemy_table=enemy_table, seed=seed)
+    x, y = sim.waypoints[1]
+    sim.place_tower("FIREWALL", x + 40, y + 40)
+    sim.place_tower("ANTIVIRUS", x - 40, y + 40)
+    return sim
+
+@pytest.mark.parametrize("enemy_table", [False, True])
+@pytest.mark.parametrize("mode", ["STORY", "ENDLESS"])
+def test_restore_continues_identically(mode, enemy_table):
+    sim = new_match(mode, enemy_table)
+    play(sim, 900)
+    loaded = restore(decode(encode(capture(sim))))
+    assert fingerprint(loaded) == fingerprint(sim)
+    play(sim, 900)
+    play(loaded, 900)
+    assert fingerprint(loaded) == fingerprint(sim)
+
+def test_capture_leaves_a_lazy_endless_wave_lazy():
+    sim = new_match("ENDLESS")
+    sim.money = 10**6
+    sim.wave_index = 59
+    sim.start_next_wave()
+    schedule = sim.enemies_to_spawn
+    assert schedule.source is not None
+    play(sim, 120)
+    groups, source_state = list(schedule.groups), schedule.source.rng.getstate()
+    state = capture(sim)
+    assert schedule.groups == groups and schedule.source.rng.getstate() == source_state
+    assert state["spawn_source"] is not None
+
+    loaded = restore(decode(encode(state)))
+    assert loaded.enemies_to_spawn.source is not None
+    assert spawn_order(loaded) == spawn_order(sim)
+    play(sim, 600)
+    play(loaded, 600)
+    assert fingerprint(loaded) == fingerprint(sim)
+
+@pytest.mark.parametrize("seed", [0, -12345, 2**80, "daily 2026-10-18", ""])
+def test_any_int_or_str_seed_round_trips(seed):
+    sim = Simulation(seed=seed)
+    state = decode(encode(capture(sim)))
+    assert state["seed"] == seed and type(state["seed"]) is type(seed)
+    assert restore(state).rng.getstate() == sim.rng.getstate()
+
+@pytest.mark.parametrize("seed", [1.5, b"bytes", None, True])
+def test_unsaveable_seed_is_refused_at_capture(seed):
+    sim = Simulation(seed=1)
+    sim.seed = seed
+    with pytest.raises(ValueError):
+        capture(sim)
+
+def test_truncated_or_corrupted_file_raises_value_error():
+    sim = new_match()
+    play(sim, 600)
+    data = encode(capture(sim))
+    for size in (0, 3, 8, 13, len(data) // 2, len(data) - 1):
+        with pytest.raises(ValueError):
+            decode(data[:size])
+    with pytest.raises(ValueError):
+        decode(data + b"\0")
+    for offset in (4, 8, 20, len(data) // 2, len(data) - 1):
+        damaged = bytearray(data)
+        damaged[offset] ^= 0x5A
+        with pytest.raises(ValueError):
+            decode(bytes(damaged))
+
+def test_save_and_load_file(tmp_path):
+    sim = new_match(enemy_table=True)
+    play(sim, 600)
+    path = str(tmp_path / "match.cbsv")
+    save_game(sim, path)
+    assert fingerprint(load_game(path)) == fingerprint(sim)
+
+def test_autosaver_writes_in_the_background_and_keeps_errors(tmp_path):
+    sim = new_match()
+    play(sim, 300)
+    path = str(tmp_path / "auto.cbsv")
+    saver = Autosaver(path, interval_ms=1000)
+    saver.maybe_save(sim, 0)
+    saver.maybe_save(sim, 1000)
+    saver.close()
+    assert saver.error is None
+    assert fingerprint(load_game(path)) == fingerprint(sim)
+
+    saver = Autosaver(str(tmp_path / "missing" / "auto.cbsv"))
+    saver.save(sim)
+    saver.close()
+    assert isinstance(saver.error, OSError)
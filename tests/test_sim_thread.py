@@ -0,0 +1,50 @@
+import time
+from src.simulation import Simulation
+from src.sim_thread import SimulationThread
+
+def wait_for(thread, check, timeout=5.0):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        thread.update()
+        if check(thread.snapshot):
+            return True
+        time.sleep(0.005)
+    return False
+
+def test_queued_speed_presses_each_step_once():
+    thread = SimulationThread(Simulation(seed=1))
+    try:
+        # Both presses land before the worker runs either
+        thread.cycle_game_speed()
+        thread.cycle_game_speed()
+        assert wait_for(thread, lambda snapshot: snapshot.game_speed == 4.0)
+    finally:
+        thread.stop()
+
+def test_repeated_perk_click_applies_one_perk():
+    sim = Simulation(seed=2)
+    sim.wave_index = 3
+    sim.start_next_wave()
+    assert sim.pending_perk_choice
+    perk = sim.generated_perks[0]
+    thread = SimulationThread(sim)
+    try:
+        thread.apply_perk(perk)
+        thread.apply_perk(perk)
+        assert wait_for(thread, lambda snapshot: not snapshot.pending_perk_choice)
+    finally:
+        thread.stop()
+    assert sim.claimed_perks == {3}
+    fresh = Simulation(seed=2)
+    fresh.wave_index = 3
+    fresh.start_next_wave()
+    fresh.apply_perk(perk)
+    assert (sim.modifiers, sim.lives) == (fresh.modifiers, fresh.lives)
+
+def test_commands_after_stop_are_dropped():
+    thread = SimulationThread(Simulation(seed=3))
+    thread.stop()
+    for _ in range(100):
+        thread.check_loot_collection(10, 10)
+        thread.call(Simulation.buy_patch)
+    assert thread.commands.qsize() == 0
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import pytest
+from src.savegame import capture
+from src.simulation import Simulation
+
+def outcome(sim):
+    # Everything but the step count and the speed setting
+    state = capture(sim)
+    state["ints"] = state["ints"][1:]
+    state["floats"] = state["floats"][:2]
+    return state
+
+def defended_wave(enemy_table):
+    sim = Simulation(enemy_table=enemy_table, seed=9)
+    x, y = sim.waypoints[1]
+    sim.place_tower("FIREWALL", x + 40, y + 40)
+    sim.place_tower("HONEYPOT", x - 40, y + 40)
+    sim.place_tower("ANTIVIRUS", x + 40, y - 40)
+    sim.start_next_wave()
+    return sim
+
+@pytest.mark.parametrize("enemy_table", [False, True])
+def test_game_speed_gives_the_same_match_over_the_same_game_time(enemy_table):
+    # 1x, 2x and 4x over 19.2 s of game time: same fixed steps, same state
+    results = []
+    for speed in (1.0, 2.0, 4.0):
+        sim = defended_wave(enemy_table)
+        money = sim.money
+        sim.set_game_speed(speed)
+        for _ in range(int(1200 / speed)):
+            sim.step(16)
+        assert sim.clock.now == 1200 * 16
+        assert sim.money > money # Towers actually killed something
+        results.append(outcome(sim))
+    assert results[0] == results[1] == results[2]
+
+def test_uneven_frames_carry_the_remainder():
+    # 7 ms and 25 ms frames add up to whole steps; the remainder is kept for the next frame
+    even, uneven = defended_wave(False), defended_wave(False)
+    for _ in range(200):
+        even.step(16)
+        even.step(16)
+        uneven.step(7)
+        uneven.step(25)
+    assert uneven.accumulator == even.accumulator == 0
+    assert outcome(uneven) == outcome(even)
+
+def test_simulation_runs_without_pygame():
+    code = ("import sys; from src.simulation import Simulation; Simulation(seed=1).run(600); "
+            "from src.replay import Replay; from src.savegame import capture; "
+            "sys.exit('pygame' in sys.modules)")
+    root = __file__.rsplit("tests", 1)[0]
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
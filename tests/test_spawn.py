@@ -0,0 +1,85 @@
+import random
+from src.spawn import SpawnSchedule
+
+def expand(groups):
+    return [enemy_type for enemy_type, count, delay in groups for _ in range(count)]
+
+def drain(schedule, ticks):
+    released = []
+    for dt in ticks:
+        released.extend(schedule.due(dt))
+    return released
+
+def test_empty_schedule():
+    schedule = SpawnSchedule()
+    assert not schedule
+    assert len(schedule) == 0
+    assert schedule.due(1000) == ()
+    assert schedule.elapsed == 1000
+
+def test_empty_groups_are_skipped():
+    schedule = SpawnSchedule([("MALWARE", 0, 100), ("DDOS", 2, 50), ("PHISHING", 0, 10)])
+    assert len(schedule) == 2
+    assert drain(schedule, [50, 50]) == ["DDOS", "DDOS"]
+    assert not schedule
+
+def test_run_ending_exactly_on_a_tick():
+    # Each enemy is due on a tick boundary: released on that tick, not the next
+    schedule = SpawnSchedule([("MALWARE", 3, 100)])
+    assert not schedule.due(99)
+    assert schedule.due(1) == ["MALWARE"]
+    assert schedule.due(100) == ["MALWARE"]
+    assert schedule.due(100) == ["MALWARE"]
+    assert not schedule
+    assert schedule.due(100) == ()
+
+def test_long_tick_releases_everything_due_in_order():
+    schedule = SpawnSchedule([("MALWARE", 2, 100), ("DDOS", 1, 50), ("PHISHING", 2, 100)])
+    assert schedule.due(250) == ["MALWARE", "MALWARE", "DDOS"]
+    assert schedule.due(10**6) == ["PHISHING", "PHISHING"]
+
+def test_due_times_do_not_drift():
+    # The same wave over short and long ticks releases each enemy on the
+    # first tick at or after its due time
+    groups = [("MALWARE", 5, 300), ("DDOS", 3, 120)]
+    due_at = [300, 600, 900, 1200, 1500, 1620, 1740, 1860]
+    for tick in (16, 64, 250, 1000):
+        schedule = SpawnSchedule(groups)
+        released = []
+        now = 0
+        while schedule:
+            now += tick
+            released.extend(now for _ in schedule.due(tick))
+        assert released == [-(-at // tick) * tick for at in due_at]
+
+def test_cursor_matches_materialized_list():
+    rng = random.Random(5)
+    for _ in range(50):
+        groups = [(rng.choice(["MALWARE", "DDOS", "ZEUS"]), rng.randint(0, 6), rng.randint(0, 400))
+                  for _ in range(rng.randint(0, 8))]
+        ticks = [rng.choice([1, 16, 33, 500]) for _ in range(400)]
+        for source in (groups, iter(groups)): # A list, and an iterator pulled lazily
+            schedule = SpawnSchedule(source)
+            released = []
+            for dt in ticks + [10**9]:
+                released.extend(schedule.due(dt))
+                # The cursor points just past what has been released
+                done = sum(count for enemy_type, count, delay in schedule.groups[:schedule.group]) + schedule.spawned
+                assert done == len(released)
+                if schedule:
+                    assert schedule.groups[schedule.group][0] == expand(groups)[done]
+            assert released == expand(groups)
+            assert not schedule
+
+def test_extend_after_wave_end_times_from_now():
+    schedule = SpawnSchedule([("MALWARE", 1, 100)])
+    assert schedule.due(500) == ["MALWARE"]
+    schedule.extend([("DDOS", 1, 200)])
+    assert not schedule.due(199)
+    assert schedule.due(1) == ["DDOS"]
+
+def test_extend_queues_behind_current_runs():
+    schedule = SpawnSchedule([("MALWARE", 2, 100)])
+    schedule.extend([("DDOS", 1, 100)])
+    assert len(schedule) >= 1
+    assert drain(schedule, [100] * 3) == ["MALWARE", "MALWARE", "DDOS"]
@@ -0,0 +1,32 @@
+import pygame
+import pytest
+from src.constants import TOWER_TYPES
+from src.sprites import SpriteAtlas
+from src.visuals import draw_tower_visual
+
+BACKGROUND = (10, 30, 10)
+
+@pytest.fixture(scope="module", params=[False, True], ids=["no display", "display"])
+def atlas(request):
+    pygame.init()
+    if request.param:
+        pygame.display.set_mode((200, 200))
+    yield SpriteAtlas()
+    pygame.display.quit()
+
+@pytest.mark.parametrize("tower_type", list(TOWER_TYPES))
+def test_baked_tower_matches_the_direct_draw(atlas, tower_type):
+    color = TOWER_TYPES[tower_type]["color"]
+    direct = pygame.Surface((200, 200))
+    direct.fill(BACKGROUND)
+    draw_tower_visual(direct, tower_type, 100, 100, 40, 40, color)
+
+    sprite, (ax, ay) = atlas.tower(tower_type, 40, 40, color)
+    # The glow border is stored at full colour with its own alpha, not premultiplied
+    assert tuple(sprite.get_at((2, 25))) == (*color, 50)
+    baked = pygame.Surface((200, 200))
+    baked.fill(BACKGROUND)
+    baked.blit(sprite, (100 - ax, 100 - ay))
+    for x in range(70, 131):
+        for y in range(70, 131):
+            assert baked.get_at((x, y)) == direct.get_at((x, y))
@@ -0,0 +1,96 @@
+import random
+import pytest
+from src.constants import DAMAGE_MULTIPLIERS, ENEMY_TYPES, TARGETING_MODES
+from src.enemy import enemy_pool
+from src.simulation import Simulation
+from src.tower import Tower
+
+KEYS = {
+    "FIRST": lambda tower, e: e.distance,
+    "LAST": lambda tower, e: e.distance,
+    "STRONGEST": lambda tower, e: e.health,
+    "WEAKEST": lambda tower, e: e.health,
+    "CLOSEST": lambda tower, e: (e.x - tower.x)**2 + (e.y - tower.y)**2,
+}
+
+def crowded_level(level, enemy_table=False, count=1500, seed=0):
+    # Enemies scattered along the whole path with mixed health, and towers all over the map
+    sim = Simulation("STORY", enemy_table=enemy_table, seed=seed)
+    sim.load_level(level)
+    rng = random.Random(seed)
+    table = sim.enemy_table
+    for _ in range(count):
+        enemy_type = rng.choice(["MALWARE", "PHISHING", "DDOS"])
+        distance = rng.uniform(0, sim.path.length - 1)
+        x, y, seg = sim.path.position(distance)
+        health = ENEMY_TYPES[enemy_type]["health"] * rng.uniform(0.1, 1.0)
+        if table is not None:
+            enemy = table.spawn(enemy_type)
+            i = enemy.index
+            table.dist[i], table.x[i], table.y[i], table.seg[i], table.health[i] = distance, x, y, seg + 1, health
+        else:
+            enemy = enemy_pool.acquire(enemy_type, sim.path)
+            enemy.distance, enemy.x, enemy.y, enemy.waypoint_index, enemy.health = distance, x, y, seg + 1, health
+        sim.enemies.append(enemy)
+        sim.enemy_grid.insert(enemy)
+    towers = [Tower(rng.choice(["FIREWALL", "ANTIVIRUS", "IDS"]), rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(60)]
+    sim.targets.reset(sim.enemies)
+    return sim, towers
+
+@pytest.mark.parametrize("enemy_table", [False, True])
+@pytest.mark.parametrize("level", [0, 1, 2])
+@pytest.mark.parametrize("mode", TARGETING_MODES)
+def test_index_picks_what_a_full_scan_picks(level, mode, enemy_table):
+    sim, towers = crowded_level(level, enemy_table)
+    for tower in towers:
+        tower.targeting = mode
+        in_range = list(sim.enemy_grid.query(tower.x, tower.y, tower.range))
+        picked = sim.targets.best(tower)
+        if not in_range:
+            assert picked is None
+            continue
+        assert picked in in_range
+        key = KEYS[mode]
+        best = (max if mode in ("FIRST", "STRONGEST") else min)(key(tower, e) for e in in_range)
+        assert key(tower, picked) == pytest.approx(best)
+
+@pytest.mark.parametrize("enemy_table", [False, True])
+def test_within_is_the_range_query(enemy_table):
+    sim, towers = crowded_level(2, enemy_table)
+    for tower in towers:
+        expected = {id(e) for e in sim.enemy_grid.query(tower.x, tower.y, tower.range)}
+        found = sim.targets.within(tower.x, tower.y, tower.range)
+        assert len(found) == len(expected) and {id(e) for e in found} == expected
+
+@pytest.mark.parametrize("enemy_table", [False, True])
+def test_honeypot_slows_exactly_the_enemies_in_range(enemy_table):
+    sim, towers = crowded_level(1, enemy_table)
+    honeypot = Tower("HONEYPOT", *sim.waypoints[2])
+    in_range = {id(e) for e in sim.enemy_grid.query(honeypot.x, honeypot.y, honeypot.range)}
+    assert in_range
+    honeypot.acquire_target(sim.enemy_grid, 16, 1.0, sim.targets)
+    multipliers = DAMAGE_MULTIPLIERS["HONEYPOT"]
+    for enemy in sim.enemies:
+        if id(enemy) in in_range:
+            slow = min(1.0, honeypot.slow_factor / multipliers.get(enemy.type, 1.0))
+            assert enemy.slow_timer == 100 and enemy.speed == pytest.approx(enemy.base_speed * slow)
+        else:
+            assert enemy.slow_timer == 0 and enemy.speed == enemy.base_speed
+
+def test_sticky_target_is_kept_until_it_leaves_range():
+    sim = Simulation(seed=5)
+    x, y = sim.waypoints[1]
+    tower = Tower("FIREWALL", x, y + 30)
+    sim.towers.append(tower)
+    sim.start_next_wave()
+    first = None
+    for _ in range(2000):
+        sim.step(16)
+        if tower.target is not None and first is None:
+            first, gen = tower.target, tower.target.gen
+        if first is not None and tower.target is not first:
+            # Only let go once it died (and was pooled) or walked out of range
+            assert first.gen != gen or first.health <= 0 or \
+                (first.x - tower.x)**2 + (first.y - tower.y)**2 > tower.range**2
+            break
+    assert first is not None
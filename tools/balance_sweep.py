@@ -0,0 +1,204 @@
+import argparse
+import copy
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.constants import *
+from src.simulation import Simulation
+from src.placement import build_spots
+
+# Monte Carlo balance sweep over the tables in src/constants.py.
+#
+# Every configuration (a set of table overrides) is played headless by a
+# scripted bot on each LEVELS entry and on a run of endless waves, several
+# seeds each. Matches are independent, so they are spread over a
+# ProcessPoolExecutor and the sweep scales with cores. Results are
+# aggregated per (configuration, scenario) and written as CSV.
+#
+# Parameters are dotted paths into the tables:
+#   TOWER_TYPES.FIREWALL.damage   ENEMY_TYPES.MALWARE.health
+#   DAMAGE_MULTIPLIERS.IDS.DDOS
+#
+#   python tools/balance_sweep.py --grid TOWER_TYPES.FIREWALL.damage=8,10,12 \
+#       --grid ENEMY_TYPES.MALWARE.health=25,30 --seeds 8 --out sweep.csv
+#   python tools/balance_sweep.py --sample 200 --range TOWER_TYPES.IDS.rate=30:80
+
+BUILD_ORDER = ["FIREWALL", "ANTIVIRUS", "FIREWALL", "IDS", "HONEYPOT", "ANTIVIRUS"]
+MAX_MATCH_MS = 30 * 60 * 1000 # Game time before a match is called off
+
+TABLES = {
+    "TOWER_TYPES": TOWER_TYPES,
+    "ENEMY_TYPES": ENEMY_TYPES,
+    "DAMAGE_MULTIPLIERS": DAMAGE_MULTIPLIERS,
+}
+
+DEFAULTS = copy.deepcopy(TABLES)
+
+def apply_overrides(overrides):
+    # Runs inside a worker process, so editing the shared tables in place is
+    # safe. Workers are reused across jobs, so start from the shipped values.
+    for name, table in TABLES.items():
+        table.clear()
+        table.update(copy.deepcopy(DEFAULTS[name]))
+    for name, value in overrides:
+        table, key, field = name.split(".")
+        TABLES[table][key][field] = value
+
+def check_param(name):
+    # Why name isn't a table entry this sweep can override (None if it is).
+    # A misspelt type or field would otherwise sweep the defaults unnoticed.
+    parts = name.split(".")
+    if len(parts) != 3:
+        return f"{name} is not TABLE.KEY.FIELD"
+    table, key, field = parts
+    if table not in TABLES:
+        return f"unknown table in {name}"
+    if key not in DEFAULTS[table]:
+        return f"unknown {table} entry {key!r} in {name}"
+    # Multipliers a tower doesn't list are 1.0, so any enemy type may be set
+    fields = ENEMY_TYPES if table == "DAMAGE_MULTIPLIERS" else DEFAULTS[table][key]
+    if field not in fields:
+        return f"unknown field {field!r} in {name}"
+    return None
+
+class Bot:
+    # Scripted player: builds BUILD_ORDER at the best free spots whenever it
+    # can afford to, takes the first perk offered, and calls waves early
+    def __init__(self, sim):
+        self.sim = sim
+        self.spots = {t: build_spots(sim.waypoints, TOWER_TYPES[t]["range"]) for t in set(BUILD_ORDER)}
+        self.used = set()
+        self.next_build = 0
+
+    def act(self):
+        sim = self.sim
+        if sim.pending_perk_choice and sim.generated_perks:
+            sim.apply_perk(sim.generated_perks[0])
+
+        tower_type = BUILD_ORDER[self.next_build % len(BUILD_ORDER)]
+        cost = int(TOWER_TYPES[tower_type]["cost"] * sim.modifiers["cost"])
+        if sim.money >= cost:
+            for spot in self.spots[tower_type]:
+                if spot not in self.used:
+                    if sim.place_tower(tower_type, *spot):
+                        self.used.add(spot)
+                        self.next_build += 1
+                    break
+
+        if not sim.wave_in_progress and not sim.level_complete:
+            sim.start_next_wave()
+
+def play(sim, dt_ms, stop):
+    # Returns lives lost to leaks (perks can add lives, so the end total can't be used)
+    bot = Bot(sim)
+    elapsed = 0
+    lives_lost = 0
+    while not (sim.game_over or sim.game_won or stop(sim)) and elapsed < MAX_MATCH_MS:
+        bot.act()
+        lives = sim.lives
+        sim.step(dt_ms)
+        lives_lost += max(0, lives - sim.lives)
+        elapsed += dt_ms
+    return lives_lost
+
+def run_match(job):
+    # One headless match: (config_id, overrides, scenario, seed, dt_ms, endless_waves)
+    config_id, overrides, scenario, seed, dt_ms, endless_waves = job
+    apply_overrides(overrides)
+
+    if scenario == "ENDLESS":
+        sim = Simulation(mode="ENDLESS", seed=seed)
+        lives_lost = play(sim, dt_ms, lambda s: s.wave_index >= endless_waves and not s.wave_in_progress)
+        won = not sim.game_over and sim.wave_index >= endless_waves
+    else:
+        sim = Simulation(mode="STORY", seed=seed)
+        sim.load_level(scenario)
+        lives_lost = play(sim, dt_ms, lambda s: s.level_complete)
+        won = sim.level_complete and not sim.game_over
+
+    return {
+        "config": config_id,
+        "scenario": "ENDLESS" if scenario == "ENDLESS" else LEVELS[scenario]["name"],
+        "won": won,
+        "lives_lost": lives_lost,
+        "money_left": sim.money,
+        "waves": sim.wave_index,
+    }
+
+def parse_value(text):
+    return float(text) if "." in text else int(text)
+
+def grid_configs(grid):
+    names = [name for name, _ in grid]
+    for values in itertools.product(*[values for _, values in grid]):
+        yield list(zip(names, values))
+
+def sample_configs(ranges, count, rng):
+    for _ in range(count):
+        config = []
+        for name, (low, high) in ranges:
+            value = rng.uniform(low, high)
+            config.append((name, round(value) if isinstance(low, int) and isinstance(high, int) else round(value, 3)))
+        yield config
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Monte Carlo balance sweep")
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=V1,V2,...")
+    parser.add_argument("--range", action="append", default=[], metavar="PARAM=LOW:HIGH")
+    parser.add_argument("--sample", type=int, default=0, help="Random configurations drawn from --range")
+    parser.add_argument("--seeds", type=int, default=4, help="Matches per configuration and scenario")
+    parser.add_argument("--endless-waves", type=int, default=15)
+    parser.add_argument("--dt", type=int, default=FRAME_MS, help="Simulation step in ms")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="-", help="CSV path (default stdout)")
+    args = parser.parse_args(argv)
+
+    grid = [(name, [parse_value(v) for v in values.split(",")]) for name, values in (g.split("=") for g in args.grid)]
+    ranges = [(name, tuple(parse_value(v) for v in bounds.split(":"))) for name, bounds in (r.split("=") for r in args.range)]
+    for name, _ in grid + ranges:
+        error = check_param(name)
+        if error:
+            parser.error(error)
+
+    if args.sample:
+        configs = list(sample_configs(ranges, args.sample, random.Random(0)))
+    else:
+        configs = list(grid_configs(grid))
+
+    scenarios = list(range(len(LEVELS))) + ["ENDLESS"]
+    jobs = [(i, config, scenario, seed, args.dt, args.endless_waves)
+            for i, config in enumerate(configs) for scenario in scenarios for seed in range(args.seeds)]
+
+    start = time.perf_counter()
+    totals = {} # (config, scenario): [runs, wins, lives_lost, money_left, waves]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(run_match, jobs, chunksize=max(1, len(jobs) // (args.workers * 8))):
+            row = totals.setdefault((result["config"], result["scenario"]), [0, 0, 0, 0, 0])
+            row[0] += 1
+            row[1] += result["won"]
+            row[2] += result["lives_lost"]
+            row[3] += result["money_left"]
+            row[4] += result["waves"]
+
+    params = [name for name, _ in grid + ranges]
+    out = sys.stdout if args.out == "-" else open(args.out, "w", newline="")
+    writer = csv.writer(out)
+    writer.writerow(["config"] + params + ["scenario", "runs", "win_rate", "lives_lost", "money_left", "waves"])
+    for (config_id, scenario), (runs, wins, lives_lost, money_left, waves) in totals.items():
+        values = dict(configs[config_id])
+        writer.writerow([config_id] + [values.get(name, "") for name in params] +
+                        [scenario, runs, round(wins / runs, 3), round(lives_lost / runs, 2), round(money_left / runs, 1), round(waves / runs, 2)])
+    if out is not sys.stdout:
+        out.close()
+
+    print(f"{len(jobs)} matches in {time.perf_counter() - start:.1f}s on {args.workers} workers", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.constants import *
+from src.placement import optimize, BEAM_WIDTH, SPOTS_PER_TYPE
+
+# Tower placement optimizer for a story level.
+#
+# Beam search over layouts on the GRID_SIZE lattice within the level's
+# starting money (or --budget). Each layout is scored by playing all of
+# the level's waves headless with no further building, across a process
+# pool; matches are cut short once they leak more than the current beam's
+# worst layout. Prints the best layouts with their scores.
+#
+#   python tools/placement_optimizer.py --level 0
+#   python tools/placement_optimizer.py --level 2 --budget 1200 --beam 6 --top 10
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless tower placement optimizer")
+    parser.add_argument("--level", type=int, default=0, help="Index into LEVELS")
+    parser.add_argument("--budget", type=int, help="Money to spend (default: the level's starting money)")
+    parser.add_argument("--beam", type=int, default=BEAM_WIDTH, help="Layouts extended at each depth")
+    parser.add_argument("--spots", type=int, default=SPOTS_PER_TYPE, help="Candidate cells per tower type")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dt", type=int, default=FRAME_MS, help="Simulation step in ms")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--top", type=int, default=5, help="Layouts to print")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.level < len(LEVELS):
+        parser.error(f"--level must be 0..{len(LEVELS) - 1}")
+
+    start = time.perf_counter()
+    ranked = optimize(args.level, args.budget, beam=args.beam, spots=args.spots, seed=args.seed,
+                      dt_ms=args.dt, workers=args.workers)
+    budget = LEVELS[args.level]["starting_money"] if args.budget is None else args.budget
+
+    print(f"{LEVELS[args.level]['name']}, budget ${budget}")
+    for place, result in enumerate(ranked[:args.top], 1):
+        towers = "  ".join(f"{tower_type}@({x},{y})" for tower_type, x, y in result["layout"])
+        print(f"{place:>2}. lives lost {result['lives_lost']:>2}  money left ${result['money_left']:<6}"
+              f"{'WON ' if result['won'] else 'LOST'}  {towers}")
+    print(f"{len(ranked)} layouts ranked in {time.perf_counter() - start:.1f}s on {args.workers} workers", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()